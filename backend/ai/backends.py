@@ -0,0 +1,333 @@
+# ai/backends.py
+"""
+AI backends used by ai/services.py.
+
+AI_BACKEND selects the implementation:
+- "mock": returns canned data after a simulated model latency (default).
+- "http": calls a model API over a pooled keep-alive httpx client with
+  timeouts, retries and a circuit breaker. Point AI_BACKEND_URL at the stub
+  server (`manage.py run_ai_stub_server`) to benchmark without a real model.
+
+Both expose the same interface: `analyse_image(image_bytes)` returns detected
+items, `generate_captions(payload)` returns captions (`agenerate_captions` is
+its coroutine version for async views),
+`generate_captions_batch(payloads)` returns the captions of several requests
+from one model call and the async generator `astream_captions(payload)`
+yields each caption as soon as it is produced.
+"""
+import asyncio
+import json
+import logging
+import time
+import weakref
+from threading import Lock
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MOCK_LATENCY = 1.5  # Seconds, simulates model processing time
+
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failed calls before the circuit opens
+CIRCUIT_RESET_TIMEOUT = 30  # Seconds the circuit stays open before a trial call is allowed
+RETRY_BACKOFF = 0.2  # Seconds, doubled after each retry
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+# Mocked detected food items (Replace with actual AI model output)
+MOCK_DETECTED_ITEMS = ["Steak", "Grilled Meat", "Garlic", "Herbs", "Lemon", "Lamb"]
+
+# Mocked AI-generated captions (Replace with actual AI model output)
+MOCK_GENERATED_CAPTIONS = [
+    "🔥 New Menu Alert! 🔥\nExperience the perfect balance of smoky grilled steak, fresh herbs, and a zesty lemon kick. 🍋🥩 Our new menu is designed for true food lovers who crave bold flavors in a cozy, premium dining atmosphere. 🍷✨\n📍 Available now – tag your foodie friends and come try it! #NewMenu #SteakLover #PremiumDining",
+    "Indulge in perfection. 🥩✨\nJuicy, tender, and grilled to perfection – our newest menu item is here to elevate your dining experience. A hint of garlic, fresh herbs, and a citrus twist make every bite unforgettable. 🍋🔥\nTag someone who needs to try this! #FoodieHeaven #SteakGoals #NewMenu",
+    "New menu, who dis? 🥩🔥\nCrispy sear, juicy center, and that zesty lemon-garlic hit. You know you want it. 🍋💥\nPull up. #NewMenu #SteakDoneRight",
+    "👀 Can you smell that? That’s the sound of your next favorite meal sizzling to perfection! 🥩🔥\nGarlic, herbs, and a squeeze of fresh lemon—simple, yet unforgettable. 🍋✨\nDrop a 🔥 in the comments if you’re craving this right now! #FoodieLife #SteakPerfection #NewOnTheMenu",
+    "✨ A new flavor experience awaits! ✨\nOur latest menu addition combines the rich, smoky taste of perfectly grilled steak with a refreshing citrus twist and aromatic herbs. 🍽️ Whether you're here for a casual night out or a premium dining experience, this one’s for you! 🍷\nCome taste the difference. Reservations recommended! #NewMenu #SteakLover #DiningExperience"
+]
+
+
+class AIBackendError(Exception):
+    """Raised when the AI backend cannot produce a result."""
+
+
+class CircuitOpenError(AIBackendError):
+    """Raised without calling the backend while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast after repeated backend failures.
+
+    Closed: calls go through. After `failure_threshold` consecutive failures the
+    circuit opens and calls are rejected for `reset_timeout` seconds; then one
+    trial call is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+        self._lock = Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_progress or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_progress = False
+
+
+class MockBackend:
+    """Returns the mock payloads after a simulated model latency."""
+
+    def __init__(self, latency=MOCK_LATENCY):
+        self.latency = latency
+
+    def analyse_image(self, image_bytes):
+        time.sleep(self.latency)
+        return list(MOCK_DETECTED_ITEMS)
+
+    def generate_captions(self, payload):
+        time.sleep(self.latency)
+        return list(MOCK_GENERATED_CAPTIONS)
+
+    async def agenerate_captions(self, payload):
+        await asyncio.sleep(self.latency)
+        return list(MOCK_GENERATED_CAPTIONS)
+
+    def generate_captions_batch(self, payloads):
+        time.sleep(self.latency)
+        return [list(MOCK_GENERATED_CAPTIONS) for _ in payloads]
+
+    async def astream_captions(self, payload):
+        # Captions are produced one after another, so the first is ready after a fraction of the latency
+        delay = self.latency / len(MOCK_GENERATED_CAPTIONS)
+        for caption in MOCK_GENERATED_CAPTIONS:
+            await asyncio.sleep(delay)
+            yield caption
+
+
+class HTTPBackend:
+    """
+    Calls a model API over HTTP.
+
+    One httpx.Client is shared by all threads of the process, so TLS connections
+    are pooled and kept alive between requests instead of being opened per call.
+    Async and streaming calls use an httpx.AsyncClient with the same settings,
+    one per event loop because async connections cannot be shared between loops.
+    """
+
+    def __init__(self, base_url, api_key="", timeout=30.0, connect_timeout=5.0,
+                 max_connections=20, retries=2, breaker=None):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.retries = retries
+        self.breaker = breaker or CircuitBreaker()
+        self._client_options = {
+            "base_url": base_url,
+            "headers": headers,
+            "timeout": httpx.Timeout(timeout, connect=connect_timeout),
+            "limits": httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        }
+        self.client = httpx.Client(**self._client_options)
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def analyse_image(self, image_bytes):
+        return self._post(
+            "/v1/images/analyse",
+            lambda data: _list_field(data, "detected_items"),
+            files={"image": ("image.jpg", image_bytes, "image/jpeg")},
+            data={"model": settings.AI_VISION_MODEL},
+        )
+
+    def generate_captions(self, payload):
+        return self._post(
+            "/v1/captions/generate",
+            lambda data: _list_field(data, "captions"),
+            json={**payload, "model": settings.AI_CAPTION_MODEL},
+        )
+
+    async def agenerate_captions(self, payload):
+        return await self._apost(
+            "/v1/captions/generate",
+            lambda data: _list_field(data, "captions"),
+            json={**payload, "model": settings.AI_CAPTION_MODEL},
+        )
+
+    def generate_captions_batch(self, payloads):
+        def captions_per_request(data):
+            results = _list_field(data, "results")
+            if len(results) != len(payloads):
+                raise ValueError(f"{len(results)} results for {len(payloads)} requests")
+            return [_list_field(result, "captions") for result in results]
+
+        return self._post(
+            "/v1/captions/generate/batch",
+            captions_per_request,
+            json={"model": settings.AI_CAPTION_MODEL, "requests": payloads},
+        )
+
+    async def astream_captions(self, payload):
+        """
+        Yield captions from the NDJSON stream of /v1/captions/stream as they arrive.
+        Not retried: captions already passed on to the caller cannot be taken back.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("AI backend is unavailable, try again shortly.")
+
+        failed = False
+        try:
+            request = {**payload, "model": settings.AI_CAPTION_MODEL}
+            async with self._async_client().stream("POST", "/v1/captions/stream", json=request) as response:
+                if response.is_error and response.status_code < 500 and response.status_code not in RETRYABLE_STATUS_CODES:
+                    raise AIBackendError(f"AI backend rejected the request: HTTP {response.status_code}")
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line:
+                        yield json.loads(line)["caption"]
+        except (httpx.HTTPError, ValueError, KeyError, TypeError) as e:
+            failed = True
+            self.breaker.record_failure()
+            logger.error(f"❌ AI backend caption stream failed: {str(e) or type(e).__name__}")
+            raise AIBackendError(f"AI backend request failed: {str(e) or type(e).__name__}") from e
+        finally:
+            if not failed:
+                # Completed, rejected or abandoned by the client: the backend itself answered
+                self.breaker.record_success()
+
+    def _async_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = httpx.AsyncClient(**self._client_options)
+        return client
+
+    def _post(self, path, extract, **kwargs):
+        """POST to `path` and return `extract` applied to the JSON response, retrying failed calls."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("AI backend is unavailable, try again shortly.")
+
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                response = self.client.post(path, **kwargs)
+            except httpx.TransportError as e:
+                last_error = str(e) or type(e).__name__
+                continue
+
+            data, last_error = self._read_response(response, extract)
+            if last_error is None:
+                return data
+
+        self._give_up(path, last_error)
+
+    async def _apost(self, path, extract, **kwargs):
+        """`_post` for async callers: waiting on the backend does not hold a thread."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("AI backend is unavailable, try again shortly.")
+
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                response = await self._async_client().post(path, **kwargs)
+            except httpx.TransportError as e:
+                last_error = str(e) or type(e).__name__
+                continue
+
+            data, last_error = self._read_response(response, extract)
+            if last_error is None:
+                return data
+
+        self._give_up(path, last_error)
+
+    def _read_response(self, response, extract):
+        """Return (extracted data, None) for a usable response, or (None, error) if the call is worth retrying."""
+        if response.status_code in RETRYABLE_STATUS_CODES or response.status_code >= 500:
+            return None, f"HTTP {response.status_code}"
+        if response.is_error:
+            # The backend is up but rejected the request; retrying will not help
+            self.breaker.record_success()
+            raise AIBackendError(f"AI backend rejected the request: HTTP {response.status_code}")
+
+        try:
+            data = response.json()
+        except ValueError:
+            return None, "invalid JSON response"
+        try:
+            data = extract(data)
+        except (TypeError, ValueError) as e:
+            # Valid JSON in the wrong shape, e.g. from a proxy or a changed API
+            return None, f"malformed response: {e}"
+
+        self.breaker.record_success()
+        return data, None
+
+    def _give_up(self, path, last_error):
+        self.breaker.record_failure()
+        logger.error(f"❌ AI backend call to {path} failed: {last_error}")
+        raise AIBackendError(f"AI backend request failed: {last_error}")
+
+
+def _list_field(data, key):
+    """`data[key]`, raising TypeError unless `data` is an object whose `key` is a list."""
+    if not isinstance(data, dict) or not isinstance(data.get(key), list):
+        raise TypeError(f"expected an object with a '{key}' list")
+    return data[key]
+
+
+_backend = None
+_backend_lock = Lock()
+
+
+def get_backend():
+    """Return the process-wide AI backend selected by AI_BACKEND."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _build_backend()
+    return _backend
+
+
+def _build_backend():
+    if settings.AI_BACKEND == "http":
+        return HTTPBackend(
+            base_url=settings.AI_BACKEND_URL,
+            api_key=settings.AI_BACKEND_API_KEY,
+            timeout=settings.AI_BACKEND_TIMEOUT,
+            max_connections=settings.AI_BACKEND_MAX_CONNECTIONS,
+            retries=settings.AI_BACKEND_RETRIES,
+        )
+    if settings.AI_BACKEND == "mock":
+        return MockBackend()
+    raise ValueError(f"Unknown AI_BACKEND '{settings.AI_BACKEND}'. Choose 'mock' or 'http'.")
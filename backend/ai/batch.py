@@ -0,0 +1,145 @@
+# ai/batch.py
+"""
+Caption generation for a batch of posts.
+
+Every item (an uploaded image or a list of detected items) is processed
+concurrently: images are analysed on the bounded AI worker pool (see
+ai/jobs.py) and caption requests that become ready at about the same time are
+grouped into one backend call. Results are yielded per item as soon as they
+are ready, so a batch takes about as long as its slowest item.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .backends import AIBackendError
+from .cache import caption_cache_key, get_cached_analysis, get_cached_captions, store_captions
+from .jobs import analyse_content, get_executor
+from .services import detect_items, generate_captions_batch
+from .uploadhandlers import file_digest
+
+logger = logging.getLogger(__name__)
+
+BATCH_WINDOW = 0.02  # Seconds to wait for more caption requests before calling the backend
+
+
+class CaptionBatcher:
+    """
+    Group caption requests issued within `window` seconds into one backend call.
+    A call is made early once `max_size` requests are waiting.
+    """
+
+    def __init__(self, max_size, window=BATCH_WINDOW):
+        self.max_size = max(1, max_size)
+        self.window = window
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def generate(self, caption_inputs):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((caption_inputs, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)  # Keep a reference until the task is done
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                get_executor(), generate_captions_batch, [inputs for inputs, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), captions in zip(batch, results):
+            if not future.done():
+                future.set_result(captions)
+
+
+def _analyse_upload(image):
+    """Return (detected_items, cached) for an uploaded image. Runs on a worker thread."""
+    close_old_connections()
+    try:
+        content_hash = file_digest(image)
+        detected_items = get_cached_analysis(content_hash)
+        if detected_items is not None:
+            return detected_items, True
+        return analyse_content(content_hash, lambda: detect_items(image)), False
+    finally:
+        close_old_connections()
+
+
+async def caption_batch(images, item_lists, business, options):
+    """
+    Caption every image or detected-item list and yield `(event, data)` pairs as results arrive.
+
+    Events, each carrying the `index` of its item:
+    - `analysis`: the detected items of an image.
+    - `captions`: the captions of an item.
+    - `error`: the item failed; other items are unaffected.
+    `options` holds the shared business_info, post_categories, platform_states and custom_text.
+    """
+    loop = asyncio.get_running_loop()
+    batcher = CaptionBatcher(settings.AI_BACKEND_BATCH_SIZE)
+    events = asyncio.Queue()
+
+    async def process(index, image=None, detected_items=None):
+        try:
+            if image is not None:
+                detected_items, cached = await loop.run_in_executor(get_executor(), _analyse_upload, image)
+                await events.put(("analysis", {"index": index, "detected_items": detected_items, "cached": cached}))
+
+            caption_inputs = {"detected_items": detected_items, **options}
+            cache_key = caption_cache_key(business, **caption_inputs)
+            captions = await sync_to_async(get_cached_captions)(cache_key)
+            cached = captions is not None
+            if not cached:
+                captions = await batcher.generate(caption_inputs)
+                await sync_to_async(store_captions)(cache_key, captions)
+            await events.put(("captions", {
+                "index": index, "detected_items": detected_items, "captions": captions, "cached": cached,
+            }))
+        except AIBackendError as e:
+            await events.put(("error", {"index": index, "error": str(e)}))
+        except Exception as e:
+            logger.error(f"❌ Batch caption item {index} failed: {e}", exc_info=True)
+            await events.put(("error", {"index": index, "error": "Caption generation failed"}))
+        finally:
+            await events.put(None)
+
+    tasks = [asyncio.create_task(process(index, image=image)) for index, image in enumerate(images)]
+    tasks += [
+        asyncio.create_task(process(index, detected_items=items))
+        for index, items in enumerate(item_lists, start=len(images))
+    ]
+
+    remaining = len(tasks)
+    try:
+        while remaining:
+            event = await events.get()
+            if event is None:
+                remaining -= 1
+            else:
+                yield event
+    finally:
+        # The client may have disconnected; stop waiting on the rest of the batch
+        for task in tasks:
+            task.cancel()
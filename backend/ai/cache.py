@@ -0,0 +1,96 @@
+# ai/cache.py
+"""
+Result caches for AI calls.
+
+Image analysis results are keyed by the SHA-256 of the image and the vision
+model version, stored persistently in ImageAnalysisResult and fronted by a
+per-process LRU so repeat analyses of the same photo skip the database too.
+
+Generated captions are kept in the "ai" cache (LRU-bounded, with a TTL; see
+CACHES in settings) under a hash of the normalized generation inputs.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+from config.cache import LRUCache
+from config.instrumentation import record_cache_lookup
+from .models import ImageAnalysisResult
+from .services import caption_model_version, vision_model_version
+
+# Only these business_info keys influence the generated captions
+CAPTION_BUSINESS_INFO_KEYS = ("name", "category", "target_customers", "vibe")
+# Stored business fields that caption_cache_key reads
+CAPTION_BUSINESS_FIELDS = ("id", "target_customers", "vibe")
+
+_analysis_cache = LRUCache(settings.AI_ANALYSIS_CACHE_SIZE)
+
+
+def get_cached_analysis(content_hash):
+    """Return the cached detected items of an image for the current model, or None."""
+    key = (content_hash, vision_model_version())
+    detected_items = _analysis_cache.get(key)
+    if detected_items is not None:
+        return detected_items
+
+    result = ImageAnalysisResult.objects.filter(content_hash=content_hash, model_version=key[1]).first()
+    if result is None:
+        return None
+
+    _analysis_cache.set(key, result.detected_items)
+    return result.detected_items
+
+
+def store_analysis(content_hash, detected_items):
+    """Cache the detected items of an image for the current model."""
+    model_version = vision_model_version()
+    ImageAnalysisResult.objects.bulk_create(
+        [ImageAnalysisResult(content_hash=content_hash, model_version=model_version, detected_items=detected_items)],
+        ignore_conflicts=True,  # Another worker may have stored the same image concurrently
+    )
+    _analysis_cache.set((content_hash, model_version), detected_items)
+
+
+def _normalize_text(value):
+    return " ".join(str(value).split()).casefold()
+
+
+def caption_cache_key(business, detected_items, business_info, post_categories, platform_states, custom_text):
+    """
+    Build the cache key of a caption request from a canonical form of its inputs.
+
+    Items and categories are case-folded, de-duplicated and sorted, business_info is
+    reduced to the keys that affect generation, and only enabled platforms count.
+    The business's stored vibe and target_customers are part of the key, so editing
+    the profile makes that business's earlier entries unreachable in every process.
+    """
+    business = business or {}
+    business_info = business_info or {}
+    canonical = {
+        "model": caption_model_version(),
+        "business": [business.get("id"), business.get("target_customers"), business.get("vibe")],
+        "detected_items": sorted({_normalize_text(item) for item in detected_items or [] if str(item).strip()}),
+        "business_info": {
+            key: _normalize_text(business_info[key])
+            for key in CAPTION_BUSINESS_INFO_KEYS if business_info.get(key)
+        },
+        "post_categories": sorted({_normalize_text(category) for category in post_categories or []}),
+        "platforms": sorted(platform for platform, enabled in (platform_states or {}).items() if enabled),
+        "custom_text": " ".join(str(custom_text or "").split()),
+    }
+    digest = hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+    return f"captions:{business.get('id')}:{digest}"
+
+
+def get_cached_captions(cache_key):
+    """Return cached captions for a request key, or None."""
+    captions = caches["ai"].get(cache_key)
+    record_cache_lookup(captions is not None)
+    return captions
+
+
+def store_captions(cache_key, captions):
+    """Cache generated captions for the configured TTL."""
+    caches["ai"].set(cache_key, captions)
@@ -0,0 +1,298 @@
+# ai/hashtags.py
+"""
+Hashtag suggestions learned from the hashtags already used in post captions.
+
+Every post contributes its hashtags, its caption words and its categories
+(as `category:<key>` terms). From the post x hashtag and post x term incidence
+matrices the index keeps:
+- term_hashtag (terms x hashtags): posts in which a term appears with a hashtag,
+- cooccurrence (hashtags x hashtags): posts in which two hashtags appear together,
+- business_hashtag (businesses x hashtags): posts of a business that used a
+  hashtag, one row per business that has posts, in the order of business_ids,
+- per hashtag: number of posts and summed engagement (reactions and shares),
+- per term: number of posts.
+The matrices are scipy CSR matrices, persisted as their arrays in HashtagIndex.
+New posts are added to the stored counts without reprocessing older ones; a
+full rebuild also picks up edited captions and updated engagement.
+
+Suggestions rank hashtags by how often they accompany the query terms, plus one
+hop through co-occurrence, weighted by the average engagement of the posts that
+used them. No model is called. A hashtag used by fewer than
+MIN_HASHTAG_BUSINESSES businesses is only suggested to the businesses that used
+it, so one business's own tags (its name, its events) never reach another.
+"""
+import io
+import re
+from threading import Lock
+
+import numpy as np
+import scipy.sparse as sp
+from django.db import transaction
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from config.constants import POST_CATEGORIES_OPTIONS
+from posts.models import Post
+from .models import HashtagIndex
+
+HASHTAG_PATTERN = re.compile(r"#(\w+)")
+WORD_PATTERN = re.compile(r"[^\W\d_]{3,}")
+SHARE_WEIGHT = 3  # A share counts as much engagement as this many reactions
+COOCCURRENCE_WEIGHT = 0.5  # Weight of hashtags reached through co-occurrence with the matched ones
+PREFIX_MATCH_BONUS = 1.0  # Added to hashtags starting with a query word, e.g. #steaklover for "steak"
+MIN_HASHTAG_BUSINESSES = 3  # Businesses that must have used a hashtag before it is suggested to others
+
+_CATEGORY_KEYS = {
+    **{option["key"]: option["key"] for option in POST_CATEGORIES_OPTIONS},
+    **{option["label"].casefold(): option["key"] for option in POST_CATEGORIES_OPTIONS},
+}
+
+
+def extract_hashtags(caption):
+    return {tag.casefold() for tag in HASHTAG_PATTERN.findall(caption or "")}
+
+
+def extract_terms(text):
+    """Content words of a text, ignoring its hashtags."""
+    words = WORD_PATTERN.findall(HASHTAG_PATTERN.sub(" ", text or "").casefold())
+    return {word for word in words if word not in ENGLISH_STOP_WORDS}
+
+
+def category_term(category):
+    """Index term of a post category given by key or label, or None if unknown."""
+    key = _CATEGORY_KEYS.get(str(category).strip().casefold())
+    return f"category:{key}" if key else None
+
+
+class HashtagStats:
+    """In-memory form of a HashtagIndex row."""
+
+    MATRICES = ("term_hashtag", "cooccurrence", "business_hashtag")
+    VECTORS = ("hashtag_posts", "hashtag_engagement", "term_posts")
+
+    def __init__(self, hashtags, terms, term_hashtag, cooccurrence, business_hashtag,
+                 hashtag_posts, hashtag_engagement, term_posts, business_ids):
+        self.hashtags = list(hashtags)
+        self.terms = list(terms)
+        self.business_ids = business_ids
+        self.term_hashtag = term_hashtag
+        self.cooccurrence = cooccurrence
+        self.business_hashtag = business_hashtag
+        self.hashtag_posts = hashtag_posts
+        self.hashtag_engagement = hashtag_engagement
+        self.term_posts = term_posts
+
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+        self.hashtag_ids = {hashtag: i for i, hashtag in enumerate(self.hashtags)}
+        self.business_rows = {int(business_id): i for i, business_id in enumerate(business_ids)}
+        # Sorted labels let prefix matches be found by binary search
+        self._prefix_order = np.array(sorted(range(len(self.hashtags)), key=self.hashtags.__getitem__), dtype=int)
+        self._sorted_hashtags = np.array([self.hashtags[i] for i in self._prefix_order], dtype=str)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average_engagement = np.nan_to_num(hashtag_engagement / hashtag_posts)
+        self.engagement_weight = 1 + np.log1p(average_engagement)
+        self.shared = np.asarray((business_hashtag > 0).sum(axis=0)).ravel() >= MIN_HASHTAG_BUSINESSES
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], sp.csr_matrix((0, 0)), sp.csr_matrix((0, 0)), sp.csr_matrix((0, 0)),
+                   np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.int64))
+
+    @classmethod
+    def from_row(cls, row):
+        arrays = np.load(io.BytesIO(bytes(row.arrays)))
+        matrices = {
+            name: sp.csr_matrix(
+                (arrays[f"{name}_data"], arrays[f"{name}_indices"], arrays[f"{name}_indptr"]),
+                shape=tuple(arrays[f"{name}_shape"]),
+            )
+            for name in cls.MATRICES if f"{name}_data" in arrays.files
+        }
+        # Builds from before business_hashtag existed: no hashtag counts as shared until the next full build
+        matrices.setdefault("business_hashtag", sp.csr_matrix((0, len(row.hashtags))))
+        vectors = {name: arrays[name] for name in cls.VECTORS}
+        # Builds from before business_ids existed kept one row per business id, from 0
+        business_ids = (
+            arrays["business_ids"] if "business_ids" in arrays.files
+            else np.arange(matrices["business_hashtag"].shape[0], dtype=np.int64)
+        )
+        return cls(row.hashtags, row.terms, **matrices, **vectors, business_ids=business_ids)
+
+    def to_bytes(self):
+        arrays = {name: getattr(self, name) for name in self.VECTORS}
+        arrays["business_ids"] = self.business_ids
+        for name in self.MATRICES:
+            matrix = getattr(self, name)
+            arrays.update({
+                f"{name}_data": matrix.data, f"{name}_indices": matrix.indices,
+                f"{name}_indptr": matrix.indptr, f"{name}_shape": np.array(matrix.shape),
+            })
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    def add_posts(self, posts):
+        """Return new stats including `posts`, given as (business id, hashtags, terms, engagement) tuples."""
+        hashtags, terms = list(self.hashtags), list(self.terms)
+        hashtag_ids, term_ids = dict(self.hashtag_ids), dict(self.term_ids)
+        business_ids, business_rows = list(self.business_ids), dict(self.business_rows)
+
+        def incidence(sets, labels, ids):
+            rows, cols = [], []
+            for row, values in enumerate(sets):
+                for value in values:
+                    if value not in ids:
+                        ids[value] = len(labels)
+                        labels.append(value)
+                    rows.append(row)
+                    cols.append(ids[value])
+            return rows, cols
+
+        h_rows, h_cols = incidence([post[1] for post in posts], hashtags, hashtag_ids)
+        t_rows, t_cols = incidence([post[2] for post in posts], terms, term_ids)
+        post_hashtags = sp.csr_matrix(
+            (np.ones(len(h_rows)), (h_rows, h_cols)), shape=(len(posts), len(hashtags))
+        )
+        post_terms = sp.csr_matrix((np.ones(len(t_rows)), (t_rows, t_cols)), shape=(len(posts), len(terms)))
+        engagement = np.array([post[3] for post in posts], dtype=float)
+        b_rows, b_cols = incidence([(post[0],) for post in posts], business_ids, business_rows)
+        post_businesses = sp.csr_matrix(
+            (np.ones(len(b_rows)), (b_rows, b_cols)), shape=(len(posts), len(business_ids))
+        )
+
+        cooccurrence = (post_hashtags.T @ post_hashtags).tocsr()
+        cooccurrence.setdiag(0)
+        cooccurrence.eliminate_zeros()
+
+        def grow(matrix, shape):
+            matrix = matrix.copy()
+            matrix.resize(shape)
+            return matrix
+
+        def pad(vector, size):
+            return np.concatenate([vector, np.zeros(size - len(vector))])
+
+        return HashtagStats(
+            hashtags,
+            terms,
+            grow(self.term_hashtag, (len(terms), len(hashtags))) + (post_terms.T @ post_hashtags).tocsr(),
+            grow(self.cooccurrence, (len(hashtags), len(hashtags))) + cooccurrence,
+            grow(self.business_hashtag, (len(business_ids), len(hashtags))) + (post_businesses.T @ post_hashtags).tocsr(),
+            pad(self.hashtag_posts, len(hashtags)) + np.asarray(post_hashtags.sum(axis=0)).ravel(),
+            pad(self.hashtag_engagement, len(hashtags)) + post_hashtags.T @ engagement,
+            pad(self.term_posts, len(terms)) + np.asarray(post_terms.sum(axis=0)).ravel(),
+            np.array(business_ids, dtype=np.int64),
+        )
+
+    def _prefix_matches(self, word):
+        start = np.searchsorted(self._sorted_hashtags, word)
+        end = np.searchsorted(self._sorted_hashtags, word + "\uffff")
+        return self._prefix_order[start:end]
+
+    def suggest(self, terms, prefixes, limit, business_id=None):
+        """
+        Return up to `limit` (hashtag, score) pairs for the query terms, best first. Only shared
+        hashtags are returned, along with those used by the business `business_id`.
+        """
+        if not self.hashtags:
+            return []
+
+        term_ids = [self.term_ids[term] for term in terms if term in self.term_ids]
+        relevance = np.zeros(len(self.hashtags))
+        if term_ids:
+            # Share of the term's posts that used each hashtag, summed over the query terms
+            rows = self.term_hashtag[term_ids].multiply(1 / self.term_posts[term_ids][:, None])
+            relevance += np.asarray(rows.sum(axis=0)).ravel()
+        for prefix in prefixes:
+            relevance[self._prefix_matches(prefix)] += PREFIX_MATCH_BONUS
+
+        if relevance.any():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                per_post = np.nan_to_num(relevance / self.hashtag_posts)
+            scores = relevance + COOCCURRENCE_WEIGHT * (self.cooccurrence @ per_post)
+        else:
+            scores = np.log1p(self.hashtag_posts)  # Nothing matched: fall back to popular hashtags
+        scores = scores * self.engagement_weight
+        allowed = self.shared
+        if business_id in self.business_rows:
+            allowed = allowed | (self.business_hashtag[self.business_rows[business_id]].toarray().ravel() > 0)
+        scores = np.where(allowed, scores, 0)
+
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(self.hashtags[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+_index_lock = Lock()
+_index = (None, HashtagStats.empty())  # (HashtagIndex id, stats) loaded in this process
+
+
+def get_hashtag_stats():
+    """Return the latest stored hashtag index, reloading it only when a newer build exists."""
+    global _index
+    latest_id = HashtagIndex.objects.order_by("-id").values_list("id", flat=True).first()
+    if latest_id is None:
+        return HashtagStats.empty()
+    if _index[0] != latest_id:
+        with _index_lock:
+            if _index[0] != latest_id:
+                _index = (latest_id, HashtagStats.from_row(HashtagIndex.objects.get(id=latest_id)))
+    return _index[1]
+
+
+def suggest_hashtags(detected_items, post_categories, limit=10, business_id=None):
+    """Rank hashtags for a post of business `business_id` about `detected_items` in `post_categories`."""
+    items = [str(item) for item in detected_items or []]
+    item_terms = extract_terms(" ".join(items))
+    terms = item_terms | {term for term in map(category_term, post_categories or []) if term}
+    # "Grilled Meat" also matches hashtags starting with "grilled", "meat" or "grilledmeat"
+    prefixes = item_terms | {"".join(WORD_PATTERN.findall(item.casefold())) for item in items} - {""}
+    return [
+        {"hashtag": f"#{hashtag}", "score": round(score, 3)}
+        for hashtag, score in get_hashtag_stats().suggest(terms, prefixes, limit, business_id)
+    ]
+
+
+def build_hashtag_index(full=False, batch_size=5000):
+    """
+    Add posts created since the last build to the index and store it as a new build.
+    With `full`, start from scratch so edited captions and engagement are refreshed.
+    Returns the stored HashtagIndex.
+    """
+    latest = None if full else HashtagIndex.objects.order_by("-id").first()
+    stats = HashtagStats.from_row(latest) if latest else HashtagStats.empty()
+    if stats.hashtags and not stats.business_hashtag.shape[0]:
+        # Stored before hashtags were counted per business; those counts need every post
+        latest, stats = None, HashtagStats.empty()
+    last_post_id = latest.last_post_id if latest else 0
+    num_posts = latest.num_posts if latest else 0
+
+    CategoryLink = Post.categories.through
+    while batch := list(
+        Post.objects.filter(id__gt=last_post_id).order_by("id")
+        .values_list("id", "business_id", "caption", "reactions", "shares")[:batch_size]
+    ):
+        categories = {}
+        for post_id, key in CategoryLink.objects.filter(
+            post_id__in=[row[0] for row in batch]
+        ).values_list("post_id", "category__key"):
+            categories.setdefault(post_id, set()).add(f"category:{key}")
+
+        stats = stats.add_posts([
+            (business_id, extract_hashtags(caption), extract_terms(caption) | categories.get(post_id, set()),
+             reactions + SHARE_WEIGHT * shares)
+            for post_id, business_id, caption, reactions, shares in batch
+        ])
+        last_post_id = batch[-1][0]
+        num_posts += len(batch)
+
+    with transaction.atomic():
+        index = HashtagIndex.objects.create(
+            arrays=stats.to_bytes(),
+            hashtags=stats.hashtags,
+            terms=stats.terms,
+            last_post_id=last_post_id,
+            num_posts=num_posts,
+        )
+        HashtagIndex.objects.filter(id__lt=index.id).delete()
+    return index
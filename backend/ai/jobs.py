@@ -0,0 +1,138 @@
+# ai/jobs.py
+"""
+Background execution of image analysis jobs.
+
+With AI_JOB_MODE = "thread" (default) jobs run on a small thread pool inside
+the web process, so the request worker only stores the upload and returns.
+With AI_JOB_MODE = "worker" the web process only enqueues jobs and the
+`run_ai_worker` management command processes them.
+
+In thread mode a job dies with the process running it, so every server start
+(backend/wsgi.py, backend/asgi.py) calls `resume_unfinished_jobs` to pick up
+the jobs left pending or running by processes that were stopped.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Lock
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .cache import get_cached_analysis, store_analysis
+from .models import ImageAnalysisJob
+from .services import detect_items, vision_model_version
+from .singleflight import coalesce
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    """Return the process-wide worker pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.AI_JOB_WORKERS, thread_name_prefix="ai-job")
+    return _executor
+
+
+def submit_analysis_job(job):
+    """Schedule a pending job once the transaction that created it has committed."""
+    if settings.AI_JOB_MODE == "thread":
+        transaction.on_commit(lambda: get_executor().submit(run_analysis_job, job.id))
+
+
+def claim_job(job_id):
+    """Atomically move a pending job to running. Returns False if another worker got it first."""
+    return ImageAnalysisJob.objects.filter(id=job_id, status='pending').update(
+        status='running', started_at=timezone.now()
+    ) == 1
+
+
+def run_analysis_job(job_id):
+    """Run a single analysis job and store its result. Safe to call from any worker thread."""
+    close_old_connections()
+    try:
+        if not claim_job(job_id):
+            return
+
+        job = ImageAnalysisJob.objects.get(id=job_id)
+        try:
+            job.detected_items = analyse_job_image(job)
+            job.status = 'completed'
+        except Exception as e:
+            logger.error(f"❌ Image analysis job {job_id} failed: {e}", exc_info=True)
+            job.status = 'failed'
+            job.error = str(e)
+
+        if job.image:
+            job.image.delete(save=False)
+        job.completed_at = timezone.now()
+        job.save(update_fields=['status', 'detected_items', 'error', 'image', 'completed_at'])
+    finally:
+        close_old_connections()
+
+
+def analyse_job_image(job):
+    """Detect the items in a job's image."""
+    def detect():
+        with job.image.open("rb") as image_file:
+            return detect_items(image_file)
+
+    if not job.content_hash:
+        return detect()
+    return analyse_content(job.content_hash, detect)
+
+
+def analyse_content(content_hash, detect):
+    """
+    Return the detected items of an image, calling `detect()` only if no result is cached.
+    Concurrent analyses of the same image content are coalesced into one backend call.
+    """
+    def analyse():
+        # A coalesced call may have finished between the caller's cache check and now
+        detected_items = get_cached_analysis(content_hash)
+        if detected_items is None:
+            detected_items = detect()
+            store_analysis(content_hash, detected_items)
+        return detected_items
+
+    return coalesce(f"analysis:{vision_model_version()}:{content_hash}", analyse)
+
+
+def resume_unfinished_jobs():
+    """In thread mode, requeue abandoned running jobs and run every pending job on this process's pool."""
+    if settings.AI_JOB_MODE == "thread":
+        # On the pool, so the server start neither waits on the database nor queries it from an event loop
+        get_executor().submit(_resume_unfinished_jobs)
+
+
+def _resume_unfinished_jobs():
+    close_old_connections()
+    try:
+        requeued = requeue_stale_jobs(settings.AI_JOB_STALE_AFTER)
+        job_ids = list(
+            ImageAnalysisJob.objects.filter(status='pending').order_by('created_at').values_list('id', flat=True)
+        )
+        # Jobs another live process is about to run are harmless: run_analysis_job claims each job atomically
+        for job_id in job_ids:
+            get_executor().submit(run_analysis_job, job_id)
+        if job_ids:
+            logger.info(f"Resumed {len(job_ids)} unfinished image analysis jobs ({requeued} requeued from running)")
+    except Exception as e:
+        logger.error(f"❌ Resuming unfinished image analysis jobs failed: {e}", exc_info=True)
+    finally:
+        close_old_connections()
+
+
+def requeue_stale_jobs(stale_after):
+    """Return jobs stuck in running (e.g. their worker was restarted) to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return ImageAnalysisJob.objects.filter(status='running', started_at__lt=cutoff).update(
+        status='pending', started_at=None
+    )
@@ -0,0 +1,47 @@
+# ai/management/commands/benchmark_ai_backend.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai.backends import get_backend
+
+
+class Command(BaseCommand):
+    help = "Measure latency and throughput of the configured AI backend (e.g. against run_ai_stub_server)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--operation", choices=["captions", "analyse"], default="captions")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=16)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        image_bytes = b"\xff\xd8" + b"\x00" * 50_000  # Payload size of a small JPEG
+        payload = {"detected_items": ["Steak", "Garlic", "Lemon"], "business_info": {}, "post_categories": [],
+                   "platform_states": {"instagram": True}, "custom_text": ""}
+
+        def call(_):
+            started = time.perf_counter()
+            if options["operation"] == "analyse":
+                backend.analyse_image(image_bytes)
+            else:
+                backend.generate_captions(payload)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            latencies = np.array(list(pool.map(call, range(options["requests"])))) * 1000
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"backend={settings.AI_BACKEND} operation={options['operation']} "
+            f"requests={options['requests']} concurrency={options['concurrency']}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"throughput {options['requests'] / elapsed:.1f} req/s | "
+            f"p50 {np.percentile(latencies, 50):.1f}ms | p99 {np.percentile(latencies, 99):.1f}ms | "
+            f"max {latencies.max():.1f}ms"
+        ))
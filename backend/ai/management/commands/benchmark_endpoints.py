@@ -0,0 +1,232 @@
+# ai/management/commands/benchmark_endpoints.py
+import hashlib
+import itertools
+import json
+import platform
+import re
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from unittest import mock
+
+import django
+import numpy as np
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ai import backends
+from ai.cache import store_analysis
+from businesses.models import Business
+from businesses.synthetic import EMAIL_FORMAT
+from posts.models import Post
+from promotions.models import Promotion
+from sales.models import SalesDataPoint
+
+RESULTS_FORMAT = 1  # Bumped when the JSON layout changes
+TRANSACTION_SQL = re.compile(r"\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK|BEGIN|COMMIT)\b", re.IGNORECASE)
+IMAGE_SIZE = 50_000  # Bytes per uploaded image, about a small JPEG
+
+
+def _sales_csv(business_id, days=28):
+    """A sales upload overlapping the last `days` days of the business's sales."""
+    last = SalesDataPoint.objects.filter(business_id=business_id).order_by("-date").values_list("date", flat=True).first()
+    last = last or datetime.now().date()
+    lines = ["Date,Total Amount"] + [
+        f"{(last - timedelta(days=day)).strftime('%d/%m/%Y')},{100 + day * 7.5:.2f}" for day in range(days)
+    ]
+    return "\n".join(lines).encode()
+
+
+def _endpoints(business):
+    """(name, method, path, request kwargs or a callable returning them, writes) of every benchmarked endpoint."""
+    post_id = Post.objects.filter(business=business).order_by("-created_at").values_list("id", flat=True).first()
+    promotion_id = Promotion.objects.filter(business=business).order_by("-created_at").values_list("id", flat=True).first()
+    caption_body = {"detected_items": ["Steak", "Fries"], "post_categories": ["Product Highlight"]}
+    sales_csv = _sales_csv(business.id)
+    # Each upload of ai_analyse_image is a new image, so it always misses the cache and creates a job
+    image_numbers = itertools.count()
+    new_image = lambda: b"\xff\xd8" + next(image_numbers).to_bytes(8, "big") + b"\x00" * IMAGE_SIZE
+    cached_image = b"\xff\xd8" + b"\xff" * 8 + b"\x00" * IMAGE_SIZE
+    # The stored row is rolled back; the per-process LRU keeps answering for the image, as for any repeat upload
+    with transaction.atomic():
+        store_analysis(hashlib.sha256(cached_image).hexdigest(), ["Steak", "Fries"])
+        transaction.set_rollback(True)
+    return [
+        ("dashboard", "get", "/api/dashboard/", {}, False),
+        ("business", "get", "/api/businesses/me/", {}, False),
+        ("posts_list", "get", "/api/posts/", {}, False),
+        *([("post_detail", "get", f"/api/posts/{post_id}/", {}, False)] if post_id else []),
+        ("posts_export", "get", "/api/posts/export.ndjson", {}, False),
+        ("promotions_list", "get", "/api/promotions/", {}, False),
+        *([("promotion_detail", "get", f"/api/promotions/{promotion_id}/", {}, False)] if promotion_id else []),
+        ("suggestions_list", "get", "/api/promotions/?type=suggestions", {}, False),
+        ("sales_get", "get", "/api/sales/", {}, False),
+        # A new upload object each time: the view reads the file
+        ("sales_post", "post", "/api/sales/",
+         lambda: {"data": {"file": SimpleUploadedFile("benchmark.csv", sales_csv, "text/csv")}}, True),
+        # Rolled back, so the job is never handed to a worker; this times the upload, hashing and job insert
+        ("ai_analyse_image", "post", "/api/ai/images/analyse/",
+         lambda: {"data": {"image": SimpleUploadedFile("benchmark.jpg", new_image(), "image/jpeg")}}, True),
+        ("ai_analyse_image_cached", "post", "/api/ai/images/analyse/",
+         lambda: {"data": {"image": SimpleUploadedFile("benchmark.jpg", cached_image, "image/jpeg")}}, False),
+        ("ai_caption", "post", "/api/ai/captions/generate/",
+         {"data": {**caption_body, "regenerate": True}, "content_type": "application/json"}, False),
+        ("ai_caption_cached", "post", "/api/ai/captions/generate/",
+         {"data": caption_body, "content_type": "application/json"}, False),
+        ("ai_hashtags", "post", "/api/ai/hashtags/suggest/",
+         {"data": caption_body, "content_type": "application/json"}, False),
+    ]
+
+
+def _git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=settings.BASE_DIR, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the API endpoints through the Django test client against a seeded business "
+        "(see seed_synthetic): latency percentiles, database queries and peak memory per endpoint, "
+        "written as JSON that --compare can diff against an earlier run. Writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", default=EMAIL_FORMAT.format(seed=0, index=0),
+                            help="Owner of the business to benchmark (default: the first business of seed_synthetic's seed 0).")
+        parser.add_argument("--iterations", type=int, default=100, help="Timed requests per endpoint.")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per endpoint before timing.")
+        parser.add_argument("--endpoint", action="append", dest="endpoints",
+                            help="Only benchmark this endpoint name (repeatable).")
+        parser.add_argument("--ai-latency", type=float, default=0.0,
+                            help="Seconds the mock AI backend sleeps per call; 0 measures only this server's own work.")
+        parser.add_argument("--output", help="JSON results path (default: endpoint-benchmark-<commit>.json).")
+        parser.add_argument("--compare", help="JSON results of an earlier run to compare with.")
+
+    def handle(self, *args, **options):
+        business = Business.objects.filter(owner__email=options["email"].lower()).order_by("id").first()
+        if business is None:
+            raise CommandError(f"No business owned by {options['email']}; run seed_synthetic or pass --email")
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)
+
+        endpoints = _endpoints(business)
+        if options["endpoints"]:
+            unknown = set(options["endpoints"]) - {name for name, *_ in endpoints}
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+            endpoints = [endpoint for endpoint in endpoints if endpoint[0] in options["endpoints"]]
+
+        client = Client()
+        client.cookies[settings.SIMPLE_JWT["AUTH_COOKIE"]] = str(AccessToken.for_user(business.owner))
+        commit = _git_commit()
+        results = {
+            "format": RESULTS_FORMAT,
+            "commit": commit,
+            "timestamp": datetime.now().astimezone().isoformat(timespec="seconds"),
+            "environment": {
+                "python": platform.python_version(), "django": django.get_version(), "database": connection.vendor,
+                "server_mode": settings.SERVER_MODE, "ai_latency": options["ai_latency"],
+            },
+            "dataset": {
+                "business_id": business.id,
+                "posts": business.posts.count(),
+                "promotions": business.promotions.count(),
+                "sales_points": SalesDataPoint.objects.filter(business=business).count(),
+            },
+            "iterations": options["iterations"],
+            "endpoints": {},
+        }
+        self.stdout.write(f"Business {business.id}: {results['dataset']}")
+
+        # Uploads land in a throwaway media directory; the mock backend stands in for the model
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(ALLOWED_HOSTS=["testserver"], MEDIA_ROOT=media_root), \
+                mock.patch.object(backends, "_backend", backends.MockBackend(latency=options["ai_latency"])):
+            for name, method, path, kwargs, writes in endpoints:
+                result = self._measure(client, method, path, kwargs, writes, options)
+                results["endpoints"][name] = {"method": method.upper(), "path": path, **result}
+                self._report(name, result, (baseline or {}).get("endpoints", {}).get(name))
+
+        output = options["output"] or f"endpoint-benchmark-{commit or 'unknown'}.json"
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}"))
+
+    def _request(self, client, method, path, kwargs, writes):
+        """Send one request and read its whole body; return (response, body size)."""
+        kwargs = kwargs() if callable(kwargs) else kwargs
+        if writes:
+            with transaction.atomic():
+                response = getattr(client, method)(path, **kwargs)
+                transaction.set_rollback(True)
+        else:
+            response = getattr(client, method)(path, **kwargs)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, len(body)
+
+    def _measure(self, client, method, path, kwargs, writes, options):
+        for _ in range(max(1, options["warmup"])):
+            response, _ = self._request(client, method, path, kwargs, writes)
+        if not 200 <= response.status_code < 300:
+            return {"error": f"status {response.status_code}"}
+
+        latencies = []
+        for _ in range(options["iterations"]):
+            started = time.perf_counter()
+            self._request(client, method, path, kwargs, writes)
+            latencies.append(time.perf_counter() - started)
+        latencies = np.array(latencies) * 1000
+
+        # Queries and memory are measured on one extra request, so their tracing does not skew the timings
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                _, size = self._request(client, method, path, kwargs, writes)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # Leave out the transaction statements that roll writes back
+        captured = [query for query in queries.captured_queries if not TRANSACTION_SQL.match(query["sql"])]
+        return {
+            "status": response.status_code,
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p90_ms": round(float(np.percentile(latencies, 90)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            "mean_ms": round(float(latencies.mean()), 3),
+            "max_ms": round(float(latencies.max()), 3),
+            "queries": len(captured),
+            "query_ms": round(sum(float(query["time"]) for query in captured) * 1000, 3),
+            "peak_memory_kb": round(peak / 1024, 1),
+            "response_bytes": size,
+        }
+
+    def _report(self, name, result, before):
+        if "error" in result:
+            self.stdout.write(self.style.ERROR(f"{name:>23} | {result['error']}"))
+            return
+        line = (
+            f"{name:>23} | p50 {result['p50_ms']:8.2f}ms | p99 {result['p99_ms']:8.2f}ms | "
+            f"queries {result['queries']:4d} | peak {result['peak_memory_kb']:9.1f}KB"
+        )
+        if before and "error" not in before:
+            change = lambda key: (result[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            line += (
+                f" | vs before: p50 {change('p50_ms'):+6.1f}% p99 {change('p99_ms'):+6.1f}% "
+                f"queries {result['queries'] - before['queries']:+d} peak {change('peak_memory_kb'):+6.1f}%"
+            )
+        self.stdout.write(line)
@@ -0,0 +1,134 @@
+# ai/management/commands/benchmark_serving.py
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ai.stub_server import make_stub_server
+from businesses.models import Business
+from users.models import User
+
+SERVERS = {
+    "wsgi": ["backend.wsgi:application"],
+    "asgi": ["-k", "uvicorn.workers.UvicornWorker", "backend.asgi:application"],
+}
+STARTUP_TIMEOUT = 30  # Seconds to wait for a server to accept connections
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent caption-generation throughput of the WSGI (gunicorn sync workers) and "
+        "ASGI (uvicorn workers) servers, with the model simulated by the stub server at a fixed latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=list(SERVERS), action="append", dest="modes",
+                            help="Server to measure; repeat for several (default: both).")
+        parser.add_argument("--latency", type=float, default=0.5, help="Simulated model latency in seconds.")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--workers", type=int, default=2, help="Server processes, as deployed.")
+
+    def handle(self, *args, **options):
+        stub = make_stub_server(port=_free_port(), latency=options["latency"])
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+        # The servers are separate processes, so the benchmark user has to be committed
+        user, _ = User.objects.get_or_create(email="serving-benchmark@example.com", defaults={"name": "Benchmark"})
+        Business.objects.get_or_create(owner=user, defaults={"name": "Serving Benchmark"})
+        token = str(AccessToken.for_user(user))
+
+        self.stdout.write(
+            f"latency={options['latency']}s requests={options['requests']} "
+            f"concurrency={options['concurrency']} workers={options['workers']}"
+        )
+        try:
+            for mode in options["modes"] or list(SERVERS):
+                port = _free_port()
+                server = self._start_server(mode, port, stub.server_address[1], options)
+                try:
+                    latencies, errors, elapsed = asyncio.run(
+                        self._load(f"http://127.0.0.1:{port}", token, options["requests"], options["concurrency"])
+                    )
+                finally:
+                    server.terminate()
+                    server.wait()
+                self._report(mode, latencies, errors, elapsed)
+        finally:
+            stub.shutdown()
+            user.delete()
+
+    def _start_server(self, mode, port, stub_port, options):
+        env = {
+            **os.environ,
+            "SERVER_MODE": mode,
+            "AI_BACKEND": "http",
+            "AI_BACKEND_URL": f"http://127.0.0.1:{stub_port}",
+            # Enough pooled connections that the backend pool is not what is being measured
+            "AI_BACKEND_MAX_CONNECTIONS": str(options["concurrency"]),
+        }
+        command = [
+            sys.executable, "-m", "gunicorn", "--workers", str(options["workers"]), "--timeout", "120",
+            "--bind", f"127.0.0.1:{port}", "--log-level", "warning", *SERVERS[mode],
+        ]
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"The {mode} server exited with status {server.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f"The {mode} server did not start within {STARTUP_TIMEOUT}s")
+
+    async def _load(self, base_url, token, requests, concurrency):
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120,
+                                     cookies={settings.SIMPLE_JWT["AUTH_COOKIE"]: token}) as client:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def call(i):
+                # Distinct items and regenerate, so neither the cache nor coalescing answers
+                body = {"detected_items": ["Steak", f"Item {i}"], "regenerate": True}
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.post("/api/ai/captions/generate/", json=body)
+                    return time.perf_counter() - started, response.status_code
+
+            await call(-1)  # Warm up: first requests load Django and open connections
+            started = time.perf_counter()
+            results = await asyncio.gather(*(call(i) for i in range(requests)))
+            elapsed = time.perf_counter() - started
+
+        latencies = np.array([latency for latency, code in results if code == 200]) * 1000
+        errors = sum(code != 200 for _, code in results)
+        return latencies, errors, elapsed
+
+    def _report(self, mode, latencies, errors, elapsed):
+        if not len(latencies):
+            self.stdout.write(self.style.ERROR(f"{mode}: all {errors} requests failed"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{mode} | throughput {len(latencies) / elapsed:6.1f} req/s | "
+            f"p50 {np.percentile(latencies, 50):7.1f}ms | p99 {np.percentile(latencies, 99):7.1f}ms | "
+            f"errors {errors}"
+        ))
@@ -0,0 +1,28 @@
+# ai/management/commands/build_hashtag_index.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai.hashtags import build_hashtag_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Add posts created since the last build to the hashtag suggestion index. "
+        "Run periodically; use --full now and then to pick up edited captions and new engagement."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true",
+                            help="Rebuild from every post instead of adding new posts only.")
+        parser.add_argument("--batch-size", type=int, default=5000,
+                            help="Number of posts read and added per batch.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = build_hashtag_index(full=options["full"], batch_size=options["batch_size"])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index.hashtags)} hashtags from {index.num_posts} posts in {elapsed:.1f}s"
+        ))
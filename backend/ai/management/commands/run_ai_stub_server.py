@@ -0,0 +1,27 @@
+# ai/management/commands/run_ai_stub_server.py
+from django.core.management.base import BaseCommand
+
+from ai.stub_server import make_stub_server
+
+
+class Command(BaseCommand):
+    help = "Run a local stub of the AI model API that returns the mock payloads (for offline benchmarking)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=1.5,
+                            help="Seconds to wait before answering, simulating model time.")
+
+    def handle(self, *args, **options):
+        server = make_stub_server(options["host"], options["port"], options["latency"])
+        self.stdout.write(self.style.SUCCESS(
+            f"AI stub server listening on http://{options['host']}:{options['port']} "
+            f"(latency {options['latency']}s). Set AI_BACKEND=http to use it."
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,49 @@
+# ai/management/commands/run_ai_worker.py
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai.jobs import get_executor, requeue_stale_jobs, run_analysis_job
+from ai.models import ImageAnalysisJob
+
+
+class Command(BaseCommand):
+    help = "Process queued AI image analysis jobs (used when AI_JOB_MODE is 'worker')."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll-interval", type=float, default=0.5,
+                            help="Seconds to wait between polls when the queue is empty.")
+        parser.add_argument("--stale-after", type=int, default=settings.AI_JOB_STALE_AFTER,
+                            help="Requeue running jobs that started more than this many seconds ago.")
+        parser.add_argument("--once", action="store_true",
+                            help="Process the jobs currently queued and exit.")
+
+    def handle(self, *args, **options):
+        executor = get_executor()
+        in_flight = set()
+        self.stdout.write(f"AI worker started with {settings.AI_JOB_WORKERS} threads")
+
+        while True:
+            requeued = requeue_stale_jobs(options["stale_after"])
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale jobs")
+
+            capacity = settings.AI_JOB_WORKERS - len(in_flight)
+            job_ids = list(
+                ImageAnalysisJob.objects.filter(status='pending')
+                .order_by('created_at')
+                .values_list('id', flat=True)[:max(capacity, 0)]
+            )
+            # run_analysis_job claims each job atomically, so several workers can share the queue
+            in_flight.update(executor.submit(run_analysis_job, job_id) for job_id in job_ids)
+
+            if options["once"] and not job_ids:
+                wait(in_flight)
+                return
+
+            if in_flight:
+                _, in_flight = wait(in_flight, timeout=options["poll_interval"], return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(options["poll_interval"])
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0004_imageanalysisresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HashtagIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arrays', models.BinaryField()),
+                ('hashtags', models.JSONField(default=list)),
+                ('terms', models.JSONField(default=list)),
+                ('last_post_id', models.BigIntegerField(default=0)),
+                ('num_posts', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -1,3 +1,65 @@
+# ai/models.py
+import uuid
 from django.db import models
+from users.models import User
+from config.constants import AI_JOB_STATUS_OPTIONS
 
-# Create your models here.
+def analysis_image_path(instance, filename):
+    return f'ai_analysis/{instance.user_id}/{instance.id}.jpg'
+
+class ImageAnalysisJob(models.Model):
+    """
+    An image analysis request processed outside the request/response cycle.
+    The upload view only stores the image and returns the job id; a worker pool
+    (see ai/jobs.py) runs the analysis and stores the detected items here.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="image_analysis_jobs")
+    image = models.ImageField(upload_to=analysis_image_path, blank=True)  # Removed once the job finishes
+    content_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of the image, used to cache the result
+    status = models.CharField(max_length=20, choices=AI_JOB_STATUS_OPTIONS, default='pending', db_index=True)
+    detected_items = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Image Analysis Job {self.id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+
+class ImageAnalysisResult(models.Model):
+    """Detected items of an image, cached by image content hash and model version (see ai/cache.py)."""
+    content_hash = models.CharField(max_length=64)
+    model_version = models.CharField(max_length=100)
+    detected_items = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['content_hash', 'model_version']
+
+    def __str__(self):
+        return f"Image Analysis Result {self.content_hash[:12]} ({self.model_version})"
+
+
+class HashtagIndex(models.Model):
+    """
+    Hashtag co-occurrence and engagement statistics over all post captions (see ai/hashtags.py).
+    Each build is stored as a new row; suggestions read the latest one.
+    """
+    arrays = models.BinaryField()  # .npz with the CSR arrays of the sparse matrices and per-hashtag vectors
+    hashtags = models.JSONField(default=list)  # Column labels, without the leading '#'
+    terms = models.JSONField(default=list)  # Row labels: caption words and 'category:<key>' terms
+    last_post_id = models.BigIntegerField(default=0)  # Posts up to this id are included
+    num_posts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Hashtag Index {self.id} ({len(self.hashtags)} hashtags, {self.num_posts} posts)"
@@ -0,0 +1,69 @@
+# ai/services.py
+"""
+Entry points to the AI models used by the views and the job workers.
+The model calls are delegated to the backend selected by AI_BACKEND (see ai/backends.py).
+"""
+from django.conf import settings
+
+from .backends import get_backend
+
+
+def vision_model_version():
+    """Identify the vision model in use; cached results from other versions are ignored."""
+    return f"{settings.AI_BACKEND}/{settings.AI_VISION_MODEL}"
+
+
+def detect_items(image_file):
+    """Return the food-related keywords detected in an image file."""
+    return get_backend().analyse_image(image_file.read())
+
+
+def caption_model_version():
+    """Identify the caption model in use; cached captions from other versions are ignored."""
+    return f"{settings.AI_BACKEND}/{settings.AI_CAPTION_MODEL}"
+
+
+def generate_captions(detected_items, business_info=None, post_categories=None, platform_states=None, custom_text=""):
+    """Return AI-generated captions for a post."""
+    return get_backend().generate_captions(
+        _caption_payload(detected_items, business_info, post_categories, platform_states, custom_text)
+    )
+
+
+async def agenerate_captions(detected_items, business_info=None, post_categories=None, platform_states=None,
+                             custom_text=""):
+    """`generate_captions` for async views."""
+    return await get_backend().agenerate_captions(
+        _caption_payload(detected_items, business_info, post_categories, platform_states, custom_text)
+    )
+
+
+def generate_captions_batch(requests):
+    """
+    Return the captions of several posts, in order, from a single model call.
+    Each request is a dict of `generate_captions` keyword arguments.
+    """
+    return get_backend().generate_captions_batch([
+        _caption_payload(
+            request["detected_items"], request.get("business_info"), request.get("post_categories"),
+            request.get("platform_states"), request.get("custom_text"),
+        )
+        for request in requests
+    ])
+
+
+def stream_captions(detected_items, business_info=None, post_categories=None, platform_states=None, custom_text=""):
+    """Return an async iterator yielding each AI-generated caption as soon as the model produces it."""
+    return get_backend().astream_captions(
+        _caption_payload(detected_items, business_info, post_categories, platform_states, custom_text)
+    )
+
+
+def _caption_payload(detected_items, business_info, post_categories, platform_states, custom_text):
+    return {
+        "detected_items": detected_items,
+        "business_info": business_info or {},
+        "post_categories": post_categories or [],
+        "platform_states": platform_states or {},
+        "custom_text": custom_text or "",
+    }
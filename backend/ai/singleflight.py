@@ -0,0 +1,166 @@
+# ai/singleflight.py
+"""
+Coalesce identical concurrent AI calls so only one backend call runs.
+
+Within a process, callers with the same key wait on the first caller's result.
+The first caller also takes a lock in the AI_SINGLE_FLIGHT_CACHE cache and
+publishes its result there; callers that share the cache poll for it and take
+over if the lock is released or expires without a result (e.g. the leader
+failed). The default cache is in-process, which costs no queries; set it to
+"shared" when several worker processes should coalesce their calls.
+
+`acoalesce` does the same for async views without blocking the event loop.
+Sync and async callers of one process only meet through that cache.
+"""
+import asyncio
+import time
+import weakref
+from threading import Event, Lock
+
+from django.conf import settings
+from django.core.cache import caches
+
+POLL_INTERVAL = 0.1  # Seconds between checks while another process holds the lock
+RESULT_TTL = 60  # Seconds a published result stays available to waiting processes
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """In-process coalescing: one call per key runs at a time, concurrent callers share its outcome."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+_local_flight = SingleFlight()
+
+
+def coalesce(key, fn):
+    """Run `fn` once for all concurrent callers of `key`, in this process and across processes."""
+    return _local_flight.do(key, lambda: _run_across_processes(key, fn))
+
+
+def _run_across_processes(key, fn):
+    shared = caches[settings.AI_SINGLE_FLIGHT_CACHE]
+    lock_key = f"singleflight:lock:{key}"
+    result_key = f"singleflight:result:{key}"
+    deadline = time.monotonic() + settings.AI_SINGLE_FLIGHT_TIMEOUT
+
+    while time.monotonic() < deadline:
+        if shared.add(lock_key, True, timeout=settings.AI_SINGLE_FLIGHT_TIMEOUT):
+            shared.delete(result_key)  # Waiters must only see the result of this run
+            try:
+                result = fn()
+                shared.set(result_key, result, timeout=RESULT_TTL)
+                return result
+            finally:
+                shared.delete(lock_key)
+
+        # Another process is running the same call; wait for it to publish the result
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            result = shared.get(result_key)
+            if result is not None:
+                return result
+            if shared.get(lock_key) is None:
+                break  # Released without a result; try to take over
+
+    # The other process is stuck; do not keep the caller waiting any longer
+    return fn()
+
+
+class AsyncSingleFlight:
+    """`SingleFlight` for coroutines of one event loop."""
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn):
+        future = self._calls.get(key)
+        if future is not None:
+            return await asyncio.shield(future)  # A cancelled waiter must not cancel the shared call
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()  # The leader's client went away; waiters see the cancellation
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark it retrieved; waiters, if any, re-raise it
+            raise
+        finally:
+            del self._calls[key]
+
+
+_async_flights = weakref.WeakKeyDictionary()  # One per event loop
+
+
+async def acoalesce(key, fn):
+    """`coalesce` for an async `fn` (a coroutine function)."""
+    loop = asyncio.get_running_loop()
+    flight = _async_flights.get(loop)
+    if flight is None:
+        flight = _async_flights[loop] = AsyncSingleFlight()
+    return await flight.do(key, lambda: _arun_across_processes(key, fn))
+
+
+async def _arun_across_processes(key, fn):
+    shared = caches[settings.AI_SINGLE_FLIGHT_CACHE]
+    lock_key = f"singleflight:lock:{key}"
+    result_key = f"singleflight:result:{key}"
+    deadline = time.monotonic() + settings.AI_SINGLE_FLIGHT_TIMEOUT
+
+    while time.monotonic() < deadline:
+        if await shared.aadd(lock_key, True, timeout=settings.AI_SINGLE_FLIGHT_TIMEOUT):
+            await shared.adelete(result_key)
+            try:
+                result = await fn()
+                await shared.aset(result_key, result, timeout=RESULT_TTL)
+                return result
+            finally:
+                await shared.adelete(lock_key)
+
+        while time.monotonic() < deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+            result = await shared.aget(result_key)
+            if result is not None:
+                return result
+            if await shared.aget(lock_key) is None:
+                break
+
+    return await fn()
@@ -0,0 +1,75 @@
+# ai/stub_server.py
+"""
+A local HTTP server that imitates the model API expected by HTTPBackend.
+
+It answers with the mock payloads after a configurable latency, so the HTTP
+backend (pooling, retries, circuit breaker) can be exercised and benchmarked
+offline. Run it with `manage.py run_ai_stub_server`.
+"""
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .backends import MOCK_DETECTED_ITEMS, MOCK_GENERATED_CAPTIONS
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse pooled connections
+    disable_nagle_algorithm = True  # Headers and body are written separately; avoid delayed-ACK stalls
+    latency = 0.0
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self._send_json(200, {"status": "ok"})
+        return self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        # Drain the request body so the connection can be reused
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        if self.path == "/v1/captions/stream":
+            return self._stream_captions()
+        if self.path == "/v1/images/analyse":
+            payload = {"detected_items": MOCK_DETECTED_ITEMS}
+        elif self.path == "/v1/captions/generate":
+            payload = {"captions": MOCK_GENERATED_CAPTIONS}
+        elif self.path == "/v1/captions/generate/batch":
+            requests = json.loads(body).get("requests", [])
+            payload = {"results": [{"captions": MOCK_GENERATED_CAPTIONS} for _ in requests]}
+        else:
+            return self._send_json(404, {"error": "Not found"})
+
+        time.sleep(self.latency)
+        self._send_json(200, payload)
+
+    def _send_json(self, status_code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_captions(self):
+        """Send one NDJSON line per caption, spreading the latency over the captions."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for caption in MOCK_GENERATED_CAPTIONS:
+            time.sleep(self.latency / len(MOCK_GENERATED_CAPTIONS))
+            line = json.dumps({"caption": caption}).encode() + b"\n"
+            self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass  # Per-request logging would dominate benchmark timings
+
+
+def make_stub_server(host="127.0.0.1", port=8765, latency=0.0):
+    """Create (but do not start) a threaded stub server answering after `latency` seconds."""
+    handler = type("ConfiguredStubRequestHandler", (StubRequestHandler,), {"latency": latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
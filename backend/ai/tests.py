@@ -1,3 +1,80 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
+from unittest.mock import Mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from .singleflight import acoalesce, coalesce
+
+
+@override_settings(AI_SINGLE_FLIGHT_TIMEOUT=5)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches[settings.AI_SINGLE_FLIGHT_CACHE]
+        self.cache.clear()
+
+    def _hold_lock(self, timeout):
+        """Take the lock of "key" as another process running the same call would."""
+        self.cache.add("singleflight:lock:key", True, timeout=timeout)
+
+    def test_waiting_callers_get_the_leaders_result(self):
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def fn():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "caption"
+
+        threads = [threading.Thread(target=lambda: results.append(coalesce("key", fn))) for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.2)  # Let the followers start waiting
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, ["caption"] * 4)
+        self.assertEqual(len(calls), 1)
+
+    def test_waiting_caller_gets_the_result_published_by_another_process(self):
+        self._hold_lock(timeout=5)
+        threading.Timer(0.3, self.cache.set, ("singleflight:result:key", "caption", 60)).start()
+        fn = Mock(return_value="own caption")
+        self.assertEqual(coalesce("key", fn), "caption")
+        fn.assert_not_called()
+
+    def test_caller_takes_over_once_the_lock_expires(self):
+        self._hold_lock(timeout=1)  # The leader died without releasing it
+        fn = Mock(return_value="own caption")
+        start = time.monotonic()
+        self.assertEqual(coalesce("key", fn), "own caption")
+        self.assertLess(time.monotonic() - start, 5)
+        fn.assert_called_once()
+        self.assertIsNone(self.cache.get("singleflight:lock:key"))
+
+    @override_settings(AI_SINGLE_FLIGHT_TIMEOUT=1)
+    def test_caller_stops_waiting_on_a_stuck_leader(self):
+        self._hold_lock(timeout=60)
+        fn = Mock(return_value="own caption")
+        self.assertEqual(coalesce("key", fn), "own caption")
+        fn.assert_called_once()
+
+    def test_concurrent_coroutines_share_one_call(self):
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "caption"
+
+        async def callers():
+            return await asyncio.gather(*(acoalesce("key", fn) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(callers()), ["caption"] * 3)
+        self.assertEqual(len(calls), 1)
@@ -0,0 +1,36 @@
+# ai/uploadhandlers.py
+import hashlib
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class ImageDigestUploadHandler(FileUploadHandler):
+    """
+    Compute the SHA-256 of each uploaded file while it streams in.
+
+    Chunks are passed through unchanged to the next handler, so the file is still
+    stored by Django's default handlers. Digests are exposed as
+    `request.upload_digests[field_name]` once parsing is complete.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, "upload_digests"):
+            self.request.upload_digests = {}
+        self.request.upload_digests[self.field_name] = self.hasher.hexdigest()
+        return None  # Let the next handler build the uploaded file
+
+
+def file_digest(file_obj):
+    """SHA-256 of a file that was uploaded without ImageDigestUploadHandler."""
+    hasher = hashlib.sha256()
+    for chunk in file_obj.chunks():
+        hasher.update(chunk)
+    file_obj.seek(0)
+    return hasher.hexdigest()
@@ -1,7 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from .views import analyse_image, generate_caption
+from .views import analyse_image, analysis_job, analysis_job_events, generate_caption, agenerate_caption, generate_caption_stream, generate_caption_batch, suggest_hashtags
 
 urlpatterns = [
     path("images/analyse/", analyse_image, name="analyse-image"),
-    path("captions/generate/", generate_caption, name="generate-caption"),
+    path("images/analyse/<uuid:job_id>/", analysis_job, name="analysis-job"),
+    # Polling is the WSGI path; a sync worker would buffer the whole event stream
+    *([path("images/analyse/<uuid:job_id>/events/", analysis_job_events, name="analysis-job-events")]
+      if settings.SERVER_MODE == "asgi" else []),
+    # The async view only pays off under ASGI; under WSGI each request would get its own event loop and backend connections
+    path("captions/generate/", agenerate_caption if settings.SERVER_MODE == "asgi" else generate_caption, name="generate-caption"),
+    path("captions/generate/stream/", generate_caption_stream, name="generate-caption-stream"),
+    path("captions/generate/batch/", generate_caption_batch, name="generate-caption-batch"),
+    path("hashtags/suggest/", suggest_hashtags, name="suggest-hashtags"),
 ]
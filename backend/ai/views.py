@@ -2,14 +2,64 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-import time
+from rest_framework import status
+from django.http import StreamingHttpResponse, JsonResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from asgiref.sync import sync_to_async
+from users.authentication import authenticate_async, unauthenticated_response
+from .models import ImageAnalysisJob
+from .jobs import submit_analysis_job
+from .cache import CAPTION_BUSINESS_FIELDS, get_cached_analysis, caption_cache_key, get_cached_captions, store_captions
+from .services import generate_captions, agenerate_captions, stream_captions
+from .batch import caption_batch
+from .hashtags import suggest_hashtags as rank_hashtags
+from .backends import AIBackendError
+from .singleflight import coalesce, acoalesce
+from businesses.resolver import get_user_business_values, request_business_id
+from posts.similarity import find_near_duplicates
+from .uploadhandlers import ImageDigestUploadHandler, file_digest
+from django.conf import settings
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_EVENTS_POLL_INTERVAL = 0.25  # Seconds between job status checks in the event stream
+ANALYSIS_EVENTS_TIMEOUT = 60  # Seconds before the event stream gives up on a job
+
+
+def _server_sent_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Disable proxy buffering so events are delivered immediately
+    return response
+
+
+def _serialize_job(job):
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "detected_items": job.detected_items,
+        "error": job.error,
+    }
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
 def analyse_image(request):
     """
-    Analyse an uploaded image and return detected items (Mock Data).
+    Submit an uploaded image for analysis and return a job id immediately.
+
+    The analysis runs on a background worker pool, so this request does not wait
+    for the model. Fetch the result by polling the job or by subscribing to its events.
 
     **Expected Request:**
     - Content-Type: `multipart/form-data`
@@ -24,32 +74,114 @@ def analyse_image(request):
     ```
 
     **Expected Response:**
-    - Status: `200 OK`
+    - Status: `202 Accepted`
     - Content-Type: `application/json`
     - JSON Response Format:
     ```json
     {
-        "detected_items": ["Steak", "Grilled Meat", "Garlic", "Herbs", "Lemon", "Lamb"]
+        "job_id": "5f0c6f1e-8a0d-4b8e-9f4e-2f7d3c1a9b10",
+        "status": "pending",
+        "status_url": "/api/ai/images/analyse/5f0c6f1e-8a0d-4b8e-9f4e-2f7d3c1a9b10/",
+        "events_url": "/api/ai/images/analyse/5f0c6f1e-8a0d-4b8e-9f4e-2f7d3c1a9b10/events/"
     }
     ```
-    - `detected_items`: `list[str]` – Detected food-related keywords.
+    - `status_url`: poll with GET until `status` is `completed` or `failed`.
+    - `events_url`: Server-Sent Events stream that emits the job each time its status changes.
+      Only served when SERVER_MODE is "asgi"; under WSGI the field is left out and clients poll.
 
-    **TODO:**
-    - Replace Mock Data with actual AI model integration.
+    If the same image was already analysed by the current model, the cached result
+    is returned right away with status `200 OK` and no job is created:
+    ```json
+    {
+        "status": "completed",
+        "detected_items": ["Steak", "Grilled Meat", "Garlic", "Herbs", "Lemon", "Lamb"],
+        "cached": true
+    }
+    ```
     """
+    # Hash the image while it streams in; must be registered before request.FILES is read
+    request.upload_handlers.insert(0, ImageDigestUploadHandler(request))
+
     if "image" not in request.FILES:
         return Response({"error": "No image uploaded"}, status=400)
 
-    # Simulating AI processing time (Mock)
-    time.sleep(1.5)
+    image = request.FILES["image"]
+    content_hash = getattr(request, "upload_digests", {}).get("image") or file_digest(image)
 
-    # Mocked detected food items (Replace with actual AI model output)
-    MOCK_DETECTED_ITEMS = ["Steak", "Grilled Meat", "Garlic", "Herbs", "Lemon", "Lamb"]
+    detected_items = get_cached_analysis(content_hash)
+    if detected_items is not None:
+        return Response({"status": "completed", "detected_items": detected_items, "cached": True})
 
+    job = ImageAnalysisJob.objects.create(user=request.user, image=image, content_hash=content_hash)
+    submit_analysis_job(job)
 
-    return Response({
-        "detected_items": MOCK_DETECTED_ITEMS
-    })
+    data = {"job_id": str(job.id), "status": job.status, "status_url": reverse("analysis-job", args=[job.id])}
+    if settings.SERVER_MODE == "asgi":
+        data["events_url"] = reverse("analysis-job-events", args=[job.id])
+    return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def analysis_job(request, job_id):
+    """
+    Return the status of an image analysis job.
+
+    **Expected Response:**
+    - Status: `200 OK`
+    - JSON Response Format:
+    ```json
+    {
+        "job_id": "5f0c6f1e-8a0d-4b8e-9f4e-2f7d3c1a9b10",
+        "status": "completed",
+        "detected_items": ["Steak", "Grilled Meat", "Garlic", "Herbs", "Lemon", "Lamb"],
+        "error": null
+    }
+    ```
+    - `status`: one of `pending`, `running`, `completed`, `failed`.
+    - `detected_items`: `list[str]` once completed, otherwise `null`.
+    """
+    job = ImageAnalysisJob.objects.filter(id=job_id, user=request.user).first()
+    if not job:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response(_serialize_job(job))
+
+
+async def analysis_job_events(request, job_id):
+    """
+    Stream status changes of an image analysis job as Server-Sent Events.
+
+    Each change is sent as a `status` event whose data is the same JSON as the
+    polling endpoint; the stream ends once the job has completed or failed.
+    Only routed when SERVER_MODE is "asgi": under WSGI the response would be buffered
+    until the job finished, holding a sync worker the whole time.
+    """
+    user = await authenticate_async(request)
+    if user is None:
+        return unauthenticated_response()
+
+    if not await ImageAnalysisJob.objects.filter(id=job_id, user=user).aexists():
+        return JsonResponse({"error": "Job not found"}, status=404)
+
+    async def event_stream():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + ANALYSIS_EVENTS_TIMEOUT
+        last_status = None
+
+        while True:
+            job = await ImageAnalysisJob.objects.aget(id=job_id)
+            if job.status != last_status:
+                last_status = job.status
+                yield _server_sent_event("status", _serialize_job(job))
+            if job.is_finished:
+                return
+            if loop.time() > deadline:
+                yield _server_sent_event("timeout", {})
+                return
+            await asyncio.sleep(ANALYSIS_EVENTS_POLL_INTERVAL)
+
+    return _event_stream_response(event_stream())
 
 
 @api_view(["POST"])
@@ -67,6 +199,7 @@ def generate_caption(request):
         - `post_categories` (`list[str]`, optional): Categories related to the post.
         - `platform_states` (`dict`, optional): Information about which platforms the post will be published on.
         - `custom_text` (`str`, optional): Additional prompt to fine-tune the AI-generated caption.
+        - `regenerate` (`bool`, optional): Skip the cache and always generate new captions.
 
     **Example Request (cURL):**
     ```
@@ -95,24 +228,333 @@ def generate_caption(request):
     }
     ```
     - `captions`: `list[str]` – List of AI-generated captions.
+    - `cached`: `bool` – Whether the captions were served from the cache.
+    - `near_duplicates`: `list[dict]` – Captions that closely repeat one of the business's
+      past posts, as `{"caption_index": 0, "post_id": 12, "similarity": 0.91}`.
+
+    Identical requests (after normalizing the inputs) are served from the cache
+    without calling the model until the entry expires or `regenerate` is set.
 
     **TODO:**
     - Replace Mock Data with actual AI model integration.
     """
 
-    # Simulating AI caption generation time (Mock)
-    time.sleep(1.5)
-
-    # Mocked AI-generated captions (Replace with actual AI model output)
-    MOCK_GENERATED_CAPTIONS = [
-        "🔥 New Menu Alert! 🔥\nExperience the perfect balance of smoky grilled steak, fresh herbs, and a zesty lemon kick. 🍋🥩 Our new menu is designed for true food lovers who crave bold flavors in a cozy, premium dining atmosphere. 🍷✨\n📍 Available now – tag your foodie friends and come try it! #NewMenu #SteakLover #PremiumDining",
-        "Indulge in perfection. 🥩✨\nJuicy, tender, and grilled to perfection – our newest menu item is here to elevate your dining experience. A hint of garlic, fresh herbs, and a citrus twist make every bite unforgettable. 🍋🔥\nTag someone who needs to try this! #FoodieHeaven #SteakGoals #NewMenu",
-        "New menu, who dis? 🥩🔥\nCrispy sear, juicy center, and that zesty lemon-garlic hit. You know you want it. 🍋💥\nPull up. #NewMenu #SteakDoneRight",
-        "👀 Can you smell that? That’s the sound of your next favorite meal sizzling to perfection! 🥩🔥\nGarlic, herbs, and a squeeze of fresh lemon—simple, yet unforgettable. 🍋✨\nDrop a 🔥 in the comments if you’re craving this right now! #FoodieLife #SteakPerfection #NewOnTheMenu",
-        "✨ A new flavor experience awaits! ✨\nOur latest menu addition combines the rich, smoky taste of perfectly grilled steak with a refreshing citrus twist and aromatic herbs. 🍽️ Whether you're here for a casual night out or a premium dining experience, this one’s for you! 🍷\nCome taste the difference. Reservations recommended! #NewMenu #SteakLover #DiningExperience"
-    ];
+    business, caption_inputs, cache_key, cached = _caption_request(request.user, request.data)
+    if cached is not None:
+        return Response({
+            "captions": cached,
+            "cached": True,
+            "near_duplicates": _near_duplicate_warnings(business, cached),
+        })
 
+    try:
+        # Identical requests in flight (double clicks, several tabs) share one generation
+        captions = coalesce(cache_key, lambda: generate_captions(**caption_inputs))
+    except AIBackendError as e:
+        return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    store_captions(cache_key, captions)
 
     return Response({
-        "captions": MOCK_GENERATED_CAPTIONS
+        "captions": captions,
+        "cached": False,
+        "near_duplicates": _near_duplicate_warnings(business, captions),
     })
+
+
+@csrf_exempt  # Authenticated by JWT like the DRF views, which are exempt as well
+@require_POST
+async def agenerate_caption(request):
+    """
+    `generate_caption` as a native async view, served at the same URL when SERVER_MODE is "asgi".
+
+    Request and response are the same. While the model works the request holds no
+    worker thread, so one process serves as many concurrent generations as the
+    backend connection pool allows.
+    """
+    user = await authenticate_async(request)
+    if user is None:
+        return unauthenticated_response()
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    business, caption_inputs, cache_key, cached = await sync_to_async(_caption_request)(user, data)
+    if cached is not None:
+        captions = cached
+    else:
+        try:
+            captions = await acoalesce(cache_key, lambda: agenerate_captions(**caption_inputs))
+        except AIBackendError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        await sync_to_async(store_captions)(cache_key, captions)
+
+    return JsonResponse({
+        "captions": captions,
+        "cached": cached is not None,
+        "near_duplicates": await sync_to_async(_near_duplicate_warnings)(business, captions),
+    })
+
+
+def _caption_request(user, data):
+    """
+    Shared start of the caption views: (the user's business, the model inputs taken from the request
+    data, their cache key, the cached captions or None when there are none or `regenerate` is set).
+    """
+    business = get_user_business_values(user, *CAPTION_BUSINESS_FIELDS)
+    caption_inputs = {
+        "detected_items": data.get("detected_items", []),
+        "business_info": data.get("business_info", {}),
+        "post_categories": data.get("post_categories", []),
+        "platform_states": data.get("platform_states", {}),
+        "custom_text": data.get("custom_text", ""),
+    }
+    cache_key = caption_cache_key(business, **caption_inputs)
+    cached = None if data.get("regenerate") else get_cached_captions(cache_key)
+    return business, caption_inputs, cache_key, cached
+
+
+def _near_duplicate_warnings(business, captions):
+    """Flag captions that repeat a past post; a failing index must not block caption generation."""
+    if not business:
+        return []
+    try:
+        return find_near_duplicates(business["id"], captions)
+    except Exception as e:
+        logger.error(f"❌ Near-duplicate check failed for business {business['id']}: {e}", exc_info=True)
+        return []
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONParser])
+def suggest_hashtags(request):
+    """
+    Suggest hashtags for a post from the hashtags used in past posts.
+
+    Hashtags that often accompanied the detected items and categories rank first,
+    weighted by the reactions and shares of the posts that used them. Hashtags few
+    businesses have used are only suggested to those businesses. This reads a
+    precomputed index (`manage.py build_hashtag_index`) and does not call a model.
+
+    **Expected Request:**
+    - Content-Type: `application/json`
+    - Fields:
+        - `detected_items` (`list[str]`): Items detected in the image.
+        - `post_categories` (`list[str]`, optional): Category labels or keys of the post.
+        - `limit` (`int`, optional): Number of hashtags to return (default 10, at most 30).
+
+    **Example Request (cURL):**
+    ```
+    curl -X POST http://localhost:8000/api/ai/hashtags/suggest/ \
+         -H "Authorization: Bearer <ACCESS_TOKEN>" \
+         -H "Content-Type: application/json" \
+         -d '{"detected_items": ["Steak", "Garlic"], "post_categories": ["Product Highlight"]}'
+    ```
+
+    **Expected Response:**
+    - Status: `200 OK`
+    ```json
+    {
+        "hashtags": [
+            {"hashtag": "#steaklover", "score": 3.412},
+            {"hashtag": "#newmenu", "score": 1.87}
+        ]
+    }
+    ```
+    """
+    detected_items = request.data.get("detected_items", [])
+    post_categories = request.data.get("post_categories", [])
+    if not isinstance(detected_items, list) or not isinstance(post_categories, list):
+        return Response({"error": "detected_items and post_categories must be lists"}, status=400)
+    try:
+        limit = max(1, min(int(request.data.get("limit", 10)), 30))
+    except (TypeError, ValueError):
+        return Response({"error": "limit must be an integer"}, status=400)
+
+    return Response({"hashtags": rank_hashtags(detected_items, post_categories, limit, request_business_id(request))})
+
+
+@csrf_exempt  # Authenticated by JWT like the DRF views, which are exempt as well
+@require_POST
+async def generate_caption_stream(request):
+    """
+    Generate captions like `generate_caption`, streaming each one as a Server-Sent Event.
+
+    The request body is the same JSON as for `generate_caption`. The first caption is
+    sent as soon as the model produces it instead of after the whole generation.
+    This is a native async view: serve it through the ASGI app
+    (e.g. `uvicorn backend.asgi:application`) so the stream does not hold a worker thread.
+
+    **Expected Response:**
+    - Status: `200 OK`
+    - Content-Type: `text/event-stream`
+    ```
+    event: caption
+    data: {"index": 0, "caption": "🔥 New Menu Alert! 🔥..."}
+
+    event: caption
+    data: {"index": 1, "caption": "Indulge in perfection. 🥩✨..."}
+
+    event: done
+    data: {"cached": false}
+    ```
+    - An `error` event with `{"error": "..."}` ends the stream if the model fails midway.
+    - `503 Service Unavailable` (JSON) if the model fails before the first caption.
+
+    Cached captions are streamed immediately. Streams are not coalesced with other
+    requests; the complete list is cached once the stream has finished.
+    """
+    user = await authenticate_async(request)
+    if user is None:
+        return unauthenticated_response()
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    _, caption_inputs, cache_key, cached = await sync_to_async(_caption_request)(user, data)
+    if cached is not None:
+        async def cached_stream():
+            for index, caption in enumerate(cached):
+                yield _server_sent_event("caption", {"index": index, "caption": caption})
+            yield _server_sent_event("done", {"cached": True})
+
+        return _event_stream_response(cached_stream())
+
+    captions = stream_captions(**caption_inputs)
+    try:
+        # Wait for the first caption so a failing model still gets a proper error status
+        first = await anext(captions)
+    except StopAsyncIteration:
+        first = None
+    except AIBackendError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    async def caption_stream():
+        generated = []
+        try:
+            if first is not None:
+                generated.append(first)
+                yield _server_sent_event("caption", {"index": 0, "caption": first})
+                async for caption in captions:
+                    yield _server_sent_event("caption", {"index": len(generated), "caption": caption})
+                    generated.append(caption)
+        except AIBackendError as e:
+            yield _server_sent_event("error", {"error": str(e)})
+            return
+        finally:
+            await captions.aclose()  # Stops the model stream if the client disconnected
+
+        if generated:  # An empty result must not be served as cached
+            await sync_to_async(store_captions)(cache_key, generated)
+        yield _server_sent_event("done", {"cached": False})
+
+    return _event_stream_response(caption_stream())
+
+
+def _read_batch_request(request):
+    """
+    Parse a batch caption request into (images, item_lists, options).
+    Reading multipart bodies writes uploads to disk, so this runs off the event loop.
+    """
+    if request.content_type == "multipart/form-data":
+        images = request.FILES.getlist("images")
+        item_lists = []
+        fields = {
+            key: json.loads(request.POST[key])
+            for key in ("business_info", "post_categories", "platform_states") if request.POST.get(key)
+        }
+        fields["custom_text"] = request.POST.get("custom_text", "")
+    else:
+        fields = json.loads(request.body or b"{}")
+        if not isinstance(fields, dict):
+            raise ValueError("The request body must be a JSON object")
+        images = []
+        item_lists = fields.get("items", [])
+        if not isinstance(item_lists, list) or not all(isinstance(items, list) for items in item_lists):
+            raise ValueError("items must be a list of detected-item lists")
+
+    options = {
+        "business_info": fields.get("business_info", {}),
+        "post_categories": fields.get("post_categories", []),
+        "platform_states": fields.get("platform_states", {}),
+        "custom_text": fields.get("custom_text", ""),
+    }
+    return images, item_lists, options
+
+
+@csrf_exempt  # Authenticated by JWT like the DRF views, which are exempt as well
+@require_POST
+async def generate_caption_batch(request):
+    """
+    Analyse a batch of images (or take a batch of detected-item lists) and caption each one,
+    streaming the results per item as Server-Sent Events.
+
+    Items run concurrently on the AI worker pool and caption requests are grouped
+    into batched backend calls, so the batch takes about as long as its slowest item.
+
+    **Expected Request:**
+    - Content-Type: `multipart/form-data`
+        - `images` (file, repeated): The images to analyse and caption.
+        - `business_info`, `post_categories`, `platform_states` (JSON strings, optional), `custom_text` (optional).
+    - or Content-Type: `application/json`
+        - `items` (`list[list[str]]`): One list of detected items per post.
+        - `business_info`, `post_categories`, `platform_states`, `custom_text` (optional).
+    The optional fields are shared by every item and mean the same as for `generate_caption`.
+
+    **Example Request (cURL):**
+    ```
+    curl -N -X POST http://localhost:8000/api/ai/captions/generate/batch/ \
+         -H "Authorization: Bearer <ACCESS_TOKEN>" \
+         -F "images=@/path/to/monday.jpg" \
+         -F "images=@/path/to/tuesday.jpg" \
+         -F 'business_info={"name": "Gourmet Steakhouse"}'
+    ```
+
+    **Expected Response:**
+    - Status: `200 OK`
+    - Content-Type: `text/event-stream`, events in completion order:
+    ```
+    event: analysis
+    data: {"index": 1, "detected_items": ["Steak", "Garlic"], "cached": true}
+
+    event: captions
+    data: {"index": 1, "detected_items": ["Steak", "Garlic"], "captions": ["..."], "cached": false}
+
+    event: error
+    data: {"index": 0, "error": "AI backend request failed: HTTP 503"}
+
+    event: done
+    data: {"count": 2}
+    ```
+    - `index`: position of the item in the request (images first, then `items`).
+    - `400 Bad Request` if the batch is empty or has more than `AI_BATCH_MAX_ITEMS` items.
+    """
+    user = await authenticate_async(request)
+    if user is None:
+        return unauthenticated_response()
+
+    try:
+        images, item_lists, options = await sync_to_async(_read_batch_request)(request)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    count = len(images) + len(item_lists)
+    if not count:
+        return JsonResponse({"error": "No images or items provided"}, status=400)
+    if count > settings.AI_BATCH_MAX_ITEMS:
+        return JsonResponse({"error": f"A batch can contain at most {settings.AI_BATCH_MAX_ITEMS} items"}, status=400)
+
+    business = await sync_to_async(get_user_business_values)(user, *CAPTION_BUSINESS_FIELDS)
+
+    async def batch_stream():
+        async for event, data in caption_batch(images, item_lists, business, options):
+            yield _server_sent_event(event, data)
+        yield _server_sent_event("done", {"count": count})
+
+    return _event_stream_response(batch_stream())
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+from ai.jobs import resume_unfinished_jobs  # noqa: E402 (needs the apps loaded above)
+
+resume_unfinished_jobs()
@@ -0,0 +1,378 @@
+# businesses/archive.py
+"""
+Per-business backup archives, for moving a business between environments.
+
+An archive is a gzipped tar stream holding, in this order:
+- manifest.json: format version and the exported business id,
+- one NDJSON member per table, one row per line with the model's concrete
+  fields (many-to-many categories inlined as their keys),
+- the media files the rows refer to, under media/, right after the business.
+Members are written one after another, so an archive can be written to and
+read from a pipe; a table is spooled to a temporary file while it is written.
+
+Import inserts the rows in batches, in archive order, remapping every id
+to the one assigned by the target database. Categories are matched by key and
+the owner by email (created only when missing). Media under a business
+directory moves to the new business's directory. Derived data (LSH buckets,
+caption index, promotion lift, posting times, hashtags) is not archived: see
+`rebuild_derived_data`.
+
+Users are archived without their privileges and 2FA setup (USER_FIELDS_RESET):
+staff access is granted per environment, and the 2FA secret is encrypted with
+the source environment's key, so restored users set 2FA up again.
+"""
+import base64
+import io
+import json
+import tarfile
+import tempfile
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import FileField
+from django.utils import timezone
+
+from ai.hashtags import build_hashtag_index
+from posts.minhash import band_keys
+from posts.models import Post, PostLSHBucket
+from posts.posting_times import build_posting_profile
+from posts.similarity import rebuild_index
+from promotions.analytics import refresh_promotion_lift
+from promotions.models import Promotion, PromotionSuggestion
+from sales.models import SalesData, SalesDataPoint
+from social.models import SocialMedia
+from users.models import User
+from .models import Business
+
+ARCHIVE_FORMAT = 1
+BATCH_SIZE = 2000  # Rows read per query on export and parsed per batch on import
+INSERT_PARAMS = 30000  # Values per INSERT statement on import, so narrow tables insert more rows at once
+SPOOL_SIZE = 8 * 1024 * 1024  # Bytes of a table kept in memory before it is spooled to disk
+MEDIA_PREFIXES = ("business_logos", "business_posts", "business_sales")  # Upload paths of the form <prefix>/<business id>/...
+USER_FIELDS_RESET = ("is_superuser", "is_staff", "requires_2fa", "secret_2fa")  # Left out on export, defaults on import
+
+# Tables in dependency order: (member name, model, lookup selecting the business's rows, {foreign key: table})
+TABLES = (
+    ("users", User, "businesses", {}),
+    ("business", Business, "id", {"owner_id": "users"}),
+    ("social_media", SocialMedia, "business_id", {"business_id": "business"}),
+    ("promotions", Promotion, "business_id", {"business_id": "business"}),
+    ("promotion_suggestions", PromotionSuggestion, "business_id", {"business_id": "business"}),
+    ("posts", Post, "business_id",
+     {"business_id": "business", "platform_id": "social_media", "promotion_id": "promotions"}),
+    ("sales_data", SalesData, "business_id", {"business_id": "business"}),
+    ("sales_data_points", SalesDataPoint, "business_id", {"business_id": "business", "source_file_id": "sales_data"}),
+)
+MEDIA_FIELDS = ((Business, "logo", "id"), (Post, "image", "business_id"), (SalesData, "file", "business_id"))
+
+
+class ArchiveError(Exception):
+    pass
+
+
+class _ArchiveEncoder(DjangoJSONEncoder):
+    """Keeps microseconds, which DjangoJSONEncoder rounds to milliseconds."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _chunks(rows, size=BATCH_SIZE):
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _fields(model):
+    # A login timestamp is meaningless in another environment
+    return [field for field in model._meta.concrete_fields if field.attname != "last_login"]
+
+
+def _categories_field(model):
+    return next((field for field in model._meta.many_to_many if field.name == "categories"), None)
+
+
+def _category_links(field):
+    """(through model, attname of the row's id, attname of the category id) of a categories field."""
+    return field.remote_field.through, f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id"
+
+
+def _add_member(tar, name, fileobj, size):
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(timezone.now().timestamp())
+    tar.addfile(info, fileobj)
+
+
+def _export_table(tar, name, model, rows):
+    """Write `rows` (a queryset) as the NDJSON member `name`; return the number of rows."""
+    attnames = [field.attname for field in _fields(model)]
+    if model is User:
+        attnames = [attname for attname in attnames if attname not in USER_FIELDS_RESET]
+    categories_field = _categories_field(model)
+    encoder = _ArchiveEncoder()
+    count = 0
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as spool:
+        for chunk in _chunks(rows.order_by("id").values(*attnames).iterator(chunk_size=BATCH_SIZE)):
+            categories = {}
+            if categories_field:
+                through, row_attname, _ = _category_links(categories_field)
+                links = through.objects.filter(**{f"{row_attname}__in": [row["id"] for row in chunk]})
+                for row_id, key in links.values_list(row_attname, f"{categories_field.m2m_reverse_field_name()}__key"):
+                    categories.setdefault(row_id, []).append(key)
+
+            lines = []
+            for row in chunk:
+                for attname, value in row.items():
+                    if isinstance(value, (bytes, memoryview)):
+                        row[attname] = base64.b64encode(value).decode()  # BinaryField.to_python decodes it again
+                if categories_field:
+                    row["categories"] = categories.get(row["id"], [])
+                lines.append(encoder.encode(row) + "\n")
+            spool.write("".join(lines).encode())
+            count += len(chunk)
+
+        size = spool.tell()
+        spool.seek(0)
+        _add_member(tar, f"{name}.ndjson", spool, size)
+    return count
+
+
+def _export_media(tar, business_id):
+    """Add the files referenced by the business's rows; return (files added, files missing from storage)."""
+    names = set()
+    for model, field, lookup in MEDIA_FIELDS:
+        rows = model.objects.filter(**{lookup: business_id}).exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+        names.update(rows.values_list(field, flat=True).iterator(chunk_size=BATCH_SIZE))
+
+    added = missing = 0
+    for name in sorted(names):
+        if not default_storage.exists(name):
+            missing += 1
+            continue
+        with default_storage.open(name) as file:
+            _add_member(tar, f"media/{name}", file, default_storage.size(name))
+        added += 1
+    return added, missing
+
+
+def export_business(business_id, fileobj):
+    """Write the archive of a business to the binary file object `fileobj`; return row counts per table."""
+    if not Business.objects.filter(id=business_id).exists():
+        raise ArchiveError(f"Business {business_id} does not exist")
+
+    counts = {}
+    with tarfile.open(fileobj=fileobj, mode="w|gz") as tar:
+        manifest = json.dumps({
+            "format": ARCHIVE_FORMAT,
+            "business_id": business_id,
+            "exported_at": timezone.now().isoformat(),
+        }).encode()
+        _add_member(tar, "manifest.json", io.BytesIO(manifest), len(manifest))
+
+        for name, model, lookup, _ in TABLES:
+            counts[name] = _export_table(tar, name, model, model.objects.filter(**{lookup: business_id}))
+            if name == "business":
+                counts["media"], counts["media_missing"] = _export_media(tar, business_id)
+    return counts
+
+
+def insert_rows(model, attnames, rows, returning=False):
+    """
+    Insert `rows` (tuples of database values for `attnames`) with multi-row INSERTs.
+    Skipping model instances and bulk_create's per-field work makes large inserts
+    several times faster. With `returning`, return the new ids in row order.
+    """
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(attname) for attname in attnames]
+    if returning and not connection.features.can_return_rows_from_bulk_insert:
+        instances = model.objects.bulk_create([model(**dict(zip(attnames, row))) for row in rows])
+        return [instance.pk for instance in instances]
+
+    batch_size = max(1, min(INSERT_PARAMS // len(fields), connection.ops.bulk_batch_size(fields, rows)))
+    sql = f"INSERT INTO {quote(model._meta.db_table)} ({', '.join(quote(field.column) for field in fields)}) VALUES "
+    placeholders = f"({', '.join(['%s'] * len(fields))})"
+    new_ids = []
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), batch_size):
+            batch = rows[offset:offset + batch_size]
+            params = [value for row in batch for value in row]
+            if returning:
+                cursor.execute(f"{sql}{', '.join([placeholders] * len(batch))} RETURNING {quote(model._meta.pk.column)}", params)
+                new_ids.extend(row[0] for row in cursor.fetchall())
+            else:
+                cursor.execute(f"{sql}{', '.join([placeholders] * len(batch))}", params)
+    return new_ids
+
+
+def _prepare(fields, row, db):
+    """Database values of an archived row; fields added since the export get their default."""
+    return tuple(
+        field.get_db_prep_save(field.to_python(row[field.attname]) if field.attname in row else field.get_default(), db)
+        for field in fields
+    )
+
+
+def _import_users(lines, owner):
+    """
+    Map archived users to the owner given, to existing users with the same email, or to new users.
+    New users never get USER_FIELDS_RESET from the archive, even one written before they were left out.
+    """
+    fields = [field for field in _fields(User) if field.attname != "id"]
+    ids = {}
+    for line in lines:
+        row = json.loads(line)
+        if owner is not None:
+            ids[row["id"]] = owner.id
+            continue
+        row = {attname: value for attname, value in row.items() if attname not in USER_FIELDS_RESET}
+        row["email"] = row["email"].lower()
+        user_id = User.objects.filter(email=row["email"]).values_list("id", flat=True).first()
+        if user_id is None:
+            user_id, = insert_rows(User, [field.attname for field in fields], [_prepare(fields, row, connections[DEFAULT_DB_ALIAS])], returning=True)
+        ids[row["id"]] = user_id
+    return ids
+
+
+def _import_table(lines, model, foreign_keys, ids, media_name):
+    """Insert the rows of one NDJSON member; return {archived id: new id}."""
+    fields = [field for field in _fields(model) if field.attname != "id"]
+    attnames = [field.attname for field in fields]
+    file_attnames = [field.attname for field in fields if isinstance(field, FileField)]
+    categories_field = _categories_field(model)
+    if categories_field:
+        through, row_attname, category_attname = _category_links(categories_field)
+        category_ids = dict(categories_field.related_model.objects.values_list("key", "id"))
+
+    db = connections[DEFAULT_DB_ALIAS]  # Looked up once: the `connection` proxy costs more than preparing a value
+    new_ids = {}
+    for chunk in _chunks(lines):
+        rows, archived_ids, categories = [], [], []
+        for line in chunk:
+            row = json.loads(line)
+            archived_ids.append(row["id"])
+            categories.append(row.pop("categories", []))
+            for attname, table in foreign_keys.items():
+                if row.get(attname) is not None:
+                    row[attname] = ids[table][row[attname]]
+            for attname in file_attnames:
+                if row.get(attname):
+                    row[attname] = media_name(row[attname])
+            rows.append(_prepare(fields, row, db))
+
+        chunk_ids = insert_rows(model, attnames, rows, returning=True)
+        new_ids.update(zip(archived_ids, chunk_ids))
+        if categories_field:
+            insert_rows(through, [row_attname, category_attname], [
+                (row_id, category_ids[key])
+                for row_id, keys in zip(chunk_ids, categories) for key in keys if key in category_ids
+            ])
+    return new_ids
+
+
+def _moved_media_name(name, archived_business_id, business_id):
+    """The name of a file under the archived business's directory once moved to the new business, else None."""
+    parts = name.split("/")
+    if len(parts) > 2 and parts[0] in MEDIA_PREFIXES and parts[1] == str(archived_business_id):
+        return "/".join([parts[0], str(business_id), *parts[2:]])
+    return None
+
+
+def _restore_media(name, fileobj, size, archived_business_id, business_id, saved):
+    """Store an archived file; return the name it was stored under."""
+    target = _moved_media_name(name, archived_business_id, business_id)
+    if target is None:
+        if default_storage.exists(name):
+            return name  # Shared by all businesses, e.g. the default logo
+        target = name
+    file = File(fileobj, name=target)
+    file.size = size
+    stored_name = default_storage.save(target, file)  # Renamed by the storage if the name is taken
+    saved.append(stored_name)
+    return stored_name
+
+
+def import_business(fileobj, owner=None):
+    """
+    Restore the archive read from the binary file object `fileobj` as a new business.
+
+    The archived owner is replaced by `owner` when one is given. Everything is inserted
+    in one transaction, and stored media is deleted again if the import fails.
+    Returns (new business id, rows inserted per table). Call `rebuild_derived_data` afterwards.
+    """
+    tables = {name: (model, foreign_keys) for name, model, _, foreign_keys in TABLES}
+    ids, media, saved, counts = {}, {}, [], {}
+    manifest = None
+
+    def media_name(name):
+        # Files missing from the archive still move, so no row points into another business's directory
+        if "business" not in ids:
+            return name  # The business's own logo, remapped once the business has its new id
+        archived_business_id = manifest["business_id"]
+        business_id = ids["business"][archived_business_id]
+        return media.get(name) or _moved_media_name(name, archived_business_id, business_id) or name
+
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tar, transaction.atomic():
+            for member in tar:
+                reader = tar.extractfile(member)
+                if member.name == "manifest.json":
+                    manifest = json.load(reader)
+                    if manifest.get("format") != ARCHIVE_FORMAT:
+                        raise ArchiveError(f"Unsupported archive format {manifest.get('format')}")
+                elif manifest is None:
+                    raise ArchiveError("Not a business archive: it does not start with manifest.json")
+                elif member.name.startswith("media/"):
+                    name = member.name.removeprefix("media/")
+                    media[name] = _restore_media(
+                        name, reader, member.size, manifest["business_id"], ids["business"][manifest["business_id"]], saved
+                    )
+                    counts["media"] = counts.get("media", 0) + 1
+                else:
+                    table = member.name.removesuffix(".ndjson")
+                    if table not in tables:
+                        raise ArchiveError(f"Unknown archive member {member.name}")
+                    lines = (line for line in reader if line.strip())  # json.loads takes the UTF-8 bytes as they are
+                    if table == "users":
+                        ids[table] = _import_users(lines, owner)
+                    else:
+                        model, foreign_keys = tables[table]
+                        ids[table] = _import_table(lines, model, foreign_keys, ids, media_name)
+                    counts[table] = len(ids[table])
+            if manifest is None or manifest["business_id"] not in ids.get("business", {}):
+                raise ArchiveError("The archive does not contain its business")
+            business_id = ids["business"][manifest["business_id"]]
+            logo = Business.objects.filter(id=business_id).values_list("logo", flat=True).first()
+            if logo:
+                Business.objects.filter(id=business_id).update(logo=media_name(logo))
+    except Exception as e:
+        for name in saved:
+            default_storage.delete(name)
+        if isinstance(e, tarfile.TarError):
+            raise ArchiveError(f"Unreadable archive: {e}") from e
+        raise
+    return business_id, counts
+
+
+def rebuild_derived_data(business_id):
+    """
+    Rebuild what an archive leaves out: LSH buckets from the restored signatures, the caption index,
+    promotion lift and posting-time profile of the business, and the hashtag index (with its new posts added).
+    """
+    signatures = Post.objects.filter(business_id=business_id, minhash__isnull=False).values_list("id", "minhash")
+    with transaction.atomic():
+        for chunk in _chunks(signatures.order_by("id").iterator(chunk_size=BATCH_SIZE)):
+            insert_rows(PostLSHBucket, ["post_id", "business_id", "key"], [
+                (post_id, business_id, key)
+                for post_id, minhash in chunk for key in band_keys(np.frombuffer(minhash, dtype=np.uint32))
+            ])
+        rebuild_index(business_id)
+        refresh_promotion_lift([business_id])
+        build_posting_profile(business_id)
+    build_hashtag_index()
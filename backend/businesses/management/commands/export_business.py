@@ -0,0 +1,35 @@
+# businesses/management/commands/export_business.py
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from businesses.archive import ArchiveError, export_business
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a business with its owner, posts, promotions, suggestions, sales data and media "
+        "to a .tar.gz archive, to be restored with import_business."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("business_id", type=int)
+        parser.add_argument("archive", help="Path of the archive to write, or - for stdout.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            if options["archive"] == "-":
+                counts = export_business(options["business_id"], sys.stdout.buffer)
+            else:
+                with open(options["archive"], "wb") as archive:
+                    counts = export_business(options["business_id"], archive)
+        except ArchiveError as e:
+            raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - started
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        # Keep stdout clean for the archive itself
+        output = self.stderr if options["archive"] == "-" else self.stdout
+        output.write(self.style.SUCCESS(f"Exported business {options['business_id']} ({summary}) in {elapsed:.1f}s"))
@@ -0,0 +1,46 @@
+# businesses/management/commands/import_business.py
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from businesses.archive import ArchiveError, import_business, rebuild_derived_data
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Restore a business archive written by export_business as a new business."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archive", help="Path of the archive to read, or - for stdin.")
+        parser.add_argument("--owner", help="Email of an existing user to own the business instead of the archived owner.")
+        parser.add_argument("--skip-derived", action="store_true",
+                            help="Do not rebuild LSH buckets, the caption index, promotion lift, posting times and hashtags.")
+
+    def handle(self, *args, **options):
+        owner = None
+        if options["owner"]:
+            owner = User.objects.filter(email=options["owner"].lower()).first()
+            if owner is None:
+                raise CommandError(f"No user with email {options['owner']}")
+
+        started = time.perf_counter()
+        try:
+            if options["archive"] == "-":
+                business_id, counts = import_business(sys.stdin.buffer, owner)
+            else:
+                with open(options["archive"], "rb") as archive:
+                    business_id, counts = import_business(archive, owner)
+        except ArchiveError as e:
+            raise CommandError(str(e))
+        imported = time.perf_counter()
+
+        if not options["skip_derived"]:
+            rebuild_derived_data(business_id)
+        elapsed = time.perf_counter() - started
+
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored business {business_id} ({summary}) in {elapsed:.1f}s "
+            f"(import {imported - started:.1f}s, derived data {elapsed - (imported - started):.1f}s)"
+        ))
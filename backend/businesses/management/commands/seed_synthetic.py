@@ -0,0 +1,59 @@
+# businesses/management/commands/seed_synthetic.py
+import time
+from datetime import date
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from businesses.synthetic import EMAIL_FORMAT, generate_business, insert_businesses
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Create synthetic users and businesses with posts, promotions, suggestions and daily sales, "
+        "for load tests and benchmarks. The same --seed and --end-date always produce the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="Number of businesses (each with its own owner) to create.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--years", type=float, default=3, help="Years of posts, promotions and daily sales.")
+        parser.add_argument("--posts", type=int, default=150, help="Median number of posts per business.")
+        parser.add_argument("--end-date", type=date.fromisoformat,
+                            help="Last day of the generated history, as YYYY-MM-DD (default: today).")
+        parser.add_argument("--password", default="synthetic", help="Password of every synthetic user.")
+        parser.add_argument("--batch-size", type=int, default=100,
+                            help="Number of businesses generated and inserted per transaction.")
+
+    def handle(self, *args, **options):
+        count, seed = options["count"], options["seed"]
+        end_date = options["end_date"] or timezone.localdate()
+        emails = [EMAIL_FORMAT.format(seed=seed, index=index) for index in (0, count - 1)]
+        if User.objects.filter(email__in=emails).exists():
+            raise CommandError(f"Businesses of seed {seed} already exist; delete them or pick another --seed")
+        password = make_password(options["password"])  # Hashed once for every user
+
+        started = time.perf_counter()
+        counts = {}
+        for start in range(0, count, options["batch_size"]):
+            businesses = [
+                generate_business(seed, index, end_date, options["years"], options["posts"])
+                for index in range(start, min(start + options["batch_size"], count))
+            ]
+            for model, rows in insert_businesses(businesses, password).items():
+                counts[model] = counts.get(model, 0) + rows
+            total = sum(counts.values())
+            self.stdout.write(
+                f"{start + len(businesses)}/{count} businesses, {total} rows "
+                f"({total / (time.perf_counter() - started):,.0f} rows/s)"
+            )
+
+        elapsed = time.perf_counter() - started
+        summary = ", ".join(f"{rows} {model}" for model, rows in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary} in {elapsed:.1f}s"))
+        self.stdout.write(
+            "Derived data is not generated; run build_minhash_index, build_caption_index, "
+            "build_posting_times, build_hashtag_index and compute_promotion_lift as needed."
+        )
@@ -0,0 +1,90 @@
+# businesses/resolver.py
+"""
+Resolve the authenticated user's business once per request.
+
+Views call `request_business_id(request)` when filtering by business is all
+they need, and `request_business(request)` when they need the Business itself.
+Both remember their result on the request, so helpers called from one view
+(e.g. get_queryset and perform_create) share a single lookup. Views without a
+DRF request (the async AI views) use `get_user_business_values`.
+
+The user -> business id mapping is also kept in the shared cache for
+BUSINESS_ID_CACHE_TIMEOUT seconds. Only existing businesses are cached (a user
+creating their first business is seen at once), and the entries of the old and
+new owner are dropped when a Business is saved or deleted (see
+businesses/signals.py). The cache is shared so that this invalidation reaches
+every process: a stale id would show one tenant another tenant's data.
+"""
+from django.core.cache import caches
+
+from config.instrumentation import record_cache_lookup
+from .models import Business
+
+BUSINESS_ID_CACHE_TIMEOUT = 300  # Seconds; bounds staleness should an invalidation be lost
+
+_UNRESOLVED = object()
+
+
+def business_id_cache_key(user_id):
+    return f"business_id:user:{user_id}"
+
+
+def get_user_business_id(user):
+    """Return the id of the user's business, or None."""
+    if not user or not user.is_authenticated:
+        return None
+    key = business_id_cache_key(user.pk)
+    business_id = caches["shared"].get(key)
+    record_cache_lookup(business_id is not None)
+    if business_id is None:
+        business_id = Business.objects.filter(owner=user).order_by("id").values_list("id", flat=True).first()
+        if business_id is not None:
+            caches["shared"].set(key, business_id, BUSINESS_ID_CACHE_TIMEOUT)
+    return business_id
+
+
+def get_user_business_values(user, *fields):
+    """Return the given fields of the user's business as a dict, or None."""
+    return _owned_business(user, get_user_business_id(user), Business.objects.values(*fields))
+
+
+def _owned_business(user, business_id, businesses):
+    """The row of `businesses` with the cached `business_id`, if the user still owns it, else looked up afresh."""
+    if business_id is None:
+        return None
+    business = businesses.filter(id=business_id, owner=user).first()
+    if business is None:
+        # Deleted or handed over since it was cached, and the invalidation was missed
+        caches["shared"].delete(business_id_cache_key(user.pk))
+        business = businesses.filter(owner=user).order_by("id").first()
+    return business
+
+
+def request_business_id(request):
+    """Return the id of the requesting user's business, or None, looking it up once per request."""
+    business_id = getattr(request, "_business_id", _UNRESOLVED)
+    if business_id is _UNRESOLVED:
+        business = getattr(request, "_business", _UNRESOLVED)
+        business_id = get_user_business_id(request.user) if business is _UNRESOLVED else getattr(business, "id", None)
+        request._business_id = business_id
+    return business_id
+
+
+def request_business(request):
+    """Return the requesting user's Business, or None, loading it once per request."""
+    business = getattr(request, "_business", _UNRESOLVED)
+    if business is _UNRESOLVED:
+        business = _owned_business(request.user, request_business_id(request), Business.objects.all())
+        request._business = business
+        request._business_id = getattr(business, "id", None)
+    return business
+
+
+class BusinessMixin:
+    """DRF view mixin resolving the requesting user's business once per request."""
+
+    def get_business(self):
+        return request_business(self.request)
+
+    def get_business_id(self):
+        return request_business_id(self.request)
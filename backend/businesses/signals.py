@@ -0,0 +1,18 @@
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from businesses.models import Business
+from businesses.resolver import business_id_cache_key
+
+@receiver(post_init, sender=Business)
+def remember_owner(sender, instance, **kwargs):
+    # Deferred owners are left out so loading them is not forced here
+    instance._loaded_owner_id = instance.__dict__.get("owner_id")
+
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+def forget_owner_business_id(sender, instance, **kwargs):
+    """Drop the cached user -> business id mapping of the owner, and of the previous one (see businesses/resolver.py)."""
+    owner_ids = {instance.owner_id, instance._loaded_owner_id} - {None}
+    caches["shared"].delete_many([business_id_cache_key(owner_id) for owner_id in owner_ids])
+    instance._loaded_owner_id = instance.owner_id
@@ -0,0 +1,377 @@
+# businesses/synthetic.py
+"""
+Synthetic businesses for load tests and benchmarks.
+
+Each business is drawn from its own random generator, seeded with the run's
+seed and the business's index, so a seed always produces the same businesses
+whatever the batch size or how many are created. The distributions are rough
+but shaped like real accounts: lognormal business size and post counts,
+engagement peaking around lunch and the evening, weekly and yearly sales
+cycles, and sales lifted while a promotion runs.
+
+Rows are written table by table for a batch of businesses at a time with
+`insert_rows`, which skips model instances; bulk_create would spend most of the
+run building them.
+"""
+import math
+from collections import Counter
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import DateField, DecimalField
+from django.utils import timezone
+
+from config.constants import DEFAULT_ROLE, POST_CATEGORIES_OPTIONS, PROMOTION_CATEGORIES_OPTIONS
+from posts.models import Category, Post
+from promotions.models import Promotion, PromotionCategories, PromotionSuggestion
+from sales.models import SalesData, SalesDataPoint
+from social.models import SocialMedia
+from users.models import User
+from .archive import insert_rows
+from .models import Business
+
+EMAIL_FORMAT = "synthetic-{seed}-{index}@example.com"
+POST_IMAGE = "defaults/synthetic_post.jpg"  # One placeholder shared by every post; no files are written
+
+PLATFORM_SHARE = {"instagram": 0.95, "facebook": 0.7, "twitter": 0.35, "threads": 0.25}  # Businesses with an account
+PLATFORM_REACH = {"instagram": 1.0, "facebook": 0.6, "twitter": 0.35, "threads": 0.25}  # Relative engagement per post
+STATUS_SHARE = {"Published": 0.85, "Scheduled": 0.1, "Failed": 0.05}
+WEEKDAY_SALES = (0.85, 0.9, 0.95, 1.0, 1.2, 1.4, 1.1)  # Revenue factor, Monday first
+PROMOTIONS_PER_YEAR = 6
+SUGGESTIONS_PER_BUSINESS = 3
+PROMOTED_POST_SHARE = 0.6  # Posts created while a promotion runs that belong to it
+
+BUSINESS_TYPES = {
+    "Restaurant": {
+        "names": ["Grill", "Kitchen", "Bistro", "Steakhouse", "Table", "Diner"],
+        "items": ["Steak", "Burger", "Pasta", "Ribs", "Caesar Salad", "Fish & Chips", "Bloomin' Onion"],
+        "customers": ["Families", "Young professionals", "18-35 years old, mostly foodies"],
+        "vibes": ["Cozy & premium dining experience", "Casual and lively", "Rustic and warm"],
+        "hashtags": ["#Foodie", "#DinnerTime", "#SteakLover", "#EatLocal", "#ChefSpecial"],
+    },
+    "Cafe": {
+        "names": ["Coffee House", "Espresso Bar", "Cafe", "Roasters", "Corner"],
+        "items": ["Flat White", "Cold Brew", "Matcha Latte", "Croissant", "Banana Bread", "Avocado Toast"],
+        "customers": ["Students", "Remote workers", "Morning commuters"],
+        "vibes": ["Bright and relaxed", "Minimalist", "Friendly neighbourhood spot"],
+        "hashtags": ["#CoffeeTime", "#Brunch", "#LatteArt", "#CafeLife", "#MorningFuel"],
+    },
+    "Bakery": {
+        "names": ["Bakehouse", "Patisserie", "Bread Co.", "Oven"],
+        "items": ["Sourdough", "Cinnamon Scroll", "Macarons", "Lemon Tart", "Baguette", "Brownie"],
+        "customers": ["Locals", "Families", "Weekend shoppers"],
+        "vibes": ["Homely and warm", "French-inspired", "Artisanal"],
+        "hashtags": ["#FreshBaked", "#Sourdough", "#SweetTooth", "#Bakery", "#PastryLove"],
+    },
+    "Bar": {
+        "names": ["Tavern", "Taproom", "Lounge", "Social", "Brewhouse"],
+        "items": ["Espresso Martini", "Craft IPA", "Margarita", "Negroni", "Loaded Fries", "Wings"],
+        "customers": ["25-40 years old", "After-work crowd", "Sports fans"],
+        "vibes": ["Dim and intimate", "Loud and fun", "Rooftop views"],
+        "hashtags": ["#HappyHour", "#Cocktails", "#CraftBeer", "#NightOut", "#Cheers"],
+    },
+    "Boutique": {
+        "names": ["Boutique", "Studio", "Collective", "Store"],
+        "items": ["Linen Shirt", "Summer Dress", "Leather Bag", "Silk Scarf", "Denim Jacket", "Sneakers"],
+        "customers": ["Fashion-conscious women", "Young adults", "Gift shoppers"],
+        "vibes": ["Curated and stylish", "Sustainable", "Bold and colourful"],
+        "hashtags": ["#ShopLocal", "#OOTD", "#NewArrivals", "#StyleInspo", "#Fashion"],
+    },
+}
+NAME_WORDS = ["Golden", "Little", "Urban", "Blue", "Old Town", "Harbour", "Maple", "Copper", "Laneway", "Sunny"]
+
+CAPTIONS = [
+    "Our {item} is back and better than ever! Come see us at {name}.",
+    "Nothing beats a {item} on a day like today. Tag someone you'd share it with!",
+    "Behind the scenes: how we make our {item} fresh every morning.",
+    "This week only: try the {item} and tell us what you think.",
+    "Thank you for an amazing weekend! Your favourite {item} sold out twice.",
+    "New at {name}: the {item}. Available from today while stocks last.",
+    "Meet the team behind {name}, and the {item} they can't stop recommending.",
+    "Rainy day plans sorted: {item} at {name}.",
+]
+PROMOTIONS = [
+    "Two-for-one {item} every weekday afternoon to bring in the quieter hours.",
+    "Bundle the {item} with a second favourite at 20% off.",
+    "Launch week for the {item}: share a photo to get one free on your next visit.",
+    "Loyalty special: buy five {item}s and the sixth is on us.",
+]
+SUGGESTIONS = [
+    ("Combo deal for {item}", "Customers who buy the {item} often come back the same week. A combo could raise the average order."),
+    ("Feature the {item} on social media", "Posts showing the {item} get more engagement than average; schedule one for the evening peak."),
+    ("Quiet-day discount", "Sales dip early in the week. A small discount on the {item} on Mondays could even them out."),
+]
+
+
+def _hour_effect(hours):
+    """Engagement multiplier for posts published at `hours`, peaking around lunch and the evening."""
+    return 1 + 0.4 * np.exp(-((hours - 12.5) / 1.5) ** 2) + 0.6 * np.exp(-((hours - 19) / 2) ** 2)
+
+
+def _pick_categories(rng, num_categories, size):
+    """One or two distinct category indices for each of `size` rows."""
+    counts = 1 + (rng.random(size) < 0.35)
+    order = np.argsort(rng.random((size, num_categories)), axis=1)  # A random permutation per row
+    return [row[:count] for row, count in zip(order.tolist(), counts.tolist())]
+
+
+def generate_business(seed, index, end_date, years, mean_posts):
+    """Draw business number `index` of run `seed`, with `years` of history up to `end_date`."""
+    rng = np.random.default_rng([seed, index])
+    tz = timezone.get_current_timezone()
+    num_days = round(years * 365)
+    first_day = end_date - timedelta(days=num_days - 1)
+
+    def at(day_offset, hour=12.0):
+        day = first_day + timedelta(days=int(day_offset))
+        minutes = int(hour * 60)
+        return datetime.combine(day, time(minutes // 60, minutes % 60), tzinfo=tz)
+
+    business_type = list(BUSINESS_TYPES)[rng.integers(len(BUSINESS_TYPES))]
+    profile = BUSINESS_TYPES[business_type]
+    name = f"{rng.choice(NAME_WORDS)} {rng.choice(profile['names'])}"[:32]
+    items = rng.choice(profile["items"], size=3, replace=False).tolist()
+    scale = rng.lognormal(0, 0.8)  # Size of the business: its audience and its revenue
+    created_at = at(-int(rng.integers(0, 60)), rng.uniform(8, 18))
+
+    platforms = [platform for platform, share in PLATFORM_SHARE.items() if rng.random() < share] or ["instagram"]
+    handle = f"{name.lower().replace(' ', '-').replace('.', '')}-{index}"
+
+    # Promotions, some still upcoming or open-ended
+    num_promotions = rng.poisson(PROMOTIONS_PER_YEAR * years)
+    starts = np.sort(rng.integers(0, num_days + 30, num_promotions))
+    lengths = rng.integers(3, 15, num_promotions)
+    open_ended = rng.random(num_promotions) < 0.1
+    promotion_categories = _pick_categories(rng, len(PROMOTION_CATEGORIES_OPTIONS), num_promotions)
+    promotions = []
+    for start, length, is_open, categories in zip(starts, lengths, open_ended, promotion_categories):
+        ended = start + length <= num_days
+        promotions.append({
+            "description": PROMOTIONS[rng.integers(len(PROMOTIONS))].format(item=rng.choice(items)),
+            "start_date": first_day + timedelta(days=int(start)),
+            "end_date": None if is_open else first_day + timedelta(days=int(start + length - 1)),
+            "sold_count": int(rng.poisson(60 * scale * length / 7)) if ended else 0,
+            "created_at": at(start - rng.integers(3, 22), rng.uniform(8, 18)),
+            "categories": categories,
+            "first": int(start),
+            "last": int(start + length - 1),  # Open-ended ones wind down like the rest
+        })
+
+    # Posts: published ones spread over the history, scheduled ones recent and due soon
+    num_posts = rng.poisson(mean_posts * rng.lognormal(-0.28, 0.75))
+    statuses = rng.choice(list(STATUS_SHARE), size=num_posts, p=list(STATUS_SHARE.values()))
+    post_platforms = rng.choice(platforms, size=num_posts)
+    days = rng.integers(0, num_days, num_posts)
+    scheduled = statuses == "Scheduled"
+    days[scheduled] = num_days - 1 - rng.integers(0, 14, scheduled.sum())
+    delays = rng.integers(0, 3, num_posts)  # Days between writing and publishing
+    delays[scheduled] += num_days - days[scheduled]  # Due after end_date
+    peak = rng.random(num_posts)
+    hours = np.where(
+        peak < 0.45, rng.normal(12.5, 1.2, num_posts),
+        np.where(peak < 0.9, rng.normal(19, 1.5, num_posts), rng.uniform(7, 23, num_posts)),
+    ).clip(0, 23.9)
+    reach = np.array([PLATFORM_REACH[platform] for platform in post_platforms])
+    reactions = rng.poisson(40 * scale * reach * _hour_effect(hours) * rng.lognormal(-0.125, 0.5, num_posts))
+    reactions[statuses != "Published"] = 0
+    repost_rate = np.where(np.isin(post_platforms, ["twitter", "threads"]), 0.06, 0.01)
+
+    categories = _pick_categories(rng, len(POST_CATEGORIES_OPTIONS), num_posts)
+    item_choices = rng.integers(len(items), size=num_posts)
+    templates = rng.integers(len(CAPTIONS), size=num_posts)
+    num_tags = rng.integers(1, 4, num_posts)
+    tag_order = np.argsort(rng.random((num_posts, len(profile["hashtags"]))), axis=1)
+    created_hours = rng.uniform(8, 22, num_posts)
+    link_ids = rng.integers(1 << 40, size=num_posts)
+    comments = rng.binomial(reactions, 0.08)
+    reposts = rng.binomial(reactions, repost_rate)
+    shares = rng.binomial(reactions, 0.04)
+    post_promotions = np.full(num_posts, -1)
+    for p in reversed(range(len(promotions))):  # The earliest running promotion wins
+        post_promotions[(days >= promotions[p]["first"]) & (days <= promotions[p]["last"])] = p
+    post_promotions[rng.random(num_posts) >= PROMOTED_POST_SHARE] = -1
+
+    posts = []
+    for i, status in enumerate(statuses.tolist()):
+        platform = str(post_platforms[i])
+        tags = " ".join(profile["hashtags"][tag] for tag in tag_order[i, :num_tags[i]])
+        scheduled_at = at(days[i] + delays[i], hours[i])
+        posts.append({
+            "platform": platform,
+            "caption": f"{CAPTIONS[templates[i]].format(item=items[item_choices[i]], name=name)} {tags}",
+            "link": f"https://{platform}.com/p/{link_ids[i]:x}" if status == "Published" else None,
+            "created_at": at(days[i], created_hours[i]),
+            "scheduled_at": scheduled_at,
+            "posted_at": scheduled_at if status == "Published" else None,
+            "status": status,
+            "reactions": int(reactions[i]),
+            "comments": int(comments[i]),
+            "reposts": int(reposts[i]),
+            "shares": int(shares[i]),
+            "promotion": None if post_promotions[i] < 0 else int(post_promotions[i]),
+            "categories": categories[i],
+        })
+
+    num_suggestions = rng.poisson(SUGGESTIONS_PER_BUSINESS)
+    suggestions = []
+    for categories in _pick_categories(rng, len(PROMOTION_CATEGORIES_OPTIONS), num_suggestions):
+        title, description = SUGGESTIONS[rng.integers(len(SUGGESTIONS))]
+        item = rng.choice(items)
+        suggestions.append({
+            "title": title.format(item=item),
+            "description": description.format(item=item),
+            "created_at": at(num_days - 1 - rng.integers(0, 90), rng.uniform(0, 24)),
+            "categories": categories,
+        })
+
+    # Daily revenue: weekly cycle, yearly season, growth trend and noise, lifted while promotions run
+    t = np.arange(num_days)
+    weekday = (first_day.weekday() + t) % 7
+    day_of_year = first_day.timetuple().tm_yday + t
+    revenue = (
+        800 * scale
+        * np.array(WEEKDAY_SALES)[weekday]
+        * np.exp(rng.normal(0.05, 0.1) * t / 365)
+        * (1 + 0.12 * np.sin(2 * math.pi * (day_of_year - 80) / 365.25 + rng.normal(0, 0.5)))
+        * rng.lognormal(-0.01, 0.15, num_days)
+    )
+    for promotion in promotions:
+        lift = rng.uniform(0.05, 0.35)
+        revenue[promotion["first"]:promotion["last"] + 1] *= 1 + lift
+
+    return {
+        "user": {"email": EMAIL_FORMAT.format(seed=seed, index=index), "name": f"{name} Owner", "date_joined": created_at},
+        "business": {
+            "name": name, "category": business_type, "created_at": created_at,
+            "target_customers": str(rng.choice(profile["customers"]))[:32], "vibe": str(rng.choice(profile["vibes"]))[:32],
+        },
+        "social": [
+            {"platform": platform, "link": f"https://{platform}.com/{handle}", "username": handle} for platform in platforms
+        ],
+        "promotions": promotions,
+        "suggestions": suggestions,
+        "posts": posts,
+        "sales_days": [first_day + timedelta(days=int(d)) for d in t],
+        "revenue": [Decimal(f"{value:.2f}") for value in revenue.clip(0, 99999999)],
+    }
+
+
+def _insert(model, attnames, rows, returning=False):
+    """
+    insert_rows with date, datetime and decimal values adapted for the database, each distinct value once.
+    The values are generated with their Python types, so the fields' validating conversion is skipped.
+    """
+    db = connections[DEFAULT_DB_ALIAS]
+    fields = [model._meta.get_field(attname) for attname in attnames]
+    rows = [list(row) for row in rows]
+    for i, field in enumerate(fields):
+        if isinstance(field, (DateField, DecimalField)):  # Also DateTimeField
+            prepared = {}
+            for row in rows:
+                value = row[i]
+                if value not in prepared:
+                    prepared[value] = field.get_db_prep_value(value, db, prepared=True)
+                row[i] = prepared[value]
+    return insert_rows(model, attnames, rows, returning=returning)
+
+
+def _insert_children(model, parent_attname, parent_ids, children, attnames, counts):
+    """Insert each parent's `children` (lists of dicts with `attnames`); return their new ids, per parent."""
+    rows = [
+        (parent_id, *(child[attname] for attname in attnames))
+        for parent_id, parent_children in zip(parent_ids, children) for child in parent_children
+    ]
+    ids = iter(_insert(model, (parent_attname, *attnames), rows, returning=True))
+    counts[model.__name__] += len(rows)
+    return [[next(ids) for _ in parent_children] for parent_children in children]
+
+
+def _insert_categories(model, ids, children, category_ids, counts):
+    """Link each inserted row to its categories, given as indices into `category_ids`."""
+    field = model._meta.get_field("categories")
+    through = field.remote_field.through
+    rows = [
+        (row_id, category_ids[category])
+        for parent_ids, parent_children in zip(ids, children) for row_id, child in zip(parent_ids, parent_children)
+        for category in child["categories"]
+    ]
+    _insert(through, (f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id"), rows)
+    counts[through.__name__] += len(rows)
+
+
+def insert_businesses(businesses, password):
+    """
+    Insert businesses drawn by `generate_business`, with their owners (all with the hashed `password`),
+    social accounts, promotions, suggestions, posts and daily sales, in one transaction.
+    Return the number of rows inserted per model.
+    """
+    counts = Counter()
+    post_categories = list(Category.objects.order_by("key").values_list("id", flat=True))
+    promotion_categories = list(PromotionCategories.objects.order_by("key").values_list("id", flat=True))
+    logo = Business._meta.get_field("logo").get_default()
+    now = timezone.now()
+
+    with transaction.atomic():
+        user_ids = _insert(
+            User, ("password", "is_superuser", "email", "name", "role", "is_active", "is_staff", "date_joined", "requires_2fa"),
+            [(password, False, b["user"]["email"], b["user"]["name"], DEFAULT_ROLE, True, False, b["user"]["date_joined"], False)
+             for b in businesses],
+            returning=True,
+        )
+        business_ids = _insert(
+            Business, ("owner_id", "logo", "name", "category", "target_customers", "vibe", "created_at"),
+            [(user_id, logo, *(b["business"][attname] for attname in ("name", "category", "target_customers", "vibe", "created_at")))
+             for user_id, b in zip(user_ids, businesses)],
+            returning=True,
+        )
+        counts.update(User=len(user_ids), Business=len(business_ids))
+
+        social = [b["social"] for b in businesses]
+        social_ids = _insert_children(SocialMedia, "business_id", business_ids, social, ("platform", "link", "username"), counts)
+        platform_ids = [
+            {account["platform"]: account_id for account, account_id in zip(accounts, ids)}
+            for accounts, ids in zip(social, social_ids)
+        ]
+
+        promotions = [b["promotions"] for b in businesses]
+        promotion_ids = _insert_children(
+            Promotion, "business_id", business_ids, promotions,
+            ("description", "start_date", "end_date", "sold_count", "created_at"), counts,
+        )
+        _insert_categories(Promotion, promotion_ids, promotions, promotion_categories, counts)
+
+        suggestions = [b["suggestions"] for b in businesses]
+        suggestion_ids = _insert_children(
+            PromotionSuggestion, "business_id", business_ids, suggestions, ("title", "description", "created_at"), counts,
+        )
+        _insert_categories(PromotionSuggestion, suggestion_ids, suggestions, promotion_categories, counts)
+
+        posts = []
+        for b, platforms, promotions_of_business in zip(businesses, platform_ids, promotion_ids):
+            for post in b["posts"]:
+                post["platform_id"] = platforms[post["platform"]]
+                post["promotion_id"] = None if post["promotion"] is None else promotions_of_business[post["promotion"]]
+                post["image"] = POST_IMAGE
+            posts.append(b["posts"])
+        post_ids = _insert_children(
+            Post, "business_id", business_ids, posts,
+            ("platform_id", "caption", "image", "link", "created_at", "scheduled_at", "posted_at", "status",
+             "reactions", "comments", "reposts", "shares", "promotion_id"),
+            counts,
+        )
+        _insert_categories(Post, post_ids, posts, post_categories, counts)
+
+        sales_ids = _insert(
+            SalesData, ("business_id", "file", "filename", "file_type", "uploaded_at", "processed", "processed_at"),
+            [(business_id, f"business_sales/{business_id}/synthetic.csv", "synthetic.csv", "csv", now, True, now)
+             for business_id in business_ids],
+            returning=True,
+        )
+        counts["SalesData"] += len(sales_ids)
+        for business_id, sales_id, b in zip(business_ids, sales_ids, businesses):
+            rows = [(business_id, day, revenue, sales_id) for day, revenue in zip(b["sales_days"], b["revenue"])]
+            _insert(SalesDataPoint, ("business_id", "date", "revenue", "source_file_id"), rows)
+            counts["SalesDataPoint"] += len(rows)
+    return counts
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from .models import Business
+from .resolver import BusinessMixin
 from .serializers import BusinessSerializer
 from social.models import SocialMedia
 from social.serializers import SocialMediaSerializer
@@ -14,11 +15,11 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class DashboardView(APIView):
+class DashboardView(BusinessMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        business = Business.objects.filter(owner=request.user).first()
+        business = self.get_business()
 
         if not business:
             # Return consistent structure with null/empty values
@@ -85,7 +86,7 @@ class DashboardView(APIView):
         return Response(response_data)
 
 
-class BusinessDetailView(APIView):
+class BusinessDetailView(BusinessMixin, APIView):
     """
     API view for retrieving and updating business details.
     GET: Retrieve the authenticated user's business.
@@ -95,7 +96,7 @@ class BusinessDetailView(APIView):
 
     def get(self, request):
         """Retrieve business details for the authenticated user."""
-        business = Business.objects.filter(owner=request.user).first()
+        business = self.get_business()
 
         if not business:
             # Return structured empty response
@@ -120,7 +121,7 @@ class BusinessDetailView(APIView):
 
     def _update_business(self, request, partial=False):
         """Helper method for update operations."""
-        business = Business.objects.filter(owner=request.user).first()
+        business = self.get_business()
 
         # Handle file upload
         if 'logo' in request.FILES:
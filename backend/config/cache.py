@@ -0,0 +1,43 @@
+# config/cache.py
+"""
+In-process caches shared by the apps (per-user authentication, throttling,
+similarity indexes, AI results). Lookups count towards the request's
+Server-Timing cache metrics (see config/instrumentation.py).
+"""
+from collections import OrderedDict
+from threading import Lock
+
+from config.instrumentation import record_cache_lookup
+
+
+class LRUCache:
+    """A small thread-safe least-recently-used cache."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            hit = key in self._data
+            if hit:
+                self._data.move_to_end(key)
+                value = self._data[key]
+        record_cache_lookup(hit)
+        return value if hit else default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -43,4 +43,11 @@ PROMOTION_STATUS_OPTIONS = [
     ('upcoming', 'Upcoming'),
     ('ongoing', 'Ongoing'),
     ('ended', 'Ended'),
-]
\ No newline at end of file
+]
+# AI Image Analysis Job Status (Used in ai/models.py)
+AI_JOB_STATUS_OPTIONS = [
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('completed', 'Completed'),
+    ('failed', 'Failed'),
+]
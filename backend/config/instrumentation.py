@@ -0,0 +1,184 @@
+# config/instrumentation.py
+"""
+Opt-in per-request timings: database queries, cache lookups, serializer time
+and view time, sent back in a `Server-Timing` header and logged as one JSON line.
+
+Set SERVER_TIMING_SAMPLE_RATE to the share of requests to instrument (e.g.
+0.01); at 0, the default, the middleware removes itself at startup. Sampled
+requests carry a RequestTimings in a context variable, which follows the request
+into sync_to_async threads. On unsampled requests the hooks below (a database
+execute wrapper, the caches' lookups and DRF's `Serializer.data`) only read
+that variable, well under a microsecond per query or lookup.
+"""
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """What one sampled request spent its time on. Durations are in seconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.queries = 0
+        self.query_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def header(self, total, view):
+        metrics = [
+            f'db;dur={self.query_time * 1000:.1f};desc="{self.queries} queries"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f"serialize;dur={self.serializer_time * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ]
+        if view is not None:
+            metrics.insert(-1, f"view;dur={view * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+def record_cache_lookup(hit):
+    """Count a cache lookup of the current request, if it is sampled."""
+    timings = _current.get()
+    if timings is not None:
+        if hit:
+            timings.cache_hits += 1
+        else:
+            timings.cache_misses += 1
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.query_time += time.perf_counter() - started
+
+
+def _watch_queries(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _timed_data(data):
+    """Wrap a serializer's `data` property to add the outermost serialization to the request's timings."""
+
+    def timed(serializer):
+        timings = _current.get()
+        if timings is None or timings.serializing:  # Nested serializers are part of their parent's time
+            return data.fget(serializer)
+        timings.serializing = True
+        started = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            timings.serializing = False
+            timings.serializer_time += time.perf_counter() - started
+
+    return property(timed)
+
+
+_serializers_instrumented = False
+
+
+def _instrument_serializers():
+    global _serializers_instrumented
+    if _serializers_instrumented:
+        return
+    from rest_framework.serializers import ListSerializer, Serializer
+
+    for serializer_class in (Serializer, ListSerializer):
+        serializer_class.data = _timed_data(serializer_class.data)
+    _serializers_instrumented = True
+
+
+class ServerTimingMiddleware:
+    """Instrument a SERVER_TIMING_SAMPLE_RATE share of requests; see the module docstring."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.SERVER_TIMING_SAMPLE_RATE <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.SERVER_TIMING_SAMPLE_RATE
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_watch_queries, dispatch_uid="server_timing_queries")
+        _instrument_serializers()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        timings, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        timings, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    def _start(self):
+        # Connections opened before the middleware was loaded were not seen by connection_created
+        for connection in connections.all(initialized_only=True):
+            _watch_queries(connection)
+        timings = RequestTimings()
+        return timings, _current.set(timings)
+
+    def _finish(self, request, response, timings):
+        ended = time.perf_counter()
+        total = ended - timings.started
+        # Until the response is back here, including rendering; a streamed body is not included
+        view = ended - timings.view_started if timings.view_started is not None else None
+        response["Server-Timing"] = timings.header(total, view)
+        match = request.resolver_match
+        logger.info("server-timing %s", json.dumps({
+            "method": request.method,
+            "route": match.route if match else None,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "view_ms": round(view * 1000, 2) if view is not None else None,
+            "db_queries": timings.queries,
+            "db_ms": round(timings.query_time * 1000, 2),
+            "cache_hits": timings.cache_hits,
+            "cache_misses": timings.cache_misses,
+            "serializer_ms": round(timings.serializer_time * 1000, 2),
+        }))
+        return response
@@ -35,6 +35,10 @@ if not SECRET_KEY:
 TWOFA_ENCRYPTION_KEY = os.getenv("TWOFA_ENCRYPTION_KEY")
 if not TWOFA_ENCRYPTION_KEY:
     raise ValueError("TWOFA_ENCRYPTION_KEY environment variable is not set.")
+# Keys 2FA secrets may still be encrypted with after a rotation, comma-separated (see users/crypto.py)
+TWOFA_PREVIOUS_ENCRYPTION_KEYS = [
+    key.strip() for key in os.getenv("TWOFA_PREVIOUS_ENCRYPTION_KEYS", "").split(",") if key.strip()
+]
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv("DEBUG", "False") == "True"
@@ -48,6 +52,7 @@ INSTALLED_APPS = [
     "drf_spectacular",
     "rest_framework",
     'rest_framework_simplejwt', # JWT Authentication
+    'rest_framework_simplejwt.token_blacklist', # Logged-out and rotated refresh tokens
     "corsheaders",
     "django.contrib.admin",
     "django.contrib.auth",
@@ -81,6 +86,19 @@ SIMPLE_JWT = {
     "AUTH_COOKIE_SAMESITE": "None",
 }
 
+# Seconds between rebuilds of each process's blacklisted refresh token filter (see users/tokens.py)
+TOKEN_BLACKLIST_FILTER_TTL = int(os.getenv("TOKEN_BLACKLIST_FILTER_TTL", "60"))
+
+# Seconds an authenticated user is reused from the in-process cache (see users/authentication.py); 0 disables it
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+
+# Failed logins allowed per email and per client IP within the window (see users/throttling.py)
+LOGIN_THROTTLE_WINDOW = int(os.getenv("LOGIN_THROTTLE_WINDOW", "900"))  # Seconds
+LOGIN_THROTTLE_BUCKETS = 15  # Ring buffer slots the window is counted in
+LOGIN_THROTTLE_EMAIL_LIMIT = int(os.getenv("LOGIN_THROTTLE_EMAIL_LIMIT", "10"))
+LOGIN_THROTTLE_IP_LIMIT = int(os.getenv("LOGIN_THROTTLE_IP_LIMIT", "50"))
+
 SESSION_COOKIE_SECURE = SIMPLE_JWT["AUTH_COOKIE_SECURE"]
 
 # CSRF Settings
@@ -141,9 +159,57 @@ SPECTACULAR_SETTINGS = {
     ],
 }
 
+# "wsgi" (gunicorn sync workers) or "asgi" (uvicorn workers); selects the sync or async variant of some views
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+
+# Share of requests (0-1) instrumented by config.instrumentation.ServerTimingMiddleware; 0 disables it
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", "0"))
+
+# AI Settings
+# Backend used for image analysis and caption generation: "mock" or "http" (see ai/backends.py)
+AI_BACKEND = os.getenv("AI_BACKEND", "mock")
+AI_BACKEND_URL = os.getenv("AI_BACKEND_URL", "http://127.0.0.1:8765")
+AI_BACKEND_API_KEY = os.getenv("AI_BACKEND_API_KEY", "")
+AI_BACKEND_TIMEOUT = float(os.getenv("AI_BACKEND_TIMEOUT", "30"))  # Seconds per request
+AI_BACKEND_MAX_CONNECTIONS = int(os.getenv("AI_BACKEND_MAX_CONNECTIONS", "20"))  # Pooled keep-alive connections per process
+AI_BACKEND_RETRIES = int(os.getenv("AI_BACKEND_RETRIES", "2"))
+AI_VISION_MODEL = os.getenv("AI_VISION_MODEL", "mock-vision-v1")
+AI_CAPTION_MODEL = os.getenv("AI_CAPTION_MODEL", "mock-caption-v1")
+# "thread": analysis jobs run on an in-process pool; "worker": run `manage.py run_ai_worker`
+AI_JOB_MODE = os.getenv("AI_JOB_MODE", "thread")
+AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "4"))
+AI_JOB_STALE_AFTER = int(os.getenv("AI_JOB_STALE_AFTER", "300"))  # Seconds running before a job counts as abandoned
+AI_ANALYSIS_CACHE_SIZE = int(os.getenv("AI_ANALYSIS_CACHE_SIZE", "1024"))  # In-process LRU entries
+AI_SINGLE_FLIGHT_TIMEOUT = int(os.getenv("AI_SINGLE_FLIGHT_TIMEOUT", "90"))  # Max seconds to wait on an identical in-flight call
+AI_SINGLE_FLIGHT_CACHE = os.getenv("AI_SINGLE_FLIGHT_CACHE", "default")  # Cache for in-flight locks; "shared" coalesces across processes
+AI_BATCH_MAX_ITEMS = int(os.getenv("AI_BATCH_MAX_ITEMS", "20"))  # Images or item lists per batch caption request
+AI_BACKEND_BATCH_SIZE = int(os.getenv("AI_BACKEND_BATCH_SIZE", "8"))  # Caption requests sent in one backend call
+
+# Cache Settings
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "default",
+    },
+    # Generated captions (see ai/cache.py): least-recently-used entries are culled past MAX_ENTRIES
+    "ai": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "ai",
+        "TIMEOUT": int(os.getenv("AI_CAPTION_CACHE_TTL", "3600")),
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("AI_CAPTION_CACHE_MAX_ENTRIES", "1000"))},
+    },
+    # Shared by all processes (locks, short-lived results). Table created by `manage.py createcachetable`
+    "shared": {
+        "BACKEND": os.getenv("SHARED_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.getenv("SHARED_CACHE_LOCATION", "shared_cache"),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
 # Middleware Settings
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware", # Add CORS middleware near the top
+    "config.instrumentation.ServerTimingMiddleware", # Opt-in, see SERVER_TIMING_SAMPLE_RATE
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -264,5 +330,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        # httpx logs every request at INFO; keep AI backend calls out of the logs unless they fail
+        "httpx": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
\ No newline at end of file
@@ -28,10 +28,20 @@ python manage.py makemigrations --noinput
 echo "Applying database migrations..."
 python manage.py migrate --noinput
 
+echo "Creating cache table..."
+python manage.py createcachetable
+
 echo "Flushing database..."
 python manage.py flush --noinput
 
 echo "Loading fixture data..."
 python manage.py loaddata users/fixtures/mock_users.json businesses/fixtures/mock_businesses.json social/fixtures/mock_social.json posts/fixtures/mock_posts.json promotions/fixtures/mock_promotions.json promotions/fixtures/mock_suggestions.json
 
+echo "Building caption indexes..."
+python manage.py build_minhash_index
+python manage.py build_caption_index
+
+echo "Building hashtag index..."
+python manage.py build_hashtag_index --full
+
 exec "$@"
@@ -0,0 +1,115 @@
+# posts/exports.py
+"""
+Streaming NDJSON and CSV exports.
+
+Rows are read with `iterator(chunk_size=...)`, which uses a server-side cursor
+on PostgreSQL, and encoded as they arrive. Only one chunk of rows and one
+output buffer are held at a time, so memory stays flat however many rows are
+exported, and the first bytes are sent as soon as the first chunk is read.
+
+Under ASGI, Django would collect a sync iterator into a list before sending
+anything, so there each buffered chunk is pulled through `sync_to_async`
+instead. All pulls run on the same thread, which keeps the cursor's connection.
+"""
+import csv
+from datetime import date
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .models import Post
+
+EXPORT_CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched from the cursor at a time
+EXPORT_BUFFER_SIZE = 64 * 1024  # Characters of output collected before each write to the client
+
+POST_EXPORT_FIELDS = (
+    "id", "platform", "status", "caption", "categories", "link", "created_at", "scheduled_at", "posted_at",
+    "reactions", "comments", "reposts", "shares", "promotion_id",
+)
+
+
+class _Echo:
+    """File-like target letting csv.writer return each encoded line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _chunks(rows, size=EXPORT_CHUNK_SIZE):
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return "; ".join(value)
+    if isinstance(value, date):  # Also datetimes
+        return value.isoformat()
+    return value
+
+
+def _encode(rows, fields, export_format):
+    """Yield lines of `rows` (dicts) in `export_format`; CSV starts with a header line."""
+    if export_format == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([_csv_value(row[field]) for field in fields])
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            yield encoder.encode({field: row[field] for field in fields}) + "\n"
+
+
+def _buffered(lines):
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+async def _pulled(chunks):
+    """Async iterator over a sync one, producing each item in the sync thread."""
+    pull = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await pull(chunks, None)) is not None:
+        yield chunk
+
+
+def streaming_export(rows, fields, export_format, name):
+    """StreamingHttpResponse downloading `rows` as `<name>-<date>.<export_format>`."""
+    chunks = _buffered(_encode(rows, fields, export_format))
+    if settings.SERVER_MODE == "asgi":
+        chunks = _pulled(chunks)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response["Content-Disposition"] = f'attachment; filename="{name}-{date.today().isoformat()}.{export_format}"'
+    response["X-Accel-Buffering"] = "no"  # Let proxies pass the rows on as they are produced
+    return response
+
+
+def export_post_rows(business_id, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the business's posts as dicts of POST_EXPORT_FIELDS, oldest first, with engagement and categories."""
+    posts = (
+        Post.objects.filter(business_id=business_id).order_by("id")
+        .values("id", "status", "caption", "link", "created_at", "scheduled_at", "posted_at",
+                "reactions", "comments", "reposts", "shares", "promotion_id", "platform__platform")
+    )
+    CategoryLink = Post.categories.through
+    for chunk in _chunks(posts.iterator(chunk_size=chunk_size), chunk_size):
+        categories = {}
+        for post_id, label in CategoryLink.objects.filter(
+            post_id__in=[row["id"] for row in chunk]
+        ).values_list("post_id", "category__label"):
+            categories.setdefault(post_id, []).append(label)
+        for row in chunk:
+            row["platform"] = row.pop("platform__platform")
+            row["categories"] = categories.get(row["id"], [])
+            yield row
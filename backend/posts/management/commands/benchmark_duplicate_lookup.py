@@ -0,0 +1,94 @@
+# posts/management/commands/benchmark_duplicate_lookup.py
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from businesses.models import Business
+from posts.minhash import caption_signature, find_duplicate_posts, lsh_buckets, sign_posts
+from posts.models import Post, PostLSHBucket
+from social.models import SocialMedia
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the near-duplicate caption lookup as a business's post history grows, "
+        "compared with scanning every stored signature. Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                            help="Post history sizes to measure, in increasing order.")
+        parser.add_argument("--lookups", type=int, default=200,
+                            help="Lookups per size; half are edited copies of existing captions.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        vocabulary = [f"{rng.choice(['fresh', 'hot', 'new', 'daily', 'house'])}{i}" for i in range(3000)]
+
+        def random_caption():
+            return " ".join(rng.choices(vocabulary, k=rng.randint(15, 40)))
+
+        def edited(caption):
+            words = caption.split()
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            return " ".join(words)
+
+        with transaction.atomic():
+            owner = User.objects.create(email="duplicate-benchmark@example.com", name="Benchmark")
+            business = Business.objects.create(name="Benchmark", owner=owner)
+            platform = SocialMedia.objects.create(
+                business=business, platform="instagram", link="https://example.com", username="benchmark"
+            )
+            captions = []
+
+            for size in sorted(options["sizes"]):
+                self._grow(business, platform, captions, size, random_caption)
+
+                queries = [edited(rng.choice(captions)) for _ in range(options["lookups"] // 2)]
+                queries += [random_caption() for _ in range(options["lookups"] - len(queries))]
+                latencies, found = [], 0
+                for index, caption in enumerate(queries):
+                    started = time.perf_counter()
+                    duplicates = find_duplicate_posts(business.id, platform.id, caption)
+                    latencies.append(time.perf_counter() - started)
+                    found += bool(duplicates) and index < options["lookups"] // 2
+                latencies = np.array(latencies) * 1000
+
+                scan = self._time_full_scan(business, queries[:10])
+                self.stdout.write(
+                    f"posts={size:>7} | lsh p50 {np.percentile(latencies, 50):6.2f}ms "
+                    f"p99 {np.percentile(latencies, 99):6.2f}ms | full scan {scan:8.2f}ms | "
+                    f"edited copies found {found}/{options['lookups'] // 2}"
+                )
+
+            transaction.set_rollback(True)
+
+    def _grow(self, business, platform, captions, size, random_caption, batch_size=2000):
+        """Add posts with random captions until the business has `size` posts."""
+        while len(captions) < size:
+            batch = [random_caption() for _ in range(min(batch_size, size - len(captions)))]
+            posts = [
+                Post(business=business, platform=platform, caption=caption, image="benchmark.jpg", status="Published")
+                for caption in batch
+            ]
+            sign_posts(posts)
+            Post.objects.bulk_create(posts)
+            PostLSHBucket.objects.bulk_create(lsh_buckets(posts), batch_size=5000)
+            captions.extend(batch)
+
+    def _time_full_scan(self, business, queries):
+        """Mean milliseconds to compare a caption with every stored signature of the business."""
+        started = time.perf_counter()
+        for caption in queries:
+            signature = caption_signature(caption)
+            signatures = np.frombuffer(
+                b"".join(bytes(m) for m in Post.objects.filter(business=business).values_list("minhash", flat=True)),
+                dtype=np.uint32,
+            ).reshape(-1, len(signature))
+            (signatures == signature).mean(axis=1)
+        return (time.perf_counter() - started) * 1000 / len(queries)
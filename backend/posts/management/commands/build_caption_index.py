@@ -0,0 +1,26 @@
+# posts/management/commands/build_caption_index.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from businesses.models import Business
+from posts.similarity import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the caption similarity index of every business (or of the given ones) from its posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--business", type=int, action="append", dest="business_ids",
+                            help="Business id to rebuild. Repeat for several; defaults to all businesses.")
+
+    def handle(self, *args, **options):
+        business_ids = options["business_ids"] or list(Business.objects.order_by("id").values_list("id", flat=True))
+
+        started = time.perf_counter()
+        num_posts = sum(rebuild_index(business_id) for business_id in business_ids)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {num_posts} captions of {len(business_ids)} businesses in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,37 @@
+# posts/management/commands/build_minhash_index.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.minhash import index_post_signatures
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Compute the MinHash signature and LSH buckets of posts, for near-duplicate caption checks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--business", type=int, action="append", dest="business_ids",
+                            help="Only process this business id (repeatable). Defaults to all businesses.")
+        parser.add_argument("--missing-only", action="store_true",
+                            help="Only process posts that have no signature yet.")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Number of posts signed and written per batch.")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by("id").only("id", "business_id", "caption")
+        if options["business_ids"]:
+            posts = posts.filter(business_id__in=options["business_ids"])
+        if options["missing_only"]:
+            posts = posts.filter(minhash__isnull=True)
+
+        started = time.perf_counter()
+        num_posts = 0
+        last_id = 0
+        while batch := list(posts.filter(id__gt=last_id)[:options["batch_size"]]):
+            index_post_signatures(batch)
+            num_posts += len(batch)
+            last_id = batch[-1].id
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Indexed {num_posts} posts in {elapsed:.1f}s"))
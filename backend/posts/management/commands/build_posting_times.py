@@ -0,0 +1,29 @@
+# posts/management/commands/build_posting_times.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from businesses.models import Business
+from posts.posting_times import build_posting_profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the best-time-to-post profile of every business (or of the given ones) from its published posts. "
+        "Profiles are also rebuilt when read after a day; run this periodically to keep requests from doing it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--business", type=int, action="append", dest="business_ids",
+                            help="Business id to rebuild. Repeat for several; defaults to all businesses.")
+
+    def handle(self, *args, **options):
+        business_ids = options["business_ids"] or list(Business.objects.order_by("id").values_list("id", flat=True))
+
+        started = time.perf_counter()
+        num_posts = sum(build_posting_profile(business_id).num_posts for business_id in business_ids)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Profiled {num_posts} published posts of {len(business_ids)} businesses in {elapsed:.1f}s"
+        ))
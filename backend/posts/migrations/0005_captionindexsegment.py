@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0003_alter_business_logo'),
+        ('posts', '0004_post_promotion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaptionIndexSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_ids', models.BinaryField()),
+                ('counts', models.BinaryField()),
+                ('is_base', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='caption_index_segments', to='businesses.business')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
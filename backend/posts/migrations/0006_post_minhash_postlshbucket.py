@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0003_alter_business_logo'),
+        ('posts', '0005_captionindexsegment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='minhash',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PostLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField()),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='businesses.business')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='posts.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['business', 'key'], name='post_lsh_business_key_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0003_alter_business_logo'),
+        ('posts', '0006_post_minhash_postlshbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostingTimeProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platforms', models.JSONField(default=list)),
+                ('scores', models.BinaryField()),
+                ('post_counts', models.BinaryField()),
+                ('num_posts', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='posting_time_profile', to='businesses.business')),
+            ],
+        ),
+    ]
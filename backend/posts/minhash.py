@@ -0,0 +1,116 @@
+# posts/minhash.py
+"""
+Near-duplicate caption detection with MinHash and locality-sensitive hashing.
+
+Every post stores a MinHash signature of its caption's character shingles.
+The signature is cut into bands, and each band is hashed into a bucket row
+(PostLSHBucket). Captions that share a bucket are candidates, and their
+similarity is estimated from the signatures. A lookup reads only the posts in
+the caption's own buckets, so its cost does not grow with the post history.
+
+With 16 bands of 8 rows, a caption pair with a shingle Jaccard similarity of
+0.9 becomes a candidate with a probability above 99.9%, 0.8 with about 95%
+and 0.5 with about 6%.
+"""
+import hashlib
+import re
+import zlib
+
+import numpy as np
+from django.db import transaction
+
+from .models import Post, PostLSHBucket
+
+NUM_PERMUTATIONS = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 5  # Characters per shingle
+DUPLICATE_THRESHOLD = 0.8  # Estimated Jaccard similarity from which captions count as duplicates
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: stored signatures are only comparable when computed with the same permutations
+_random = np.random.RandomState(20250401)
+_A = _random.randint(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _random.randint(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def _shingles(caption):
+    text = re.sub(r"\s+", " ", caption.casefold()).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def caption_signature(caption):
+    """Return the MinHash signature (uint32 array) of a caption, or None for an empty caption."""
+    shingles = _shingles(caption or "")
+    if not shingles:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # a * x + b stays below 2**64 because a, b and x are all below 2**32
+    permuted = (hashes[:, None] * _A + _B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature):
+    """Hash every band of a signature into a signed 64-bit bucket key."""
+    bands = signature.reshape(BANDS, ROWS_PER_BAND)
+    return [
+        int.from_bytes(hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest(), "big", signed=True)
+        for band, rows in enumerate(bands)
+    ]
+
+
+def sign_posts(posts):
+    """Set the `minhash` of posts from their captions, without saving them."""
+    for post in posts:
+        signature = caption_signature(post.caption)
+        post.minhash = None if signature is None else signature.tobytes()
+
+
+def lsh_buckets(posts):
+    """Build (unsaved) bucket rows for signed, saved posts."""
+    return [
+        PostLSHBucket(post_id=post.id, business_id=post.business_id, key=key)
+        for post in posts if post.minhash is not None
+        for key in band_keys(np.frombuffer(post.minhash, dtype=np.uint32))
+    ]
+
+
+def index_post_signatures(posts):
+    """Store the signature and LSH buckets of saved posts, replacing any previous ones."""
+    posts = list(posts)
+    sign_posts(posts)
+    with transaction.atomic():
+        Post.objects.bulk_update(posts, ["minhash"], batch_size=1000)
+        PostLSHBucket.objects.filter(post_id__in=[post.id for post in posts]).delete()
+        PostLSHBucket.objects.bulk_create(lsh_buckets(posts), batch_size=5000)
+
+
+def find_duplicate_posts(business_id, platform_id, caption, exclude=(), threshold=DUPLICATE_THRESHOLD):
+    """
+    Return the business's posts on a platform whose captions nearly repeat `caption`,
+    as {"post_id", "similarity"} dicts, most similar first. Failed posts are ignored.
+    """
+    signature = caption_signature(caption)
+    if signature is None:
+        return []
+
+    candidates = (
+        Post.objects
+        .filter(
+            id__in=PostLSHBucket.objects.filter(business_id=business_id, key__in=band_keys(signature)).values("post_id"),
+            platform_id=platform_id,
+        )
+        .exclude(status="Failed")
+        .exclude(id__in=exclude)
+        .values_list("id", "minhash")
+    )
+
+    duplicates = []
+    for post_id, minhash in candidates:
+        similarity = float(np.mean(np.frombuffer(bytes(minhash), dtype=np.uint32) == signature))
+        if similarity >= threshold:
+            duplicates.append({"post_id": post_id, "similarity": round(similarity, 3)})
+    return sorted(duplicates, key=lambda duplicate: -duplicate["similarity"])
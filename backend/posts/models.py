@@ -44,9 +44,57 @@ class Post(models.Model):
         null=True,
         blank=True
     )
+
+    # MinHash signature of the caption, used to find near-identical posts (see posts/minhash.py)
+    minhash = models.BinaryField(blank=True, null=True, editable=False)
     
     def __str__(self):
         return f"Post: {self.categories} - {self.caption}"
 
     class Meta:
         ordering = ['-created_at']
+
+class PostLSHBucket(models.Model):
+    """
+    One locality-sensitive hashing bucket of a post's caption signature.
+    Posts sharing any bucket with a caption are its near-duplicate candidates.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="lsh_buckets")
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="+")
+    key = models.BigIntegerField()  # Hash of one band of the signature, including the band number
+
+    class Meta:
+        indexes = [models.Index(fields=["business", "key"], name="post_lsh_business_key_idx")]
+
+class CaptionIndexSegment(models.Model):
+    """
+    Part of a business's caption similarity index (see posts/similarity.py).
+
+    Holds the hashed term counts of some posts' captions as a sparse matrix, one
+    row per entry of `post_ids`. Segments are append-only: a later segment
+    overrides earlier rows of the same post, and an empty row marks a deletion.
+    A base segment holds every live post and replaces all segments before it.
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="caption_index_segments")
+    post_ids = models.BinaryField()  # int64 array, one per matrix row
+    counts = models.BinaryField()  # scipy.sparse CSR matrix in .npz format
+    is_base = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+class PostingTimeProfile(models.Model):
+    """
+    Precomputed engagement of a business's posts by platform, weekday and hour (see posts/posting_times.py).
+
+    Both matrices have shape (len(platforms) + 1, 7, 24): one slice per platform in
+    `platforms` order plus a last slice for all platforms together, indexed by UTC
+    weekday (Monday first) and UTC hour.
+    """
+    business = models.OneToOneField(Business, on_delete=models.CASCADE, related_name="posting_time_profile")
+    platforms = models.JSONField(default=list)  # Platform keys, one per leading matrix slice
+    scores = models.BinaryField()  # float32, smoothed mean engagement per post in each slot
+    post_counts = models.BinaryField()  # int32, published posts in each slot
+    num_posts = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
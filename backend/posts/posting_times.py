@@ -0,0 +1,166 @@
+# posts/posting_times.py
+"""
+Best time to post, learned from the engagement of a business's published posts.
+
+Published posts are aggregated in the database into total engagement and post
+counts per platform, UTC weekday and UTC hour. The sparse slot means are then
+smoothed in numpy:
+- each slot is shrunk towards the mean of its hour across the week, which is
+  itself shrunk towards the platform mean, so a slot backed by one lucky post
+  does not dominate,
+- neighbouring hours are blended, wrapping around the end of the week.
+The result is stored per business in PostingTimeProfile. A recommendation only
+reads that small matrix and the posts already scheduled in the coming week.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+
+from .models import Post, PostingTimeProfile
+
+COMMENT_WEIGHT = 2  # A comment counts as much engagement as this many reactions
+SHARE_WEIGHT = 3  # A share or repost counts as much engagement as this many reactions
+PRIOR_POSTS = 2  # Weight, in posts, of the broader mean a slot is shrunk towards
+HOUR_KERNEL = (0.25, 0.5, 0.25)  # Blend of the previous, current and next hour
+PROFILE_MAX_AGE = timedelta(hours=24)  # Profiles older than this are rebuilt when read
+MIN_GAP_HOURS = 3  # Recommended slots are at least this far apart
+HORIZON_HOURS = 7 * 24  # Recommendations cover the coming week
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def _engagement():
+    return F("reactions") + COMMENT_WEIGHT * F("comments") + SHARE_WEIGHT * (F("shares") + F("reposts"))
+
+
+def _shrink(totals, counts, prior):
+    return (totals + PRIOR_POSTS * prior) / (counts + PRIOR_POSTS)
+
+
+def smooth_scores(totals, counts):
+    """Turn engagement totals and post counts of shape (n, 7, 24) into smoothed mean engagement."""
+    overall = totals.sum(axis=(1, 2)) / np.maximum(counts.sum(axis=(1, 2)), 1)
+    by_hour = _shrink(totals.sum(axis=1), counts.sum(axis=1), overall[:, None])
+    by_slot = _shrink(totals, counts, by_hour[:, None, :]).reshape(len(totals), -1)
+
+    previous, current, following = HOUR_KERNEL
+    smoothed = (
+        previous * np.roll(by_slot, 1, axis=1) + current * by_slot + following * np.roll(by_slot, -1, axis=1)
+    )
+    return smoothed.reshape(totals.shape).astype(np.float32)
+
+
+def build_posting_profile(business_id):
+    """Aggregate the business's published posts into its PostingTimeProfile."""
+    rows = (
+        Post.objects
+        .filter(business_id=business_id, status="Published", posted_at__isnull=False)
+        .values(
+            key=F("platform__platform"),
+            weekday=ExtractIsoWeekDay("posted_at", tzinfo=dt_timezone.utc),
+            hour=ExtractHour("posted_at", tzinfo=dt_timezone.utc),
+        )
+        .annotate(total=Sum(_engagement()), posts=Count("id"))
+        .order_by()
+    )
+    rows = list(rows)
+    platforms = sorted({row["key"] for row in rows})
+
+    totals = np.zeros((len(platforms) + 1, 7, 24))
+    counts = np.zeros((len(platforms) + 1, 7, 24), dtype=np.int32)
+    if rows:
+        index = (
+            np.array([platforms.index(row["key"]) for row in rows]),
+            np.array([row["weekday"] - 1 for row in rows]),
+            np.array([row["hour"] for row in rows]),
+        )
+        np.add.at(totals, index, [row["total"] for row in rows])
+        np.add.at(counts, index, [row["posts"] for row in rows])
+        totals[-1], counts[-1] = totals[:-1].sum(axis=0), counts[:-1].sum(axis=0)
+
+    profile, _ = PostingTimeProfile.objects.update_or_create(
+        business_id=business_id,
+        defaults={
+            "platforms": platforms,
+            "scores": smooth_scores(totals, counts).tobytes(),
+            "post_counts": counts.tobytes(),
+            "num_posts": int(counts[-1].sum()),
+        },
+    )
+    return profile
+
+
+def get_posting_profile(business_id):
+    """Return the stored profile of a business, building it when missing or stale."""
+    profile = PostingTimeProfile.objects.filter(business_id=business_id).first()
+    if profile is None or profile.updated_at < timezone.now() - PROFILE_MAX_AGE:
+        profile = build_posting_profile(business_id)
+    return profile
+
+
+def recommend_posting_times(profile, platform_key, tz, limit=3, taken=(), now=None):
+    """
+    Return up to `limit` upcoming hours to post on a platform, best first.
+
+    Hours are scored from the platform's own history, or from all platforms while
+    it has none. Hours in `taken` (aware datetimes) and hours within MIN_GAP_HOURS
+    of a better recommendation are skipped. Returns [] without any history.
+    """
+    if not profile.num_posts:
+        return []
+    shape = (len(profile.platforms) + 1, 7, 24)
+    scores = np.frombuffer(bytes(profile.scores), dtype=np.float32).reshape(shape)
+    counts = np.frombuffer(bytes(profile.post_counts), dtype=np.int32).reshape(shape)
+    slice_index = profile.platforms.index(platform_key) if platform_key in profile.platforms else -1
+
+    now = now or timezone.now()
+    start = now.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    # Position of each upcoming hour in the (weekday, hour) grid, in UTC
+    first = start.weekday() * 24 + start.hour
+    slots = (first + np.arange(HORIZON_HOURS)) % HORIZON_HOURS
+    upcoming = scores[slice_index].ravel()[slots].astype(float)
+
+    for scheduled in taken:
+        offset = int((scheduled - start).total_seconds() // 3600)
+        if 0 <= offset < HORIZON_HOURS:
+            upcoming[offset] = -np.inf
+
+    chosen = []
+    for offset in np.argsort(-upcoming, kind="stable"):
+        if len(chosen) == limit or upcoming[offset] == -np.inf:
+            break
+        if all(abs(offset - other) >= MIN_GAP_HOURS for other in chosen):
+            chosen.append(offset)
+
+    recommendations = []
+    for offset in chosen:
+        at = (start + timedelta(hours=int(offset))).astimezone(tz)
+        slot = slots[offset]
+        recommendations.append({
+            "scheduled_at": at.isoformat(),
+            "weekday": WEEKDAYS[at.weekday()],
+            "hour": at.hour,
+            "expected_engagement": round(float(upcoming[offset]), 2),
+            "based_on_posts": int(counts[slice_index].ravel()[slot]),
+        })
+    return recommendations
+
+
+def suggest_posting_times(business_id, platform_keys, tz, limit=3):
+    """Recommend upcoming posting hours for each of the business's platforms, keyed by platform."""
+    profile = get_posting_profile(business_id)
+    now = timezone.now()
+    taken = {}
+    for key, scheduled_at in Post.objects.filter(
+        business_id=business_id, status="Scheduled",
+        scheduled_at__gte=now, scheduled_at__lt=now + timedelta(hours=HORIZON_HOURS + 1),
+    ).values_list("platform__platform", "scheduled_at"):
+        taken.setdefault(key, []).append(scheduled_at)
+
+    return {
+        key: recommend_posting_times(profile, key, tz, limit=limit, taken=taken.get(key, ()), now=now)
+        for key in platform_keys
+    }
@@ -1,6 +1,9 @@
-from django.db.models.signals import post_migrate
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save
 from django.dispatch import receiver
-from posts.models import Category
+from posts.models import Category, Post
+from posts.similarity import index_posts, remove_posts
+from posts.minhash import index_post_signatures
 from config.constants import POST_CATEGORIES_OPTIONS
 
 @receiver(post_migrate)
@@ -8,3 +11,26 @@ def populate_categories(sender, **kwargs):
     if sender.name == "posts":
         for option in POST_CATEGORIES_OPTIONS:
             Category.objects.get_or_create(key=option["key"], label=option["label"])
+
+@receiver(post_init, sender=Post)
+def remember_indexed_caption(sender, instance, **kwargs):
+    # Deferred captions are left out so loading them is not forced here
+    instance._indexed_caption = instance.__dict__.get("caption")
+
+@receiver(post_save, sender=Post)
+def index_post_caption(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Keep the caption indexes in sync; metric and status updates do not touch them."""
+    # Fixtures (loaddata) are indexed afterwards in bulk by build_minhash_index and build_caption_index
+    if raw or (update_fields is not None and "caption" not in update_fields):
+        return
+    if not created and instance.caption == instance._indexed_caption:
+        return
+    instance._indexed_caption = instance.caption
+    index_post_signatures([instance])
+    business_id, post = instance.business_id, (instance.id, instance.caption)
+    transaction.on_commit(lambda: index_posts(business_id, [post]), robust=True)
+
+@receiver(post_delete, sender=Post)
+def unindex_post_caption(sender, instance, **kwargs):
+    business_id, post_id = instance.business_id, instance.id
+    transaction.on_commit(lambda: remove_posts(business_id, [post_id]), robust=True)
@@ -0,0 +1,198 @@
+# posts/similarity.py
+"""
+TF-IDF similarity search over each business's post captions.
+
+Captions are turned into term counts by a HashingVectorizer, which needs no
+fitted vocabulary, so posts are added without rebuilding the index. The counts
+are persisted as append-only sparse segments (CaptionIndexSegment) that are
+compacted into a single base segment once too many accumulate.
+
+Each process keeps the TF-IDF matrix of recently queried businesses in memory
+and only reads the segments written since it last looked. The matrix is kept
+column-major, so a query only reads the postings of the terms it contains.
+"""
+import io
+from itertools import islice
+
+import numpy as np
+import scipy.sparse as sp
+from django.db import transaction
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+from config.cache import LRUCache
+from businesses.models import Business
+from .models import CaptionIndexSegment, Post
+
+N_FEATURES = 2 ** 20  # Hashed term space; collisions are negligible at this size
+MAX_SEGMENTS = 32  # Segments kept before they are compacted into a new base segment
+INDEX_CACHE_SIZE = 64  # Businesses whose index is kept in memory per process
+NEAR_DUPLICATE_THRESHOLD = 0.8  # Cosine similarity from which a caption repeats a past post
+
+_vectorizer = HashingVectorizer(
+    n_features=N_FEATURES,
+    ngram_range=(1, 2),
+    stop_words="english",
+    strip_accents="unicode",
+    alternate_sign=False,
+    norm=None,
+    dtype=np.float32,
+)
+
+
+class CaptionIndex:
+    """The live captions of one business: post ids, their term counts and the derived TF-IDF matrix."""
+
+    def __init__(self, post_ids, counts, last_segment_id):
+        self.post_ids = post_ids
+        self.counts = counts
+        self.last_segment_id = last_segment_id
+        self.transformer = TfidfTransformer(sublinear_tf=True)
+        # Column-major, so a query only reads the postings of its own terms
+        self.tfidf = self.transformer.fit_transform(counts).tocsc() if len(post_ids) else None
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=np.int64), sp.csr_matrix((0, N_FEATURES), dtype=np.float32), 0)
+
+    def apply(self, segments):
+        """Return the index updated with segments written after this one was built."""
+        base = next((i for i in range(len(segments) - 1, -1, -1) if segments[i].is_base), None)
+        if base is not None:
+            post_ids, counts = [], []
+            segments = segments[base:]
+        else:
+            post_ids, counts = [self.post_ids], [self.counts]
+
+        for segment in segments:
+            post_ids.append(np.frombuffer(bytes(segment.post_ids), dtype=np.int64))
+            counts.append(sp.load_npz(io.BytesIO(bytes(segment.counts))))
+
+        post_ids, counts = _latest_rows(np.concatenate(post_ids), sp.vstack(counts, format="csr"))
+        return CaptionIndex(post_ids, counts, segments[-1].id)
+
+    def search(self, texts, limit):
+        """Return, for each text, up to `limit` (post_id, similarity) pairs, most similar first."""
+        if self.tfidf is None:
+            return [[] for _ in texts]
+
+        queries = self.transformer.transform(_vectorizer.transform(texts))
+        terms = np.unique(queries.indices)
+        scores = (self.tfidf[:, terms] @ queries[:, terms].T).toarray()
+        limit = min(limit, len(self.post_ids))
+
+        results = []
+        for column in scores.T:
+            top = np.argpartition(-column, limit - 1)[:limit]
+            top = top[np.argsort(-column[top])]
+            results.append([(int(self.post_ids[i]), float(column[i])) for i in top if column[i] > 0])
+        return results
+
+
+def _latest_rows(post_ids, counts):
+    """Keep the last row of every post, dropping posts whose last row is empty (deleted)."""
+    if not len(post_ids):
+        return post_ids, counts
+    _, last_from_end = np.unique(post_ids[::-1], return_index=True)
+    keep = np.sort(len(post_ids) - 1 - last_from_end)
+    keep = keep[counts[keep].getnnz(axis=1) > 0]
+    return post_ids[keep], counts[keep]
+
+
+_indexes = LRUCache(INDEX_CACHE_SIZE)
+
+
+def get_index(business_id):
+    """Return the up-to-date index of a business, reading only segments this process has not seen."""
+    index = _indexes.get(business_id) or CaptionIndex.empty()
+    segments = list(CaptionIndexSegment.objects.filter(business_id=business_id, id__gt=index.last_segment_id))
+    if segments:
+        index = index.apply(segments)
+        _indexes.set(business_id, index)
+    return index
+
+
+def _write_segment(business_id, post_ids, counts, is_base=False):
+    buffer = io.BytesIO()
+    sp.save_npz(buffer, counts.tocsr())
+    return CaptionIndexSegment.objects.create(
+        business_id=business_id,
+        post_ids=np.asarray(post_ids, dtype=np.int64).tobytes(),
+        counts=buffer.getvalue(),
+        is_base=is_base,
+    )
+
+
+def index_posts(business_id, posts):
+    """Add or replace the captions of `posts`, given as (post_id, caption) pairs."""
+    posts = list(posts)
+    if not posts:
+        return
+    post_ids, captions = zip(*posts)
+    counts = _vectorizer.transform(captions)
+
+    with transaction.atomic():
+        # Serializes index writes of a business, so compaction cannot miss a concurrent segment
+        if not Business.objects.select_for_update().filter(id=business_id).exists():
+            return
+        _write_segment(business_id, post_ids, counts)
+        if CaptionIndexSegment.objects.filter(business_id=business_id).count() > MAX_SEGMENTS:
+            _compact(business_id)
+
+
+def remove_posts(business_id, post_ids):
+    """Remove posts from the index by writing empty rows for them."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+    empty_rows = sp.csr_matrix((len(post_ids), N_FEATURES), dtype=np.float32)
+
+    with transaction.atomic():
+        if not Business.objects.select_for_update().filter(id=business_id).exists():
+            return  # Deleted together with its business
+        _write_segment(business_id, post_ids, empty_rows)
+
+
+def _compact(business_id):
+    """Merge every segment of a business into a new base segment. Call with the business row locked."""
+    segments = list(CaptionIndexSegment.objects.filter(business_id=business_id))
+    index = CaptionIndex.empty().apply(segments)
+    _write_segment(business_id, index.post_ids, index.counts, is_base=True)
+    CaptionIndexSegment.objects.filter(business_id=business_id, id__lte=segments[-1].id).delete()
+
+
+def rebuild_index(business_id, chunk_size=5000):
+    """Re-index every post of a business from the database, replacing its existing segments."""
+    rows = Post.objects.filter(business_id=business_id).order_by("id").values_list("id", "caption")
+    rows = rows.iterator(chunk_size=chunk_size)
+    post_ids, counts = [], []
+    while chunk := list(islice(rows, chunk_size)):
+        post_ids.extend(post_id for post_id, _ in chunk)
+        counts.append(_vectorizer.transform([caption for _, caption in chunk]))
+
+    counts = sp.vstack(counts, format="csr") if counts else sp.csr_matrix((0, N_FEATURES), dtype=np.float32)
+    with transaction.atomic():
+        if not Business.objects.select_for_update().filter(id=business_id).exists():
+            return 0
+        segment = _write_segment(business_id, post_ids, counts, is_base=True)
+        CaptionIndexSegment.objects.filter(business_id=business_id, id__lt=segment.id).delete()
+    return len(post_ids)
+
+
+def similar_posts(business_id, text, limit=5, exclude=()):
+    """Return up to `limit` (post_id, similarity) pairs of the business's posts most similar to `text`."""
+    exclude = set(exclude)
+    matches = get_index(business_id).search([text], limit + len(exclude))[0]
+    return [match for match in matches if match[0] not in exclude][:limit]
+
+
+def find_near_duplicates(business_id, captions, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Check generated captions against the business's past posts.
+    Returns one entry per caption that closely repeats a past post.
+    """
+    matches = get_index(business_id).search(captions, 1)
+    return [
+        {"caption_index": index, "post_id": best[0][0], "similarity": round(best[0][1], 3)}
+        for index, best in enumerate(matches)
+        if best and best[0][1] >= threshold
+    ]
@@ -1,3 +1,72 @@
-from django.test import TestCase
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
 
-# Create your tests here.
+from businesses.models import Business
+from social.models import SocialMedia
+from users.models import User
+from .minhash import DUPLICATE_THRESHOLD, band_keys, caption_signature, find_duplicate_posts
+from .models import Post, PostLSHBucket
+
+CAPTION = (
+    "🔥 New Menu Alert! Experience the perfect balance of smoky grilled steak, fresh herbs and a zesty "
+    "lemon kick. Available now, tag your foodie friends and come try it! #NewMenu #SteakLover"
+)
+NEAR_CAPTION = CAPTION.replace("Available now", "Available today") + " #Foodie"
+OTHER_CAPTION = (
+    "Sunday brunch is back: fluffy pancakes, maple syrup and bottomless coffee from 9am. "
+    "Bring the whole family and book a table before it fills up. #Brunch #WeekendVibes"
+)
+
+
+def _similarity(a, b):
+    return float(np.mean(caption_signature(a) == caption_signature(b)))
+
+
+class MinHashTests(SimpleTestCase):
+    def test_identical_captions_collide_in_every_band(self):
+        self.assertEqual(band_keys(caption_signature(CAPTION)), band_keys(caption_signature(CAPTION)))
+
+    def test_case_and_spacing_do_not_matter(self):
+        self.assertEqual(_similarity(CAPTION, "  " + CAPTION.upper().replace(" ", "   ")), 1.0)
+
+    def test_near_identical_captions_collide(self):
+        self.assertGreaterEqual(_similarity(CAPTION, NEAR_CAPTION), DUPLICATE_THRESHOLD)
+        shared = set(band_keys(caption_signature(CAPTION))) & set(band_keys(caption_signature(NEAR_CAPTION)))
+        self.assertTrue(shared)
+
+    def test_unrelated_captions_do_not_collide(self):
+        self.assertLess(_similarity(CAPTION, OTHER_CAPTION), 0.2)
+        shared = set(band_keys(caption_signature(CAPTION))) & set(band_keys(caption_signature(OTHER_CAPTION)))
+        self.assertFalse(shared)
+
+    def test_empty_caption_has_no_signature(self):
+        self.assertIsNone(caption_signature("  "))
+
+
+class DuplicatePostTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(email="owner@example.com", password="correct-password", name="Owner")
+        self.business = Business.objects.create(owner=owner, name="Steakhouse")
+        self.platform = SocialMedia.objects.create(
+            business=self.business, platform="instagram", link="https://instagram.com/steakhouse", username="steakhouse",
+        )
+
+    def _post(self, caption, **kwargs):
+        return Post.objects.create(business=self.business, platform=self.platform, caption=caption, image="post.jpg", **kwargs)
+
+    def test_saved_posts_are_found_by_near_identical_captions_only(self):
+        post = self._post(CAPTION)
+        self._post(OTHER_CAPTION)
+        duplicates = find_duplicate_posts(self.business.id, self.platform.id, NEAR_CAPTION)
+        self.assertEqual([duplicate["post_id"] for duplicate in duplicates], [post.id])
+        self.assertEqual(find_duplicate_posts(self.business.id, self.platform.id, CAPTION, exclude=[post.id]), [])
+
+    def test_fixture_loading_does_not_index_posts(self):
+        post = Post(
+            business=self.business, platform=self.platform, caption=CAPTION, image="post.jpg", created_at=timezone.now(),
+        )
+        post.save_base(raw=True)  # How loaddata saves, timestamps come from the fixture
+        post.refresh_from_db()
+        self.assertIsNone(post.minhash)
+        self.assertFalse(PostLSHBucket.objects.filter(post_id=post.id).exists())
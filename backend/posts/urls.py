@@ -1,8 +1,12 @@
 # posts/urls.py
 from django.urls import path
-from .views import PostListCreateView, PostDetailView
+from .views import PostListCreateView, PostDetailView, SimilarPostsView, BestPostingTimesView, PostExportView, publish_post
 
 urlpatterns = [
     path("", PostListCreateView.as_view(), name="post_list_create"), # LIST, CREATE GET,POST /api/posts/
     path("<int:pk>/", PostDetailView.as_view(), name="post_detail"), # GET,PATCH,DELETE /api/posts/{id}/
+    path("<int:pk>/publish/", publish_post, name="post_publish"), # POST /api/posts/{id}/publish/
+    path("similar/", SimilarPostsView.as_view(), name="similar_posts"), # GET /api/posts/similar/?caption=
+    path("export.<str:export_format>", PostExportView.as_view(), name="post_export"), # GET /api/posts/export.ndjson, /api/posts/export.csv
+    path("best-times/", BestPostingTimesView.as_view(), name="best_posting_times"), # GET /api/posts/best-times/?platform=
 ]
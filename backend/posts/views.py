@@ -1,42 +1,81 @@
 import json
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.conf import settings
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.generics import ListCreateAPIView
 from django.utils import timezone
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from asgiref.sync import sync_to_async
 from itertools import chain
 from promotions.models import Promotion
 from posts.serializers import PostSerializer
-from businesses.models import Business
+from businesses.resolver import BusinessMixin
 from social.models import SocialMedia
 from posts.models import Post, Category
+from posts.similarity import similar_posts
+from posts.minhash import find_duplicate_posts
+from posts.posting_times import suggest_posting_times
+from posts.exports import EXPORT_CONTENT_TYPES, POST_EXPORT_FIELDS, export_post_rows, streaming_export
+from users.authentication import authenticate_async, unauthenticated_response
 from config.constants import POST_CATEGORIES_OPTIONS, SOCIAL_PLATFORMS
 import logging
 
 logger = logging.getLogger(__name__)
 
-class PostListCreateView(ListCreateAPIView):
+def _request_timezone(request):
+    """Time zone named by the `timezone` query parameter, defaulting to the server's. None if unknown."""
+    try:
+        return ZoneInfo(request.query_params.get("timezone") or settings.TIME_ZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+def _allows_duplicate(data):
+    """Whether the request opts into a duplicate caption: `allow_duplicate` as a JSON boolean or a "true" form value."""
+    return str(data.get("allow_duplicate")).lower() == "true"
+
+def _publish_now(post):
+    """Publish a post to its platform and set its status, link and posted time accordingly. Does not save it."""
+    post.scheduled_at = None
+    try:
+        # TODO success = publish_to_social_media(post)
+        success = True
+        post.link = "https://test.com/p/test"
+
+        if success:
+            post.status = 'Published'
+            post.posted_at = timezone.now()
+        else:
+            post.status = 'Failed'
+    except Exception as e:
+        logger.error(f"Error publishing post: {e}")
+        post.status = 'Failed'
+
+class PostListCreateView(BusinessMixin, ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = PostSerializer
 
     def get_queryset(self):
-        business = Business.objects.filter(owner=self.request.user).first()
-        if not business:
+        business_id = self.get_business_id()
+        if not business_id:
             return Post.objects.none()
 
         failed_posts = list(Post.objects.filter(
-            business=business,
+            business_id=business_id,
             status='Failed'
         ).order_by('-created_at'))
 
         scheduled_posts = list(Post.objects.filter(
-            business=business,
+            business_id=business_id,
             status='Scheduled'
         ).order_by('-scheduled_at'))
 
         posted_posts = list(Post.objects.filter(
-            business=business,
+            business_id=business_id,
             status='Published'
         ).order_by('-posted_at'))
 
@@ -62,12 +101,11 @@ class PostListCreateView(ListCreateAPIView):
 
     def perform_create(self, serializer):
         # TODO
-        business = Business.objects.filter(owner=self.request.user).first()
-        serializer.save(business=business)
+        serializer.save(business=self.get_business())
 
     def get(self, request, *args, **kwargs):
         if request.query_params.get('create') == 'true':
-            business = Business.objects.filter(owner=request.user).first()
+            business = self.get_business()
 
             if not business:
                 return Response({"error": "Business not found"}, status=404)
@@ -89,6 +127,15 @@ class PostListCreateView(ListCreateAPIView):
                 for linked_platform in linked_platforms_queryset
             ]
 
+            # Suggested scheduled_at slots per platform; the form still works without them
+            suggested_times = {}
+            tz = _request_timezone(request)
+            if tz:
+                try:
+                    suggested_times = suggest_posting_times(business.id, [p["key"] for p in linked_platforms], tz)
+                except Exception as e:
+                    logger.error(f"❌ Posting time suggestion failed for business {business.id}: {e}", exc_info=True)
+
             response_data = {
                 "business": {
                     "target_customers": business.target_customers,
@@ -97,6 +144,7 @@ class PostListCreateView(ListCreateAPIView):
                 },
                 "selectable_categories": selectable_categories,
                 "linked_platforms": linked_platforms,
+                "suggested_times": suggested_times,
             }
 
             return Response(response_data)
@@ -104,7 +152,7 @@ class PostListCreateView(ListCreateAPIView):
         return self.list(request, *args, **kwargs)
     
     def post(self, request):
-        business = Business.objects.filter(owner=request.user).first()
+        business = self.get_business()
         if not business:
             return Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
         
@@ -125,6 +173,15 @@ class PostListCreateView(ListCreateAPIView):
                 promotion = Promotion.objects.get(id=data["promotion"])
             except Promotion.DoesNotExist:
                 return Response({"error": "Invalid promotion ID"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Platforms penalise repeated captions; send allow_duplicate=true to post anyway
+        if not _allows_duplicate(data):
+            duplicates = find_duplicate_posts(business.id, platform.id, data.get("caption", ""))
+            if duplicates:
+                return Response(
+                    {"error": "A nearly identical caption was already posted on this platform", "duplicates": duplicates},
+                    status=status.HTTP_409_CONFLICT,
+                )
         
         scheduled_at = data.get("scheduled_at")
         if scheduled_at:
@@ -158,7 +215,7 @@ class PostListCreateView(ListCreateAPIView):
         return Response({"message": "Post created successfully!"}, status=status.HTTP_201_CREATED)
 
 
-class PostDetailView(APIView):
+class PostDetailView(BusinessMixin, APIView):
     """
     API view for retrieving, updating and deleting a specific post.
     """
@@ -166,12 +223,12 @@ class PostDetailView(APIView):
 
     def get_post(self, pk, user):
         """Helper method to get a post and verify ownership"""
-        business = Business.objects.filter(owner=user).first()
-        if not business:
+        business_id = self.get_business_id()
+        if not business_id:
             return None, Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
 
         try:
-            post = Post.objects.get(pk=pk, business=business)
+            post = Post.objects.get(pk=pk, business_id=business_id)
             return post, None
         except Post.DoesNotExist:
             return None, Response({"error": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -191,6 +248,17 @@ class PostDetailView(APIView):
         if error_response:
             return error_response
 
+        # Publishing now: refuse a caption that repeats another post unless allow_duplicate=true
+        publishing = 'scheduled_at' in request.data and not request.data.get("scheduled_at")
+        if publishing and not _allows_duplicate(request.data):
+            caption = request.data.get('caption', post.caption)
+            duplicates = find_duplicate_posts(post.business_id, post.platform_id, caption, exclude=[post.id])
+            if duplicates:
+                return Response(
+                    {"error": "A nearly identical caption was already posted on this platform", "duplicates": duplicates},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
         # Handle caption updates
         if 'caption' in request.data:
             post.caption = request.data['caption']
@@ -220,20 +288,7 @@ class PostDetailView(APIView):
                 post.scheduled_at = scheduled_at
                 post.status = 'Scheduled'
             else:
-                post.scheduled_at = None
-                try:
-                    # TODO success = publish_to_social_media(post)
-                    success = True
-                    post.link = "https://test.com/p/test"
-
-                    if success:
-                        post.status = 'Published'
-                        post.posted_at = timezone.now()
-                    else:
-                        post.status = 'Failed'
-                except Exception as e:
-                    logger.error(f"Error publishing post: {e}")
-                    post.status = 'Failed'
+                _publish_now(post)
 
         post.save()
 
@@ -248,3 +303,140 @@ class PostDetailView(APIView):
 
         post.delete()
         return Response({"message": "Post deleted successfully"}, status=status.HTTP_200_OK)
+
+
+@csrf_exempt  # Authenticated by JWT like the DRF views, which are exempt as well
+@require_POST
+async def publish_post(request, pk):
+    """
+    Publish a post now: POST /api/posts/{id}/publish/
+
+    Does what PATCH with an empty `scheduled_at` does, as a native async view.
+    A caption nearly identical to one already posted on the platform is refused
+    with 409 unless the JSON body has `"allow_duplicate": true` (or "true").
+    """
+    user = await authenticate_async(request)
+    if user is None:
+        return unauthenticated_response()
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    post = await Post.objects.select_related("platform").filter(pk=pk, business__owner=user).afirst()
+    if post is None:
+        return JsonResponse({"error": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    if not _allows_duplicate(data):
+        duplicates = await sync_to_async(find_duplicate_posts)(
+            post.business_id, post.platform_id, post.caption, exclude=[post.id]
+        )
+        if duplicates:
+            return JsonResponse(
+                {"error": "A nearly identical caption was already posted on this platform", "duplicates": duplicates},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+    _publish_now(post)
+    await post.asave(update_fields=["scheduled_at", "link", "status", "posted_at"])
+
+    data = await sync_to_async(lambda: PostSerializer(post, context={"request": request}).data)()
+    return JsonResponse(data)
+
+
+class SimilarPostsView(BusinessMixin, APIView):
+    """
+    API view for finding the business's past posts whose captions are most similar to a text.
+
+    Query parameters:
+    - `caption` (required): The text to compare, e.g. a draft caption.
+    - `limit` (optional): Maximum number of posts to return (default 5, at most 50).
+    - `exclude` (optional): A post id to leave out, e.g. the post being edited.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        business_id = self.get_business_id()
+        if not business_id:
+            return Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        caption = request.query_params.get("caption", "").strip()
+        if not caption:
+            return Response({"error": "caption is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get("limit", 5)), 50)
+            exclude = [int(request.query_params["exclude"])] if request.query_params.get("exclude") else []
+        except ValueError:
+            return Response({"error": "limit and exclude must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        matches = similar_posts(business_id, caption, limit=max(limit, 1), exclude=exclude)
+        posts = Post.objects.filter(business_id=business_id, id__in=[post_id for post_id, _ in matches]) \
+            .select_related("platform").prefetch_related("categories").in_bulk()
+
+        results = []
+        for post_id, similarity in matches:
+            if post_id in posts:
+                data = PostSerializer(posts[post_id], context={"request": request}).data
+                data["similarity"] = round(similarity, 3)
+                results.append(data)
+
+        return Response({"posts": results})
+
+
+class BestPostingTimesView(BusinessMixin, APIView):
+    """
+    API view recommending upcoming hours to post, from the engagement of the business's published posts.
+
+    Query parameters:
+    - `platform` (optional): Platform key, e.g. `instagram`. Defaults to every linked platform.
+    - `limit` (optional): Recommendations per platform (default 3, at most 10).
+    - `timezone` (optional): IANA time zone of the returned times, e.g. `Australia/Brisbane`.
+
+    Reads a precomputed profile (see posts/posting_times.py), so the post history is not scanned per request.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        business_id = self.get_business_id()
+        if not business_id:
+            return Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        tz = _request_timezone(request)
+        if tz is None:
+            return Response({"error": "Unknown timezone"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 3)), 10))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        platform_keys = list(SocialMedia.objects.filter(business_id=business_id).values_list("platform", flat=True))
+        platform = request.query_params.get("platform")
+        if platform:
+            if platform not in platform_keys:
+                return Response({"error": "Platform not linked"}, status=status.HTTP_400_BAD_REQUEST)
+            platform_keys = [platform]
+
+        return Response({
+            "timezone": str(tz),
+            "recommendations": suggest_posting_times(business_id, platform_keys, tz, limit=limit),
+        })
+
+
+class PostExportView(BusinessMixin, APIView):
+    """
+    Download all of the business's posts, with engagement and categories: GET /api/posts/export.{ndjson,csv}
+
+    Rows are streamed from a database cursor as they are read (see posts/exports.py),
+    so large exports neither build up in memory nor delay the first byte.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, export_format):
+        if export_format not in EXPORT_CONTENT_TYPES:
+            return Response({"error": "Unsupported export format"}, status=status.HTTP_404_NOT_FOUND)
+        business_id = self.get_business_id()
+        if not business_id:
+            return Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return streaming_export(export_post_rows(business_id), POST_EXPORT_FIELDS, export_format, "posts")
@@ -0,0 +1,123 @@
+# promotions/analytics.py
+"""
+Sales-lift attribution for promotions.
+
+Each promotion day is compared with the same weekday of the weeks before the
+promotion started (the baseline), and the per-day figures are summed per
+promotion. Every promotion of every business in a batch is expanded into one
+array of days, so the whole batch is scored with a few vectorized lookups.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from sales.models import SalesDataPoint
+from .models import Promotion, PromotionLift
+
+BASELINE_WEEKS = 4  # Number of prior same-weekday observations averaged into the baseline
+
+LIFT_COLUMNS = ["promotion_id", "days_measured", "actual_revenue", "baseline_revenue", "incremental_revenue", "lift_percent"]
+
+
+def compute_promotion_lift(promotions, sales, baseline_weeks=BASELINE_WEEKS):
+    """
+    Score promotions against their sales data.
+
+    `promotions` has the columns promotion_id, business_id, start_date, end_date
+    (end_date may be NaT for open-ended promotions) and `sales` has business_id,
+    date, revenue. Returns one row per promotion with the LIFT_COLUMNS.
+    """
+    if promotions.empty:
+        return pd.DataFrame(columns=LIFT_COLUMNS)
+
+    revenue = sales.set_index(["business_id", "date"])["revenue"]
+    last_sale = promotions["business_id"].map(sales.groupby("business_id")["date"].max())
+
+    # Only days that already have sales can be measured
+    start = promotions["start_date"]
+    end = promotions["end_date"].fillna(last_sale).where(lambda d: d <= last_sale, last_sale)
+    lengths = ((end - start).dt.days + 1).fillna(0).clip(lower=0).astype(int).to_numpy()
+
+    # Expand every promotion into one row per day
+    total_days = lengths.sum()
+    first_day = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    offsets = pd.to_timedelta(np.arange(total_days) - first_day, unit="D")
+    promotion_ids = np.repeat(promotions["promotion_id"].to_numpy(), lengths)
+    business_ids = np.repeat(promotions["business_id"].to_numpy(), lengths)
+    dates = pd.DatetimeIndex(np.repeat(start.to_numpy(), lengths)) + offsets
+
+    def lookup(days_back):
+        index = pd.MultiIndex.from_arrays([business_ids, dates - pd.to_timedelta(days_back, unit="D")])
+        return revenue.reindex(index).to_numpy(dtype=float)
+
+    actual = lookup(np.zeros(total_days, dtype=int))
+    # Same weekday, counted back from the promotion's first week, so the baseline never includes promotion days
+    weeks_in = (np.arange(total_days) - first_day) // 7
+    prior = np.column_stack([lookup(7 * (weeks_in + week)) for week in range(1, baseline_weeks + 1)])
+    prior_count = (~np.isnan(prior)).sum(axis=1)
+    baseline = np.divide(
+        np.nansum(prior, axis=1), prior_count,
+        out=np.full(len(prior_count), np.nan), where=prior_count > 0,
+    )
+
+    measured = ~np.isnan(actual) & ~np.isnan(baseline)
+    per_promotion = pd.DataFrame({
+        "promotion_id": promotion_ids[measured],
+        "days_measured": 1,
+        "actual_revenue": actual[measured],
+        "baseline_revenue": baseline[measured],
+    }).groupby("promotion_id").sum()
+
+    result = per_promotion.reindex(promotions["promotion_id"].to_numpy(), fill_value=0)
+    result["incremental_revenue"] = result["actual_revenue"] - result["baseline_revenue"]
+    result["lift_percent"] = (
+        (result["actual_revenue"] / result["baseline_revenue"].where(result["baseline_revenue"] > 0) - 1) * 100
+    )
+    return result.rename_axis("promotion_id").reset_index()[LIFT_COLUMNS]
+
+
+def refresh_promotion_lift(business_ids, baseline_weeks=BASELINE_WEEKS):
+    """Recompute and store the lift of every promotion owned by the given businesses."""
+    promotions = pd.DataFrame.from_records(
+        Promotion.objects.filter(business_id__in=business_ids).values_list("id", "business_id", "start_date", "end_date"),
+        columns=["promotion_id", "business_id", "start_date", "end_date"],
+    )
+    if promotions.empty:
+        return 0
+
+    promotions["start_date"] = pd.to_datetime(promotions["start_date"])
+    promotions["end_date"] = pd.to_datetime(promotions["end_date"])
+
+    earliest = promotions["start_date"].min().date() - timedelta(weeks=baseline_weeks)
+    rows = (
+        SalesDataPoint.objects
+        .filter(business_id__in=business_ids, date__gte=earliest)
+        .annotate(revenue_float=Cast("revenue", FloatField()))
+        .values_list("business_id", "date", "revenue_float")
+    )
+    sales = pd.DataFrame.from_records(rows.iterator(chunk_size=10000), columns=["business_id", "date", "revenue"])
+    sales["date"] = pd.to_datetime(sales["date"])
+
+    lift = compute_promotion_lift(promotions, sales, baseline_weeks)
+    records = [
+        PromotionLift(
+            promotion_id=int(row.promotion_id),
+            days_measured=int(row.days_measured),
+            actual_revenue=round(row.actual_revenue, 2),
+            baseline_revenue=round(row.baseline_revenue, 2),
+            incremental_revenue=round(row.incremental_revenue, 2),
+            lift_percent=None if np.isnan(row.lift_percent) else round(row.lift_percent, 2),
+        )
+        for row in lift.itertuples(index=False)
+    ]
+    PromotionLift.objects.bulk_create(
+        records,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["promotion"],
+        update_fields=["days_measured", "actual_revenue", "baseline_revenue", "incremental_revenue", "lift_percent", "computed_at"],
+    )
+    return len(records)
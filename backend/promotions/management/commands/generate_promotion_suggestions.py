@@ -0,0 +1,116 @@
+# promotions/management/commands/generate_promotion_suggestions.py
+import time
+from datetime import timedelta
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from businesses.models import Business
+from config.constants import PROMOTION_CATEGORIES_OPTIONS
+from promotions.models import PromotionCategories, PromotionSuggestion
+from promotions.suggestions import SIGNAL_CATEGORIES, detect_sales_signals
+from sales.models import SalesDataPoint
+
+
+class Command(BaseCommand):
+    help = "Generate promotion suggestions for every business from its recent sales data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", type=str, default=None,
+                            help="Analysis date (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--lookback-days", type=int, default=90,
+                            help="Days of sales history to analyse per business.")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Number of businesses loaded and analysed per query.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Detect signals without writing suggestions.")
+
+    def handle(self, *args, **options):
+        as_of = pd.Timestamp(options["as_of"]).date() if options["as_of"] else timezone.now().date()
+        since = as_of - timedelta(days=options["lookback_days"])
+        batch_size = options["batch_size"]
+
+        category_ids = dict(
+            PromotionCategories.objects.filter(
+                key__in=[option["key"] for option in PROMOTION_CATEGORIES_OPTIONS]
+            ).values_list("key", "id")
+        )
+        missing = {key for keys in SIGNAL_CATEGORIES.values() for key in keys} - set(category_ids)
+        if missing:
+            raise CommandError(f"Missing promotion categories: {sorted(missing)}. Run migrations first.")
+
+        started = time.perf_counter()
+        num_businesses = num_points = num_created = 0
+        business_ids = list(Business.objects.order_by("id").values_list("id", flat=True))
+
+        for offset in range(0, len(business_ids), batch_size):
+            batch_ids = business_ids[offset:offset + batch_size]
+            df = self._load_sales(batch_ids, since, as_of)
+            signals = detect_sales_signals(df, as_of)
+
+            num_businesses += len(batch_ids)
+            num_points += len(df)
+            if not options["dry_run"]:
+                num_created += self._save_suggestions(batch_ids, signals, category_ids)
+            else:
+                num_created += len(signals)
+
+        elapsed = time.perf_counter() - started
+        verb = "Detected" if options["dry_run"] else "Created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {num_created} suggestions for {num_businesses} businesses "
+            f"({num_points} sales data points) in {elapsed:.1f}s"
+        ))
+
+    def _load_sales(self, business_ids, since, as_of):
+        """Load the sales series of a batch of businesses with a single query."""
+        rows = (
+            SalesDataPoint.objects
+            .filter(business_id__in=business_ids, date__gt=since, date__lte=as_of)
+            .annotate(revenue_float=Cast("revenue", FloatField()))
+            .values_list("business_id", "date", "revenue_float")
+        )
+        df = pd.DataFrame.from_records(rows.iterator(chunk_size=10000), columns=["business_id", "date", "revenue"])
+        df["date"] = pd.to_datetime(df["date"])
+        return df
+
+    def _save_suggestions(self, business_ids, signals, category_ids):
+        """Insert new suggestions and their categories, skipping titles a business already has."""
+        if signals.empty:
+            return 0
+
+        existing = set(
+            PromotionSuggestion.objects.filter(business_id__in=business_ids).values_list("business_id", "title")
+        )
+        # .tolist() yields plain Python ints, which database adapters accept (numpy.int64 is not)
+        signal_business_ids = signals["business_id"].astype(int).tolist()
+        keep = [
+            (business_id, title) not in existing
+            for business_id, title in zip(signal_business_ids, signals["title"])
+        ]
+        signals = signals[keep]
+        if signals.empty:
+            return 0
+
+        suggestions = [
+            PromotionSuggestion(business_id=business_id, title=title, description=description)
+            for business_id, title, description in zip(
+                signals["business_id"].astype(int).tolist(), signals["title"], signals["description"]
+            )
+        ]
+        CategoryLink = PromotionSuggestion.categories.through
+
+        with transaction.atomic():
+            PromotionSuggestion.objects.bulk_create(suggestions, batch_size=1000)
+            links = [
+                CategoryLink(promotionsuggestion_id=suggestion.id, promotioncategories_id=category_ids[key])
+                for suggestion, signal in zip(suggestions, signals["signal"])
+                for key in SIGNAL_CATEGORIES[signal]
+            ]
+            CategoryLink.objects.bulk_create(links, batch_size=5000)
+
+        return len(suggestions)
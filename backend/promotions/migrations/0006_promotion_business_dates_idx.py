@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0003_alter_business_logo'),
+        ('promotions', '0005_alter_promotion_end_date_alter_promotion_start_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='promotion',
+            index=models.Index(fields=['business', 'start_date', 'end_date'], name='promotion_business_dates_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promotions', '0006_promotion_business_dates_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromotionLift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days_measured', models.PositiveIntegerField(default=0)),
+                ('actual_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('baseline_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('incremental_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('lift_percent', models.FloatField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('promotion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='lift', to='promotions.promotion')),
+            ],
+        ),
+    ]
@@ -1,7 +1,39 @@
 # promotions/models.py
 from django.db import models
+from django.db.models import Case, When, Value, Q
+from django.utils import timezone
 from businesses.models import Business
 
+def promotion_status_filters(today):
+    """
+    Map each promotion status to a date-range condition.
+    Filtering on the raw dates (rather than the annotated status) lets the
+    (business, start_date, end_date) index serve the query.
+    """
+    return {
+        "upcoming": Q(start_date__gt=today),
+        "ongoing": Q(start_date__lte=today) & (Q(end_date__isnull=True) | Q(end_date__gte=today)),
+        "ended": Q(end_date__lt=today),
+    }
+
+class PromotionQuerySet(models.QuerySet):
+    def with_status(self, today=None):
+        """Annotate each promotion with its upcoming/ongoing/ended status computed in the database."""
+        today = today or timezone.now().date()
+        return self.annotate(
+            status=Case(
+                When(start_date__gt=today, then=Value("upcoming")),
+                When(end_date__lt=today, then=Value("ended")),
+                default=Value("ongoing"),
+                output_field=models.CharField(),
+            )
+        )
+
+    def filter_status(self, status, today=None):
+        """Keep only promotions in the given status (upcoming, ongoing or ended)."""
+        today = today or timezone.now().date()
+        return self.filter(promotion_status_filters(today)[status])
+
 class PromotionCategories(models.Model):
     key = models.CharField(max_length=50, unique=True)
     label = models.CharField(max_length=100)
@@ -22,11 +54,17 @@ class Promotion(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = PromotionQuerySet.as_manager()
+
     def __str__(self):
         return f"Promotion ({self.get_category_display()}) - {self.business.name}"
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Serves status tabs (upcoming/ongoing/ended) for a single business
+            models.Index(fields=["business", "start_date", "end_date"], name="promotion_business_dates_idx"),
+        ]
 
 
 class PromotionSuggestion(models.Model):
@@ -40,4 +78,21 @@ class PromotionSuggestion(models.Model):
          return f"Promotion Suggestion - {self.business.name}"
     class Meta:
         ordering = ["-created_at"]
-        verbose_name_plural = "Promotion Suggestions"
\ No newline at end of file
+        verbose_name_plural = "Promotion Suggestions"
+
+class PromotionLift(models.Model):
+    """
+    Precomputed sales lift of a promotion, refreshed by the `compute_promotion_lift` command.
+    Revenue during the promotion is compared against a baseline built from the same
+    weekdays of the preceding weeks (see promotions/analytics.py).
+    """
+    promotion = models.OneToOneField(Promotion, on_delete=models.CASCADE, related_name="lift")
+    days_measured = models.PositiveIntegerField(default=0)  # Promotion days with both sales and baseline data
+    actual_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    baseline_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    incremental_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    lift_percent = models.FloatField(blank=True, null=True)  # None when there is no baseline to compare against
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Promotion Lift - {self.promotion_id}"
@@ -0,0 +1,19 @@
+# promotions/pagination.py
+from rest_framework.pagination import CursorPagination
+
+class PromotionCursorPagination(CursorPagination):
+    """
+    Cursor pagination for promotion lists, newest first.
+
+    Pagination is opt-in: it only applies when the client sends `cursor` or
+    `page_size`, so existing clients that expect a plain list keep working.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params and self.page_size_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
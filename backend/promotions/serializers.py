@@ -1,12 +1,27 @@
 # promotions/serializers.py
 from rest_framework import serializers
-from .models import Promotion, PromotionSuggestion, PromotionCategories
+from .models import Promotion, PromotionSuggestion, PromotionCategories, PromotionLift
 from posts.serializers import PostSerializer
 from django.utils import timezone
 
+class PromotionLiftSerializer(serializers.ModelSerializer):
+    """Read-only view of the precomputed sales lift of a promotion"""
+
+    class Meta:
+        model = PromotionLift
+        fields = [
+            "days_measured",
+            "actual_revenue",
+            "baseline_revenue",
+            "incremental_revenue",
+            "lift_percent",
+            "computed_at",
+        ]
+
 class PromotionSerializer(serializers.ModelSerializer):
     posts = serializers.SerializerMethodField()
     status = serializers.SerializerMethodField()
+    lift = serializers.SerializerMethodField()
     category_ids = serializers.PrimaryKeyRelatedField(
         queryset=PromotionCategories.objects.all(),
         many=True,
@@ -28,6 +43,7 @@ class PromotionSerializer(serializers.ModelSerializer):
             "end_date",
             "status",
             "sold_count",
+            "lift",
         ]
 
     def get_categories(self, obj):
@@ -36,12 +52,22 @@ class PromotionSerializer(serializers.ModelSerializer):
             for category in obj.categories.all()
         ]
     
+    # Lift is precomputed by the compute_promotion_lift command; None until it has run
+    def get_lift(self, obj):
+        lift = getattr(obj, "lift", None)
+        return PromotionLiftSerializer(lift).data if lift else None
+
     def get_posts(self, obj):
         posts = obj.posts.all()
         return PostSerializer(posts, many=True, context=self.context).data
     
-    # Calculate status dynamically based on current time vs. promotion dates
+    # Prefer the status annotated by the database (Promotion.objects.with_status());
+    # otherwise calculate it based on current time vs. promotion dates
     def get_status(self, obj):
+        annotated_status = getattr(obj, "status", None)
+        if annotated_status:
+            return annotated_status
+
         now = timezone.now().date()
         if not obj.start_date and not obj.end_date:
             return "ongoing"
@@ -0,0 +1,133 @@
+# promotions/suggestions.py
+"""
+Rule-based promotion suggestions derived from daily sales data.
+
+All detection runs on a single DataFrame holding the sales series of many
+businesses at once (columns: business_id, date, revenue), so a batch of
+thousands of businesses is analysed with a handful of grouped NumPy/pandas
+operations instead of a Python loop per business.
+"""
+import numpy as np
+import pandas as pd
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+MIN_DAYS_OF_DATA = 28  # Businesses with less history in the window are skipped
+SLOW_WEEKDAY_RATIO = 0.8  # Weekday average below 80% of the overall average
+TREND_WINDOW_DAYS = 28  # Window used to fit the recent sales trend
+DECLINE_THRESHOLD = 0.15  # Fitted trend loses more than 15% over the trend window
+SPIKE_WINDOW_DAYS = 14  # Only recent spikes are worth reacting to
+SPIKE_Z_SCORE = 2.5  # Revenue this many standard deviations above the mean
+
+# Promotion category keys (see PROMOTION_CATEGORIES_OPTIONS) attached to each signal
+SIGNAL_CATEGORIES = {
+    "slow_weekday": ["discount", "bundle"],
+    "declining_trend": ["menu", "social"],
+    "sales_spike": ["trend", "social"],
+}
+
+
+def detect_sales_signals(df, as_of):
+    """
+    Detect slow weekdays, declining trends and sales spikes for every business in `df`.
+
+    `df` must only contain rows up to `as_of`. Returns a DataFrame with one row per
+    signal and the columns: business_id, signal, title, description.
+    """
+    columns = ["business_id", "signal", "title", "description"]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    as_of = pd.Timestamp(as_of)
+    stats = df.groupby("business_id")["revenue"].agg(["count", "mean", "std"])
+    stats = stats[(stats["count"] >= MIN_DAYS_OF_DATA) & (stats["mean"] > 0)]
+    df = df[df["business_id"].isin(stats.index)]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    signals = [
+        _slow_weekdays(df, stats),
+        _declining_trends(df, stats, as_of),
+        _sales_spikes(df, stats, as_of),
+    ]
+    return pd.concat(signals, ignore_index=True)[columns]
+
+
+def _slow_weekdays(df, stats):
+    """Flag the weakest weekday of each business when it lags the overall average."""
+    weekday_means = (
+        df.groupby(["business_id", df["date"].dt.weekday])["revenue"].mean().unstack()
+    )
+    ratio = weekday_means.div(stats["mean"], axis=0)
+    slowest = ratio.idxmin(axis=1)
+    slowest_ratio = ratio.min(axis=1)
+
+    flagged = slowest_ratio < SLOW_WEEKDAY_RATIO
+    result = pd.DataFrame({
+        "business_id": slowest.index[flagged],
+        "weekday": slowest[flagged].astype(int).to_numpy(),
+        "gap": ((1 - slowest_ratio[flagged]) * 100).round().astype(int).to_numpy(),
+    })
+    names = result["weekday"].map(dict(enumerate(WEEKDAY_NAMES)))
+    result["signal"] = "slow_weekday"
+    result["title"] = "Boost Sales on Slow " + names + "s"
+    result["description"] = (
+        names + " sales run " + result["gap"].astype(str)
+        + "% below your daily average. A " + names
+        + "-only deal or combo can bring customers in on your quietest day of the week."
+    )
+    return result
+
+
+def _declining_trends(df, stats, as_of):
+    """Fit a least-squares line to each business's recent sales and flag steep declines."""
+    recent = df[df["date"] > as_of - pd.Timedelta(days=TREND_WINDOW_DAYS)]
+    x = (recent["date"] - as_of).dt.days.to_numpy(dtype=float)
+    y = recent["revenue"].to_numpy()
+    sums = pd.DataFrame({
+        "business_id": recent["business_id"].to_numpy(),
+        "n": 1.0, "x": x, "y": y, "xy": x * y, "xx": x * x,
+    }).groupby("business_id").sum()
+
+    denominator = sums["n"] * sums["xx"] - sums["x"] ** 2
+    slope = (sums["n"] * sums["xy"] - sums["x"] * sums["y"]) / denominator.replace(0, np.nan)
+    recent_mean = sums["y"] / sums["n"]
+    change = slope * TREND_WINDOW_DAYS / recent_mean.replace(0, np.nan)
+
+    flagged = (change < -DECLINE_THRESHOLD) & (sums["n"] >= TREND_WINDOW_DAYS // 2)
+    drop = (-change[flagged] * 100).round().astype(int)
+    result = pd.DataFrame({"business_id": drop.index, "drop": drop.to_numpy()})
+    result["signal"] = "declining_trend"
+    result["title"] = "Reverse the Recent Sales Decline"
+    result["description"] = (
+        "Sales have fallen about " + result["drop"].astype(str)
+        + f"% over the last {TREND_WINDOW_DAYS // 7} weeks. Refresh interest with a new menu "
+        "item or a social media campaign before the trend settles in."
+    )
+    return result
+
+
+def _sales_spikes(df, stats, as_of):
+    """Flag each business's strongest recent day when it stands far above its usual sales."""
+    recent = df[df["date"] > as_of - pd.Timedelta(days=SPIKE_WINDOW_DAYS)]
+    mean = recent["business_id"].map(stats["mean"])
+    std = recent["business_id"].map(stats["std"]).replace(0, np.nan)
+    z_score = (recent["revenue"] - mean) / std
+
+    spikes = recent.assign(z=z_score, lift=(recent["revenue"] / mean - 1) * 100)
+    spikes = spikes[spikes["z"] > SPIKE_Z_SCORE]
+    spikes = spikes.sort_values("z", ascending=False).drop_duplicates("business_id")
+
+    result = pd.DataFrame({
+        "business_id": spikes["business_id"].to_numpy(),
+        "day": spikes["date"].dt.strftime("%d %b %Y").to_numpy(),
+        "lift": spikes["lift"].round().astype(int).to_numpy(),
+    })
+    result["signal"] = "sales_spike"
+    result["title"] = "Capitalize on Your " + result["day"] + " Sales Spike"
+    result["description"] = (
+        "Sales on " + result["day"] + " were " + result["lift"].astype(str)
+        + "% above your daily average. Find out what drove it and repeat it with a "
+        "trending offer, then share the buzz on social media."
+    )
+    return result
@@ -1,3 +1,25 @@
-from django.test import TestCase
+import pandas as pd
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .analytics import compute_promotion_lift
+
+
+class PromotionLiftTests(SimpleTestCase):
+    def _lift(self, end_date):
+        # Revenue steps from 100 to 150 on the day the promotion starts
+        dates = pd.date_range("2024-01-01", "2024-03-31")
+        start = pd.Timestamp("2024-02-05")
+        sales = pd.DataFrame({"business_id": 1, "date": dates, "revenue": [150.0 if d >= start else 100.0 for d in dates]})
+        promotions = pd.DataFrame({
+            "promotion_id": [1], "business_id": [1], "start_date": [start], "end_date": [pd.Timestamp(end_date)],
+        })
+        return compute_promotion_lift(promotions, sales).iloc[0]
+
+    def test_step_is_measured_against_days_before_the_promotion(self):
+        lift = self._lift("2024-03-10")
+        self.assertEqual(lift["days_measured"], 35)
+        self.assertAlmostEqual(lift["lift_percent"], 50.0)
+
+    def test_open_ended_promotion_is_not_compared_with_itself(self):
+        lift = self._lift(None)
+        self.assertAlmostEqual(lift["lift_percent"], 50.0)
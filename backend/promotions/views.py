@@ -2,12 +2,16 @@
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status, viewsets
-from businesses.models import Business
+from rest_framework.exceptions import ValidationError
+from businesses.resolver import BusinessMixin
+from config.constants import PROMOTION_STATUS_OPTIONS
 from .models import Promotion, PromotionSuggestion
+from .pagination import PromotionCursorPagination
 from .serializers import PromotionSerializer, SuggestionSerializer
 
-class PromotionViewSet(viewsets.ModelViewSet):
+class PromotionViewSet(BusinessMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    pagination_class = PromotionCursorPagination
 
     def get_serializer_class(self):
         # Dynamically choose serializer based on query parameter
@@ -21,26 +25,42 @@ class PromotionViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         type_param = self.request.query_params.get('type')
-        business = Business.objects.filter(owner=self.request.user).first()
+        business_id = self.get_business_id()
 
         if type_param == 'suggestions':
-            if not business:
+            if not business_id:
                 return PromotionSuggestion.objects.none()
             
-            return PromotionSuggestion.objects.filter(business=business).order_by("-created_at")
+            return PromotionSuggestion.objects.filter(business_id=business_id).prefetch_related("categories").order_by("-created_at")
         else:
-            if not business:
+            if not business_id:
                 return Promotion.objects.none()
-            
-            return Promotion.objects.filter(business=business).order_by("-created_at")
+
+            queryset = (
+                Promotion.objects.filter(business_id=business_id)
+                .with_status()
+                .select_related("lift")
+                .prefetch_related("categories", "posts__categories", "posts__platform")
+                .order_by("-created_at")
+            )
+
+            # Optional ?status=upcoming|ongoing|ended filter, evaluated in the database
+            status_param = self.request.query_params.get('status')
+            if status_param:
+                valid_statuses = [key for key, _ in PROMOTION_STATUS_OPTIONS]
+                if status_param not in valid_statuses:
+                    raise ValidationError({"error": f"Invalid status '{status_param}'. Choose one of: {valid_statuses}"})
+                queryset = queryset.filter_status(status_param)
+
+            return queryset
         
     def get_promotion(self, pk, user):
-        business = Business.objects.filter(owner=user).first()
-        if not business:
+        business_id = self.get_business_id()
+        if not business_id:
             return None, Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
 
         try:
-            promotion = Promotion.objects.get(pk=pk, business=business)
+            promotion = Promotion.objects.get(pk=pk, business_id=business_id)
             return promotion, None
         except Promotion.DoesNotExist:
             return None, Response({"error": "Promotion not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -64,13 +84,13 @@ class PromotionViewSet(viewsets.ModelViewSet):
         return Response({"message": "Promotion deleted successfully"}, status=status.HTTP_200_OK)
     
     def create(self, request):
-        business = Business.objects.filter(owner=request.user).first()
-        if not business:
+        business_id = self.get_business_id()
+        if not business_id:
             return Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
         
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(business=business)
+        serializer.save(business_id=business_id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     def update(self, request, *args, **kwargs):
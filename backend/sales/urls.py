@@ -1,7 +1,8 @@
 # backend/sales/urls.py
 from django.urls import path
-from .views import SalesDataView
+from .views import SalesDataView, SalesExportView
 
 urlpatterns = [
     path('', SalesDataView.as_view(), name='sales-data'),
+    path('export.<str:export_format>', SalesExportView.as_view(), name='sales-export'),
 ]
@@ -5,7 +5,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from businesses.models import Business
+from django.db.models import F
+
+from businesses.resolver import BusinessMixin
+from posts.exports import EXPORT_CHUNK_SIZE, EXPORT_CONTENT_TYPES, streaming_export
+from promotions.analytics import refresh_promotion_lift
 from .models import SalesData, SalesDataPoint
 from .serializers import SalesDataSerializer
 
@@ -16,7 +20,7 @@ from pandas.errors import EmptyDataError
 import logging
 logger = logging.getLogger(__name__)
 
-class SalesDataView(APIView):
+class SalesDataView(BusinessMixin, APIView):
     """
     API view for uploading and listing sales data files.
     GET: List all sales data files for the authenticated user's business.
@@ -27,11 +31,11 @@ class SalesDataView(APIView):
 
     def get(self, request):
         """List daily sales data for the authenticated user's business"""
-        business = Business.objects.filter(owner=request.user).first()
-        if not business:
+        business_id = self.get_business_id()
+        if not business_id:
             return Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
         
-        data_points = SalesDataPoint.objects.filter(business=business).order_by('date')
+        data_points = SalesDataPoint.objects.filter(business_id=business_id).order_by('date')
         
         if not data_points.exists():
             return Response({"labels": [], "datasets": []})
@@ -49,7 +53,7 @@ class SalesDataView(APIView):
     
     def post(self, request):
         """Handle sales data file upload"""
-        business = Business.objects.filter(owner=request.user).first()
+        business = self.get_business()
         if not business:
             return Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
         
@@ -101,8 +105,7 @@ class SalesDataView(APIView):
                         'source_file': sales_data
                     }
                 )
-            return Response({"success": True}, status=status.HTTP_201_CREATED)
-        
+
         except EmptyDataError:
             logger.error("❌ CSV upload failed — No readable content or missing columns (EmptyDataError)", exc_info=True)
             return Response({"error": "The uploaded file is empty or does not contain valid columns."}, status=status.HTTP_400_BAD_REQUEST)
@@ -110,3 +113,36 @@ class SalesDataView(APIView):
         except Exception as e:
             logger.error("❌ CSV upload failed — %s", str(e), exc_info=True)
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # New sales data changes the lift of this business's promotions. The upload is saved either way,
+        # so a failure here is logged rather than reported to the client
+        try:
+            refresh_promotion_lift([business.id])
+        except Exception:
+            logger.error("❌ Promotion lift refresh failed after sales upload for business %s", business.id, exc_info=True)
+        return Response({"success": True}, status=status.HTTP_201_CREATED)
+
+
+SALES_EXPORT_FIELDS = ("date", "revenue", "filename")
+
+
+class SalesExportView(BusinessMixin, APIView):
+    """
+    Download the business's daily sales data points: GET /api/sales/export.{ndjson,csv}
+    Rows are streamed from a database cursor as they are read (see posts/exports.py).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, export_format):
+        if export_format not in EXPORT_CONTENT_TYPES:
+            return Response({"error": "Unsupported export format"}, status=status.HTTP_404_NOT_FOUND)
+        business_id = self.get_business_id()
+        if not business_id:
+            return Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        rows = (
+            SalesDataPoint.objects.filter(business_id=business_id).order_by('date')
+            .values('date', 'revenue', filename=F('source_file__filename'))
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return streaming_export(rows, SALES_EXPORT_FIELDS, export_format, "sales")
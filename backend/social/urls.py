@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.urls import path
-from .views import LinkedSocialAccountsView, ConnectSocialAccountView, OAuthCallbackView, DisconnectSocialAccountView
+from .views import LinkedSocialAccountsView, ConnectSocialAccountView, OAuthCallbackView, aoauth_callback, DisconnectSocialAccountView
 
 urlpatterns = [
     # Fetch linked accounts
@@ -9,7 +10,7 @@ urlpatterns = [
     path("connect/<str:provider>/", ConnectSocialAccountView.as_view(), name="connect-social-account"),
 
     # OAuth callback (where providers redirect after authentication)
-    path("callback/<str:provider>/", OAuthCallbackView.as_view(), name="oauth-callback"),
+    path("callback/<str:provider>/", aoauth_callback if settings.SERVER_MODE == "asgi" else OAuthCallbackView.as_view(), name="oauth-callback"),
 
     # Disconnect account
     path("disconnect/<str:provider>/", DisconnectSocialAccountView.as_view(), name="disconnect-social-account"),
@@ -3,7 +3,10 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
-from businesses.models import Business
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from users.authentication import authenticate_async, unauthenticated_response
+from businesses.resolver import BusinessMixin
 from .models import SocialMedia
 from .serializers import SocialMediaSerializer
 import logging
@@ -13,7 +16,7 @@ from .schemas import social_accounts_list_schema, social_disconnect_schema, soci
 # Setup logger for debugging and tracking requests
 logger = logging.getLogger(__name__)
 
-class LinkedSocialAccountsView(APIView):
+class LinkedSocialAccountsView(BusinessMixin, APIView):
     """
     View to retrieve all linked social accounts for the current user.
     """
@@ -21,8 +24,7 @@ class LinkedSocialAccountsView(APIView):
 
     @extend_schema(**social_accounts_list_schema)
     def get(self, request):
-        business = Business.objects.filter(owner=request.user).first()
-        linked_platforms_queryset = SocialMedia.objects.filter(business=business)
+        linked_platforms_queryset = SocialMedia.objects.filter(business_id=self.get_business_id())
         serialized_data = SocialMediaSerializer(linked_platforms_queryset, many=True).data
         return Response(serialized_data, status=status.HTTP_200_OK)
 
@@ -40,20 +42,33 @@ class OAuthCallbackView(APIView):
     parser_classes = [JSONParser]
 
     @extend_schema(**oauth_callback_schema)
-    def get(self, request):
+    def get(self, request, provider):
         # TODO: Implement logic to process the OAuth callback and store access token
         return Response({"message": "OAuth callback handling is not yet implemented."}, status=status.HTTP_501_NOT_IMPLEMENTED)
 
-class DisconnectSocialAccountView(APIView):
+@require_GET
+async def aoauth_callback(request, provider):
+    """
+    `OAuthCallbackView` as a native async view, served at the same URL when SERVER_MODE is "asgi":
+    exchanging the code for a token waits on the provider, which must not hold a worker thread.
+    """
+    user = await authenticate_async(request)
+    if user is None:
+        return unauthenticated_response()
+
+    # TODO: Exchange the code for an access token (async HTTP client) and store it with SocialMedia.objects.aupdate_or_create
+    return JsonResponse({"message": "OAuth callback handling is not yet implemented."}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+class DisconnectSocialAccountView(BusinessMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     @extend_schema(**social_disconnect_schema)
     def delete(self, request, provider):
-        business = Business.objects.filter(owner=request.user).first()
-        if not business:
+        business_id = self.get_business_id()
+        if not business_id:
             return Response({"error": "Business not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        social_account = SocialMedia.objects.filter(business=business, platform=provider).first()
+        social_account = SocialMedia.objects.filter(business_id=business_id, platform=provider).first()
         if not social_account:
             return Response({"error": f"No connected account found for provider '{provider}'"}, status=status.HTTP_404_NOT_FOUND)
 
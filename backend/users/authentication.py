@@ -1,24 +1,94 @@
+import copy
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
 from django.conf import settings
-import logging
+
+from config.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# user id -> (expires_at, user). Entries are dropped when the user is saved or deleted in this
+# process (see users/signals.py); other processes see the change within AUTH_USER_CACHE_TTL.
+_user_cache = LRUCache(settings.AUTH_USER_CACHE_SIZE)
+
+
+def forget_cached_user(user_id):
+    _user_cache.delete(user_id)
+
+
 class CustomJWTAuthentication(JWTAuthentication):
-    def authenticate(self, request):
-        logger.info(f"🛠 Checking request.COOKIES: {request.COOKIES}")
+    """
+    Authenticate with the access token in the AUTH_COOKIE cookie.
+
+    The token signature and expiry are checked on every request, while the user row is
+    reused for AUTH_USER_CACHE_TTL seconds instead of being queried each time.
+    """
 
+    def authenticate(self, request):
         token = request.COOKIES.get(settings.SIMPLE_JWT["AUTH_COOKIE"])
         if token is None:
-            logger.warning("❌ No access_token found in cookies")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"No access_token cookie on {request.path} (cookies: {sorted(request.COOKIES)})")
             return None
 
         try:
             validated_token = self.get_validated_token(token)
             user = self.get_user(validated_token)
-            logger.info(f"✅ Authentication successful for user: {user}")
-            return user, validated_token
+        except Exception as e:
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning(f"❌ JWT Authentication failed: {e}")
+            return None
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"✅ Authentication successful for user: {user}")
+        return user, validated_token
 
+    async def aauthenticate(self, request):
+        """`authenticate` for async views; only a user missing from the cache is loaded on a thread."""
+        token = request.COOKIES.get(settings.SIMPLE_JWT["AUTH_COOKIE"])
+        if token is None:
+            return None
+
+        try:
+            validated_token = self.get_validated_token(token)
+            user = self._cached_user(validated_token) or await sync_to_async(self.get_user)(validated_token)
         except Exception as e:
-            logger.error(f"❌ JWT Authentication failed: {e}")
-            return None
\ No newline at end of file
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning(f"❌ JWT Authentication failed: {e}")
+            return None
+        return user, validated_token
+
+    def get_user(self, validated_token):
+        ttl = settings.AUTH_USER_CACHE_TTL
+        if ttl <= 0:
+            return super().get_user(validated_token)
+
+        user = self._cached_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)  # Also rejects unknown and inactive users
+            _user_cache.set(validated_token.get(api_settings.USER_ID_CLAIM), (time.monotonic() + ttl, copy.copy(user)))
+        return user
+
+    def _cached_user(self, validated_token):
+        if settings.AUTH_USER_CACHE_TTL <= 0:
+            return None
+        cached = _user_cache.get(validated_token.get(api_settings.USER_ID_CLAIM))
+        if cached is not None and cached[0] > time.monotonic():
+            # Each request gets its own copy, so a view changing request.user cannot affect others
+            return copy.copy(cached[1])
+        return None
+
+
+async def authenticate_async(request):
+    """Authenticate a plain async view the way the DRF views are, returning the user or None."""
+    auth = await CustomJWTAuthentication().aauthenticate(request)
+    return auth[0] if auth else None
+
+
+def unauthenticated_response():
+    return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
@@ -0,0 +1,62 @@
+# users/crypto.py
+"""
+Encryption of users' 2FA secrets.
+
+Secrets are encrypted with TWOFA_ENCRYPTION_KEY and can be decrypted with it or
+any of TWOFA_PREVIOUS_ENCRYPTION_KEYS. To rotate keys, make the new key
+TWOFA_ENCRYPTION_KEY, list the old one in TWOFA_PREVIOUS_ENCRYPTION_KEYS, run
+`manage.py rotate_2fa_keys`, then drop the old key. Logins keep working
+throughout.
+
+The cipher is built once per process.
+"""
+from functools import lru_cache
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from django.conf import settings
+
+
+@lru_cache(maxsize=1)
+def get_cipher():
+    keys = [settings.TWOFA_ENCRYPTION_KEY, *settings.TWOFA_PREVIOUS_ENCRYPTION_KEYS]
+    return MultiFernet([Fernet(key) for key in keys])
+
+
+@lru_cache(maxsize=1)
+def get_primary_cipher():
+    return Fernet(settings.TWOFA_ENCRYPTION_KEY)
+
+
+def stored_token(value):
+    """
+    The Fernet token in a stored secret_2fa value, as bytes.
+    Secrets used to be stored as the repr of the token bytes, e.g. "b'gAAAAA...'".
+    """
+    if value.startswith(("b'", 'b"')):
+        value = value[2:-1]
+    return value.encode()
+
+
+def encrypt_secret(secret):
+    """Encrypt a TOTP secret for User.secret_2fa."""
+    return get_cipher().encrypt(secret.encode()).decode()
+
+
+def decrypt_secret(value):
+    """Decrypt a stored User.secret_2fa value. Raises cryptography's InvalidToken for an unknown key."""
+    return get_cipher().decrypt(stored_token(value)).decode()
+
+
+def reencrypt_secret(value):
+    """
+    Return the stored value re-encrypted with the current key,
+    or None if it already is and is stored in the current format.
+    """
+    token = stored_token(value)
+    if token.decode() == value:
+        try:
+            get_primary_cipher().decrypt(token)
+            return None
+        except InvalidToken:
+            pass
+    return get_cipher().rotate(token).decode()
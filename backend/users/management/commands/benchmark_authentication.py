@@ -0,0 +1,56 @@
+# users/management/commands/benchmark_authentication.py
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import CustomJWTAuthentication, forget_cached_user
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of cookie JWT authentication with and without the user cache. "
+        "Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000, help="Authentications per mode.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(email="auth-benchmark@example.com", password="benchmark", name="Benchmark")
+            request = RequestFactory().get("/api/posts/")
+            request.COOKIES[settings.SIMPLE_JWT["AUTH_COOKIE"]] = str(AccessToken.for_user(user))
+            authentication = CustomJWTAuthentication()
+
+            forget_cached_user(user.pk)
+            with override_settings(AUTH_USER_CACHE_TTL=0):
+                self._report("uncached", authentication, request, options["requests"])
+            with override_settings(AUTH_USER_CACHE_TTL=max(settings.AUTH_USER_CACHE_TTL, 60)):
+                self._report("cached", authentication, request, options["requests"])
+            self._report("token only", None, request, options["requests"],
+                         lambda: authentication.get_validated_token(request.COOKIES["access_token"]))
+
+            transaction.set_rollback(True)
+        forget_cached_user(user.pk)
+
+    def _report(self, mode, authentication, request, requests, call=None):
+        call = call or (lambda: authentication.authenticate(request))
+        call()  # Warm up (and fill the cache in cached mode)
+        latencies = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                started = time.perf_counter()
+                call()
+                latencies.append(time.perf_counter() - started)
+        latencies = np.array(latencies) * 1e6
+        self.stdout.write(self.style.SUCCESS(
+            f"{mode:>10} | mean {latencies.mean():7.1f}us | p50 {np.percentile(latencies, 50):7.1f}us | "
+            f"p99 {np.percentile(latencies, 99):7.1f}us | queries/request {len(queries) / requests:.2f}"
+        ))
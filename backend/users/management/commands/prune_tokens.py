@@ -0,0 +1,41 @@
+# users/management/commands/prune_tokens.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding and blacklisted refresh tokens in small batches, "
+        "each in its own short transaction. Run periodically, e.g. daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Outstanding tokens deleted per transaction.")
+        parser.add_argument("--pause", type=float, default=0.0,
+                            help="Seconds to wait between batches, to leave room for other writes.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        last_id, num_outstanding, num_blacklisted = 0, 0, 0
+
+        started = time.perf_counter()
+        while ids := list(
+            OutstandingToken.objects.filter(id__gt=last_id, expires_at__lte=now)
+            .order_by("id").values_list("id", flat=True)[:options["batch_size"]]
+        ):
+            with transaction.atomic():
+                num_blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                num_outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+            last_id = ids[-1]
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {num_outstanding} expired tokens ({num_blacklisted} blacklisted) in {elapsed:.1f}s"
+        ))
@@ -4,14 +4,12 @@ from django.contrib.auth import authenticate
 
 import pyotp
 import qrcode
-import os
 
-from cryptography.fernet import Fernet #cryptography package
+from .crypto import decrypt_secret
 
 User = get_user_model() # AUTH_USER_MODEL = 'users.User'
 
-
-TWOFA_ENCRYPTION_KEY = os.getenv("TWOFA_ENCRYPTION_KEY")
+TWO_FACTOR_REQUIRED = "2fa_required"  # Error code of a correct password whose user must also send a 2FA code
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -53,7 +51,7 @@ class TraditionalLoginSerializer(serializers.Serializer):
         # TODO: If user has 2FA enabled, return a response indicating that OTP is required.
 
         if (user.requires_2fa):
-            raise serializers.ValidationError({"error": "Requires 2FA Code."})
+            raise serializers.ValidationError({"error": "Requires 2FA Code."}, code=TWO_FACTOR_REQUIRED)
 
 
         return user # Return the authenticated user
@@ -132,12 +130,8 @@ class TwoFactorVerificationSerializer(serializers.Serializer):
         if not (user.secret_2fa):
             raise serializers.ValidationError({"error": "User doesn't require 2FA!"})
         
-        f = Fernet(TWOFA_ENCRYPTION_KEY) 
         otp_code = data['code']
-        secret=user.secret_2fa[1:]  #do 1: to not include byte identifier
-        secret_decrypted=f.decrypt(secret)
-        secret_decoded=secret_decrypted.decode()
-        totp = pyotp.TOTP(secret_decoded)
+        totp = pyotp.TOTP(decrypt_secret(user.secret_2fa))
 
         if totp.verify(otp_code):
             return user # Return the authenticated user
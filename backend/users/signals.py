@@ -0,0 +1,10 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.authentication import forget_cached_user
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_authenticated_user(sender, instance, **kwargs):
+    """Make the next request of this user load it again, e.g. after a password or is_active change."""
+    forget_cached_user(instance.pk)
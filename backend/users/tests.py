@@ -1,3 +1,204 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from cryptography.fernet import Fernet, InvalidToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from . import crypto, tokens
+from .models import User
+from .throttling import SlidingWindowCounter, _blocked
+from .tokens import BloomFilter, FilteredRefreshToken
+
+
+class SlidingWindowCounterTests(SimpleTestCase):
+    def setUp(self):
+        self.counter = SlidingWindowCounter(window=60, buckets=6)  # 10 s intervals
+
+    def _record(self, times):
+        data = None
+        for now in times:
+            data = self.counter.add(data, now)
+        return data
+
+    def test_counts_events_within_the_window(self):
+        data = self._record([1000, 1005, 1012, 1031])
+        self.assertEqual(self.counter.count(data, 1035), 4)
+
+    def test_intervals_leave_the_window_as_it_rolls_over(self):
+        data = self._record([1000, 1005, 1012, 1031])
+        self.assertEqual(self.counter.count(data, 1065), 2)  # The 1000-1009 interval is gone
+        self.assertEqual(self.counter.count(data, 1075), 1)
+        self.assertEqual(self.counter.count(data, 1095), 0)
+
+    def test_a_counter_idle_for_longer_than_the_window_starts_over(self):
+        data = self._record([1000, 1001, 1002])
+        data = self.counter.add(data, 2000)
+        self.assertEqual(self.counter.count(data, 2000), 1)
+
+    def test_retry_after_is_when_the_count_drops_below_the_limit(self):
+        data = self._record([1000, 1000, 1025])
+        self.assertAlmostEqual(self.counter.retry_after(data, 1030, limit=3), 30)  # 1000's interval leaves at 1060
+        self.assertAlmostEqual(self.counter.retry_after(data, 1030, limit=2), 30)
+        self.assertAlmostEqual(self.counter.retry_after(data, 1030, limit=1), 50)
+
+
+@override_settings(
+    LOGIN_THROTTLE_EMAIL_LIMIT=3, LOGIN_THROTTLE_IP_LIMIT=100,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],  # Fast hashing, these tests log in often
+)
+class LoginThrottleTests(TestCase):
+    url = "/api/users/login/"
+
+    def setUp(self):
+        caches["shared"].clear()
+        _blocked.clear()
+        self.user = User.objects.create_user(email="owner@example.com", password="correct-password", name="Owner")
+
+    def _login(self, password):
+        return self.client.post(
+            self.url, {"credentials": {"email": "owner@example.com", "password": password}}, content_type="application/json",
+        )
+
+    def test_email_is_locked_out_at_the_limit(self):
+        for _ in range(3):
+            self.assertEqual(self._login("wrong-password").status_code, 400)
+        response = self._login("correct-password")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    def test_successful_login_forgets_earlier_failures(self):
+        for _ in range(2):
+            self._login("wrong-password")
+        self.assertEqual(self._login("correct-password").status_code, 200)
+        for _ in range(2):
+            self._login("wrong-password")
+        self.assertEqual(self._login("correct-password").status_code, 200)
+
+    def test_login_waiting_for_a_2fa_code_is_not_a_failure(self):
+        User.objects.filter(pk=self.user.pk).update(requires_2fa=True)
+        for _ in range(5):
+            response = self._login("correct-password")
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["error"], ["Requires 2FA Code."])
+        self._login("wrong-password")
+        self.assertEqual(self._login("wrong-password").status_code, 400)  # Two failures, under the limit of 3
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_added_values_are_always_found(self):
+        bloom = BloomFilter(1000)
+        values = [f"jti-{i}" for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+
+    def test_few_other_values_are_reported(self):
+        bloom = BloomFilter(1000)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)  # About 1% expected
+
+
+class RefreshTokenBlacklistTests(TestCase):
+    def setUp(self):
+        tokens._filter = (0.0, None)
+        tokens._blacklisted_here.clear()
+        self.user = User.objects.create_user(email="owner@example.com", password="correct-password", name="Owner")
+
+    def test_token_blacklisted_in_this_process_is_rejected(self):
+        token = FilteredRefreshToken.for_user(self.user)
+        token.blacklist()
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(str(token))
+
+    def test_token_blacklisted_elsewhere_is_rejected_once_the_filter_is_rebuilt(self):
+        token = FilteredRefreshToken.for_user(self.user)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token["jti"]))
+        tokens._filter = (0.0, None)
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(str(token))
+
+    def test_unlisted_token_passes_without_querying_the_blacklist(self):
+        FilteredRefreshToken.for_user(self.user).blacklist()
+        token = FilteredRefreshToken.for_user(self.user)
+        tokens.get_blacklist_filter()
+        with self.assertNumQueries(0):
+            FilteredRefreshToken(str(token))
+
+    def _refresh(self, refresh):
+        return self.client.post("/api/users/token/refresh/", {"refresh": refresh}, content_type="application/json")
+
+    def test_refresh_endpoint_rejects_a_rotated_token(self):
+        refresh = str(FilteredRefreshToken.for_user(self.user))
+        self.assertEqual(self._refresh(refresh).status_code, 200)
+        self.assertEqual(self._refresh(refresh).status_code, 401)
+
+
+class PruneTokensTests(TestCase):
+    def test_only_expired_tokens_are_deleted(self):
+        user = User.objects.create_user(email="owner@example.com", password="correct-password", name="Owner")
+        now = timezone.now()
+
+        def token(jti, expires_in, blacklisted=False):
+            outstanding = OutstandingToken.objects.create(
+                user=user, jti=jti, token=jti, created_at=now - timedelta(days=2), expires_at=now + expires_in,
+            )
+            if blacklisted:
+                BlacklistedToken.objects.create(token=outstanding)
+
+        token("expired", timedelta(days=-1))
+        token("expired-blacklisted", timedelta(days=-1), blacklisted=True)
+        token("valid", timedelta(days=1))
+        token("valid-blacklisted", timedelta(days=1), blacklisted=True)
+
+        call_command("prune_tokens", batch_size=1, stdout=StringIO())
+        self.assertCountEqual(OutstandingToken.objects.values_list("jti", flat=True), ["valid", "valid-blacklisted"])
+        self.assertCountEqual(BlacklistedToken.objects.values_list("token__jti", flat=True), ["valid-blacklisted"])
+
+
+class RotateTwoFactorKeysTests(TestCase):
+    old_key, new_key, unknown_key = (Fernet.generate_key().decode() for _ in range(3))
+
+    def _keys(self, current, previous=()):
+        """Settings for the given 2FA keys; the ciphers are cached per process, so they are rebuilt."""
+        crypto.get_cipher.cache_clear()
+        crypto.get_primary_cipher.cache_clear()
+        self.addCleanup(crypto.get_cipher.cache_clear)
+        self.addCleanup(crypto.get_primary_cipher.cache_clear)
+        return override_settings(TWOFA_ENCRYPTION_KEY=current, TWOFA_PREVIOUS_ENCRYPTION_KEYS=list(previous))
+
+    def _user(self, email, secret_2fa):
+        return User.objects.create_user(email=email, password="correct-password", name="Owner", secret_2fa=secret_2fa)
+
+    def test_rotated_secrets_decrypt_with_only_the_new_key(self):
+        with self._keys(self.old_key):
+            current = self._user("current@example.com", crypto.encrypt_secret("CURRENTSECRET"))
+            legacy = self._user("legacy@example.com", repr(crypto.encrypt_secret("LEGACYSECRET").encode()))
+        with self._keys(self.unknown_key):
+            lost = self._user("lost@example.com", crypto.encrypt_secret("LOSTSECRET"))
+
+        with self._keys(self.new_key, previous=[self.old_key]):
+            out = StringIO()
+            call_command("rotate_2fa_keys", restart=True, stdout=out)
+        self.assertIn("Re-encrypted 2 of 3", out.getvalue())
+        self.assertIn("skipped 1", out.getvalue())
+
+        for user in (current, legacy, lost):
+            user.refresh_from_db()
+        with self._keys(self.new_key):
+            self.assertEqual(crypto.decrypt_secret(current.secret_2fa), "CURRENTSECRET")
+            self.assertEqual(crypto.decrypt_secret(legacy.secret_2fa), "LEGACYSECRET")
+        with self._keys(self.unknown_key):
+            self.assertEqual(crypto.decrypt_secret(lost.secret_2fa), "LOSTSECRET")  # Left as it was
+
+    def test_secrets_of_the_old_key_do_not_decrypt_without_it(self):
+        with self._keys(self.old_key):
+            value = crypto.encrypt_secret("SECRET")
+        with self._keys(self.new_key), self.assertRaises(InvalidToken):
+            crypto.decrypt_secret(value)
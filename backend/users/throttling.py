@@ -0,0 +1,128 @@
+# users/throttling.py
+"""
+Brute-force protection for LoginView.
+
+Failed logins are counted per email and per client IP over a sliding window.
+Each counter is a fixed-size ring buffer of per-interval counts packed into a
+few dozen bytes and stored in the shared cache, so every process sees the same
+counts. Once a key is over its limit, the process also remembers until when,
+so further attempts are rejected without a cache round trip. Rejected requests
+never reach authenticate() and its password hashing.
+"""
+import hashlib
+import struct
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from config.cache import LRUCache
+
+BLOCKED_KEYS_SIZE = 10000  # Over-limit keys remembered per process
+
+_blocked = LRUCache(BLOCKED_KEYS_SIZE)  # cache key -> time until which it is over its limit
+
+
+class SlidingWindowCounter:
+    """
+    Events in the last `window` seconds, kept as `buckets` counts of window / buckets seconds each.
+    Serialized as the absolute number of the newest interval followed by the counts, oldest overwritten first.
+    """
+
+    def __init__(self, window, buckets):
+        self.window = window
+        self.buckets = buckets
+        self.interval = window / buckets
+        self._format = struct.Struct(f"<q{buckets}H")
+
+    def _advance(self, data, now):
+        """Return (newest interval, counts) with intervals that left the window cleared."""
+        current = int(now // self.interval)
+        if data is None:
+            return current, [0] * self.buckets
+        head, *counts = self._format.unpack(data)
+        if current - head >= self.buckets:
+            return current, [0] * self.buckets
+        for interval in range(head + 1, current + 1):
+            counts[interval % self.buckets] = 0
+        return current, counts
+
+    def count(self, data, now):
+        return sum(self._advance(data, now)[1])
+
+    def add(self, data, now):
+        """Record one event; return the new serialized counter."""
+        head, counts = self._advance(data, now)
+        slot = head % self.buckets
+        counts[slot] = min(counts[slot] + 1, 0xFFFF)
+        return self._format.pack(head, *counts)
+
+    def retry_after(self, data, now, limit):
+        """Seconds until fewer than `limit` events remain in the window."""
+        head, counts = self._advance(data, now)
+        total = sum(counts)
+        for interval in range(head - self.buckets + 1, head + 1):
+            total -= counts[interval % self.buckets]
+            if total < limit:
+                return (interval + self.buckets) * self.interval - now
+        return self.window
+
+
+def _counter():
+    return SlidingWindowCounter(settings.LOGIN_THROTTLE_WINDOW, settings.LOGIN_THROTTLE_BUCKETS)
+
+
+def _keys(request, ident):
+    """(cache key, limit) pairs limiting a login request: its client IP and, if given, its email."""
+    keys = [(f"login-failures:ip:{ident}", settings.LOGIN_THROTTLE_IP_LIMIT)]
+    credentials = request.data.get("credentials") if hasattr(request.data, "get") else None
+    email = credentials.get("email") if isinstance(credentials, dict) else None
+    if isinstance(email, str) and email.strip():
+        digest = hashlib.blake2b(email.strip().lower().encode(), digest_size=16).hexdigest()
+        keys.append((f"login-failures:email:{digest}", settings.LOGIN_THROTTLE_EMAIL_LIMIT))
+    return keys
+
+
+class LoginRateThrottle(BaseThrottle):
+    """Reject login attempts while the client IP or the email has too many recent failures."""
+
+    def allow_request(self, request, view):
+        now = time.time()
+        keys = _keys(request, self.get_ident(request))
+        self.retry_after = 0
+
+        for key, _ in keys:
+            blocked_until = _blocked.get(key)
+            if blocked_until is not None and blocked_until > now:
+                self.retry_after = blocked_until - now
+                return False
+
+        counter = _counter()
+        stored = caches["shared"].get_many([key for key, _ in keys])
+        for key, limit in keys:
+            data = stored.get(key)
+            if counter.count(data, now) >= limit:
+                self.retry_after = counter.retry_after(data, now, limit)
+                _blocked.set(key, now + self.retry_after)
+                return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+    def record_failure(self, request):
+        """Count a failed login against the request's IP and email."""
+        now = time.time()
+        keys = [key for key, _ in _keys(request, self.get_ident(request))]
+        cache = caches["shared"]
+        counter = _counter()
+        stored = cache.get_many(keys)
+        # Read-modify-write: concurrent failures may occasionally be counted once
+        cache.set_many({key: counter.add(stored.get(key), now) for key in keys}, timeout=counter.window)
+
+    def record_success(self, request):
+        """Forget the email's failures once its owner has logged in; the IP's count is kept."""
+        keys = [key for key, _ in _keys(request, self.get_ident(request))][1:]
+        if keys:
+            caches["shared"].delete_many(keys)
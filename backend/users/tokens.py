@@ -0,0 +1,107 @@
+# users/tokens.py
+"""
+Refresh tokens whose blacklist check usually skips the database.
+
+Every process keeps a Bloom filter of the jtis of blacklisted, unexpired
+refresh tokens. A token the filter has never seen cannot be blacklisted, so
+only tokens it reports as possibly blacklisted (about 1% false positives, plus
+the real ones) query BlacklistedToken. Tokens blacklisted by this process are
+added to its filter at once; the filter is rebuilt from the database every
+TOKEN_BLACKLIST_FILTER_TTL seconds to pick up those blacklisted by other
+processes.
+"""
+import hashlib
+import math
+import time
+from threading import Lock
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+FALSE_POSITIVE_RATE = 0.01
+MIN_BITS = 1 << 13
+
+
+class BloomFilter:
+    """A fixed-size set of strings answering "possibly present" or "definitely absent"."""
+
+    def __init__(self, capacity, false_positive_rate=FALSE_POSITIVE_RATE):
+        bits = -max(capacity, 1) * math.log(false_positive_rate) / math.log(2) ** 2
+        self.num_bits = max(MIN_BITS, int(bits))
+        self.num_hashes = max(1, round(-math.log2(false_positive_rate)))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self._lock = Lock()  # A lost bit would let a blacklisted token through
+
+    def _positions(self, value):
+        # Double hashing: position i is h1 + i * h2, both taken from one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, value):
+        positions = self._positions(value)
+        with self._lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+_filter_lock = Lock()
+_filter = (0.0, None)  # (monotonic time it was built, BloomFilter) of this process
+_blacklisted_here = []  # (monotonic time, jti) blacklisted by this process, re-added to rebuilt filters
+
+
+def build_blacklist_filter(chunk_size=5000):
+    """Return a Bloom filter of the jtis of blacklisted refresh tokens that have not expired."""
+    jtis = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now()).values_list("token__jti", flat=True)
+    bloom = BloomFilter(jtis.count() * 2)  # Headroom for tokens blacklisted before the next rebuild
+    for jti in jtis.iterator(chunk_size=chunk_size):
+        bloom.add(jti)
+    return bloom
+
+
+def get_blacklist_filter():
+    global _filter
+    built_at, bloom = _filter
+    if bloom is None or time.monotonic() - built_at > settings.TOKEN_BLACKLIST_FILTER_TTL:
+        with _filter_lock:
+            built_at, bloom = _filter
+            if bloom is None or time.monotonic() - built_at > settings.TOKEN_BLACKLIST_FILTER_TTL:
+                started = time.monotonic()
+                bloom = build_blacklist_filter()
+                # A rebuild may have read the table just before one of these rows was committed
+                _blacklisted_here[:] = [
+                    (at, jti) for at, jti in _blacklisted_here
+                    if at > started - 2 * settings.TOKEN_BLACKLIST_FILTER_TTL
+                ]
+                for _, jti in _blacklisted_here:
+                    bloom.add(jti)
+                _filter = (started, bloom)
+    return bloom
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken checking the blacklist filter before the BlacklistedToken table."""
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in get_blacklist_filter():
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        jti = self.payload[api_settings.JTI_CLAIM]
+        with _filter_lock:
+            _blacklisted_here.append((time.monotonic(), jti))
+        get_blacklist_filter().add(jti)
+        return result
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
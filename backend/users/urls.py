@@ -1,11 +1,12 @@
 from django.urls import path
-from .views import RegisterView, LoginView, UserProfileView, LogoutView, ForgotPasswordView, ResetPasswordView,Check2FA,Remove2FA,Enable2FA
+from .views import RegisterView, LoginView, UserProfileView, LogoutView, TokenRefreshView, ForgotPasswordView, ResetPasswordView,Check2FA,Remove2FA,Enable2FA
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('me/', UserProfileView.as_view(), name='user-profile'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('password/forgot/', ForgotPasswordView.as_view(), name='forgot-password'),
     path('password/reset/', ResetPasswordView.as_view(), name='reset-password'),
     
@@ -3,30 +3,29 @@ from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import GenericAPIView
 from django.contrib.auth import get_user_model
-from .serializers import RegisterSerializer, TraditionalLoginSerializer, SocialLoginSerializer, PasskeyLoginSerializer, TwoFactorVerificationSerializer, ForgotPasswordSerializer, ResetPasswordSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
+from .serializers import RegisterSerializer, TraditionalLoginSerializer, SocialLoginSerializer, PasskeyLoginSerializer, TwoFactorVerificationSerializer, ForgotPasswordSerializer, ResetPasswordSerializer, TWO_FACTOR_REQUIRED
+from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
+from .crypto import decrypt_secret, encrypt_secret
+from .tokens import FilteredRefreshToken, FilteredTokenRefreshSerializer
 from django.conf import settings
 import logging
 from drf_spectacular.utils import extend_schema
+from .throttling import LoginRateThrottle
 from .schemas import register_schema, login_schema, me_schema, logout_schema, forgot_password_schema, reset_password_schema
 
-from cryptography.fernet import Fernet #cryptography package
-
 from django.http import JsonResponse
 import pyotp
 import qrcode
 import base64
-import os
 from io import BytesIO
 
 
 # Get the custom User model
 User = get_user_model()
 
-TWOFA_ENCRYPTION_KEY = os.getenv("TWOFA_ENCRYPTION_KEY")
-
 # Setup logger for debugging and tracking requests
 logger = logging.getLogger(__name__)
 
@@ -54,9 +53,11 @@ class LoginView(APIView):
     API for user authentication.
     - Returns access & refresh tokens if authentication is successful
     - Stores the access token in HttpOnly Secure Cookie
+    - Rejects attempts with 429 while the email or client IP has too many recent failures
     """
     permission_classes = [AllowAny]
     parser_classes = [JSONParser]
+    throttle_classes = [LoginRateThrottle]  # Checked before the credentials are, so blocked attempts skip password hashing
 
     def get_serializer_class(self):
         """Returns the appropriate serializer based on the login method"""
@@ -81,9 +82,14 @@ class LoginView(APIView):
             )
 
         serializer = serializer_class(data=request.data.get("credentials", {}))
-        serializer.is_valid(raise_exception=True)
+        if not serializer.is_valid():
+            # A correct password of a 2FA user is the first step of a normal login, not a failure
+            if not any(error.code == TWO_FACTOR_REQUIRED for error in serializer.errors.get("error", [])):
+                LoginRateThrottle().record_failure(request)
+            raise ValidationError(serializer.errors)
+        LoginRateThrottle().record_success(request)
         user = serializer.validated_data # Get authenticated user
-        tokens = RefreshToken.for_user(user) # Generate tokens
+        tokens = FilteredRefreshToken.for_user(user) # Generate tokens
 
         response = Response({
             "message": "Login successful",
@@ -155,7 +161,7 @@ class LogoutView(APIView):
         refresh_token = request.data.get("refresh")
         if refresh_token:
             try:
-                token = RefreshToken(refresh_token)
+                token = FilteredRefreshToken(refresh_token)
                 token.blacklist()
             except Exception as e:
                 logger.error(f"❌ Failed to blacklist refresh token: {e}")
@@ -163,6 +169,31 @@ class LogoutView(APIView):
         return response
 
 
+class TokenRefreshView(BaseTokenRefreshView):
+    """
+    API for renewing the access token with a refresh token.
+    - Returns a new (rotated) refresh token; the used one is blacklisted
+    - Stores the new access token in HttpOnly Secure Cookie, like LoginView
+    """
+    permission_classes = [AllowAny]
+    parser_classes = [JSONParser]
+    serializer_class = FilteredTokenRefreshSerializer
+
+    def post(self, request, *args, **kwargs):
+        response = super().post(request, *args, **kwargs)
+        access = response.data.pop("access", None)
+        if access:
+            response.set_cookie(
+                key=settings.SIMPLE_JWT["AUTH_COOKIE"],
+                value=access,
+                httponly=settings.SIMPLE_JWT["AUTH_COOKIE_HTTP_ONLY"],
+                secure=settings.SIMPLE_JWT["AUTH_COOKIE_SECURE"],
+                samesite=settings.SIMPLE_JWT["AUTH_COOKIE_SAMESITE"],
+                max_age=60 * 60 * 24,  # Valid for 1 day
+            )
+        return response
+
+
 class ForgotPasswordView(GenericAPIView):
     permission_classes = [AllowAny]
     parser_classes = [JSONParser]
@@ -199,21 +230,19 @@ class Check2FA(APIView):
         code=request.data.get('code')
 
         user=request.user
+        # request.user may come from the authentication cache; read the 2FA fields fresh
+        user.refresh_from_db(fields=["secret_2fa", "requires_2fa"])
         #if code is given then user is trying to add 2fa
         if(code!=''):
             #try check if the code is valid      
-            f = Fernet(TWOFA_ENCRYPTION_KEY) 
             otp_code = code
-            secret=user.secret_2fa[1:]  #do 1: to not include byte identifier
-            secret_decrypted=f.decrypt(secret)
-            secret_decoded=secret_decrypted.decode()
-            totp = pyotp.TOTP(secret_decoded)
+            totp = pyotp.TOTP(decrypt_secret(user.secret_2fa))
 
             if not totp.verify(otp_code):
                 return Response({'status': False}, status=status.HTTP_400_BAD_REQUEST)
 
             user.requires_2fa = True
-            user.save()
+            user.save(update_fields=["requires_2fa"])
             return Response({"status": user.requires_2fa}, status=status.HTTP_200_OK)
         #else user is just checking if it is enabled
 
@@ -227,7 +256,7 @@ class Remove2FA(APIView):
         user=request.user
         user.secret_2fa = ""
         user.requires_2fa = False
-        user.save()
+        user.save(update_fields=["secret_2fa", "requires_2fa"])
         return Response({"status": user.requires_2fa}, status=status.HTTP_200_OK)
     
 class Enable2FA(APIView):
@@ -239,14 +268,12 @@ class Enable2FA(APIView):
         user=request.user
 
         secret = pyotp.random_base32()
-        secret_bytes = str.encode(secret) #convert to bytes
-        f = Fernet(TWOFA_ENCRYPTION_KEY) #assign encryption key
-        # the plaintext is converted to ciphertext 
-        secret_encrypted = f.encrypt(secret_bytes) 
+        # the plaintext is converted to ciphertext
+        secret_encrypted = encrypt_secret(secret)
         
 
         user.secret_2fa = secret_encrypted
-        user.save()
+        user.save(update_fields=["secret_2fa"])
         #generate qr code
         otp_uri = pyotp.totp.TOTP(secret).provisioning_uri(user.email, issuer_name="AI-Marketer")
         qr = qrcode.make(otp_uri)